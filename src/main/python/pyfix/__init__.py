@@ -17,7 +17,8 @@ __author__ = "Alexander Metzner"
 __version__ = "${version}"
 
 from .cli import run_tests
-from .decorators import test, given, before, after
-from .fixture import Fixture, ConstantFixture, EnumeratingFixture, enumerate
+from .decorators import test, given, before, after, parallel, timeout, benchmark
+from .fixture import (Fixture, ConstantFixture, EnumeratingFixture, enumerate, SCOPE_TEST, SCOPE_MODULE,
+                      SCOPE_SUITE)
 from .testcollector import TestCollector, TestDefinition
 from .testrunner import TestRunner, TestRunListener, TestResult, TestSuiteResult
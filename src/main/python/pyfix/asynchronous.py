@@ -0,0 +1,340 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides support for asynchronous tests, interceptors and fixtures based on asyncio.
+
+All awaitables are executed on a single event loop that is shared by all tests of a suite. The loop runs in a thread
+of its own, so awaitables can be handed to it by any thread, e.g. by the threads executing the variants of a parallel
+test. This module requires a Python version that supports asyncio and is only imported by the TestInjector if it is
+available.
+"""
+
+__author__ = "Alexander Metzner"
+
+import asyncio
+import inspect
+import os
+import threading
+import traceback
+
+from .utils import perf_counter_ns
+
+
+def is_coroutine_function(function):
+    "Returns True if the given function (or callable object) returns a coroutine when being called."
+    return inspect.iscoroutinefunction(function) or inspect.iscoroutinefunction(getattr(function, "__call__", None))
+
+
+def _format_coroutine_stack(coroutine):
+    # Task.print_stack only shows the outermost frame so the chain of awaited coroutines is followed explicitly.
+    frames = []
+    while coroutine is not None and getattr(coroutine, "cr_frame", None) is not None:
+        frames.append((coroutine.cr_frame, coroutine.cr_frame.f_lineno))
+        coroutine = coroutine.cr_await
+    return "".join(traceback.format_list(traceback.StackSummary.extract(frames)))
+
+
+async def _await_if_needed(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+_CLOSE_TIMEOUT = 5
+
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_forever()
+        all_tasks = getattr(asyncio, "all_tasks", None) or asyncio.Task.all_tasks
+        tasks = [task for task in all_tasks(loop) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    finally:
+        loop.close()
+
+
+class AsyncTestExecutor(object):
+    """
+    Executes asynchronous TestDefinitions on an event loop shared by all tests. Up to concurrency test executions
+    (of one or more TestDefinitions) run concurrently on that loop.
+
+    The loop runs in a daemon thread of its own and the calling threads wait for the results. If a thread waiting for
+    the loop is abandoned (see abandon), the loop is no longer shared: it is left to finish the abandoned awaitable and
+    stops afterwards, while a new loop is started for all further awaitables.
+    """
+
+    def __init__(self, injector, concurrency=1):
+        self._injector = injector
+        self._concurrency = concurrency
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._pid = None
+        self._waiting = {}
+        self._fixture_lock = None
+
+    @property
+    def loop(self):
+        "The shared event loop; started if it is not running."
+        with self._lock:
+            if self._pid != os.getpid():
+                # A loop inherited by a forked process has no thread running it.
+                self._pid = os.getpid()
+                self._loop = None
+                self._waiting = {}
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=_run_loop, args=(self._loop,))
+                self._thread.daemon = True
+                self._thread.start()
+            return self._loop
+
+    def close(self):
+        """
+        Stops and closes the shared event loop; pending tasks are cancelled. A loop that does not stop in time (as it
+        is blocked) is left running. A new loop will be started when another awaitable has to be executed.
+        """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+            if self._pid != os.getpid():
+                return
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(_CLOSE_TIMEOUT)
+
+    def abandon(self, thread):
+        "Called when the given thread has been abandoned. If it waits for the shared loop, the loop is replaced."
+        with self._lock:
+            loop, future = self._waiting.get(thread, (None, None))
+            if loop is None or loop is not self._loop:
+                return
+            self._loop = self._thread = None
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(loop.stop))
+
+    def resolve(self, value):
+        "Returns the given value or, if it is an awaitable, its result computed on the shared event loop."
+        if inspect.isawaitable(value):
+            return self._run(_await_if_needed(value))
+        return value
+
+    def execute_tests(self, test_definitions):
+        """
+        Executes the given asynchronous TestDefinitions concurrently and returns a list containing a list of
+        TestResults for each TestDefinition (in the order of the given definitions).
+        """
+        return self._run(self._execute_tests(test_definitions))
+
+    def _run(self, coroutine):
+        "Runs the given coroutine on the shared loop and waits for its result."
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("Awaitables cannot be resolved synchronously by the event loop thread")
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+        thread = threading.current_thread()
+        with self._lock:
+            self._waiting[thread] = (loop, future)
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                if self._waiting.get(thread, (None, None))[1] is future:
+                    del self._waiting[thread]
+
+    async def _execute_tests(self, test_definitions):
+        semaphore = asyncio.Semaphore(self._concurrency)
+        self._fixture_lock = asyncio.Lock()
+        return await asyncio.gather(*[self._execute_test(d, semaphore) for d in test_definitions])
+
+    async def _resolve_fixtures(self, test_definition):
+        "Like TestInjector._resolve_fixtures but fixtures that are provided concurrently are provided by tasks."
+        givens, nodes = self._injector._build_fixture_graph(test_definition)
+        pending = [node for node in nodes if node.values is None]
+        if self._injector._is_concurrent(pending):
+            tasks = {}
+            for node in pending:
+                tasks[id(node)] = asyncio.ensure_future(self._provide_fixture_node(node, tasks))
+            await asyncio.gather(*tasks.values())
+        else:
+            for node in pending:
+                await self._provide_fixture_node(node, {})
+                if node.error is not None:
+                    break
+        return self._injector._get_resolved_fixtures(givens, nodes)
+
+    async def _provide_fixture_node(self, node, tasks):
+        for dependency in node.dependencies.values():
+            if id(dependency) in tasks:
+                await tasks[id(dependency)]
+            if dependency.values is None:
+                return
+        try:
+            values = node.fixture.provide(**self._injector._get_dependency_values(node))
+            self._injector._set_provided_values(node, await _await_if_needed(values))
+        except Exception:
+            node.error = self._injector._get_exception_information()
+
+    async def _reclaim_fixtures(self, nodes):
+        "Like TestInjector._reclaim_fixtures but fixtures that are reclaimed concurrently are reclaimed by tasks."
+        if not self._injector._is_concurrent(nodes):
+            for node in reversed(nodes):
+                for value in node.values:
+                    await _await_if_needed(node.fixture.reclaim(value))
+            return
+
+        tasks = {}
+        for node in reversed(nodes):
+            dependents = [tasks[id(n)] for n in nodes if id(n) in tasks and node in n.dependencies.values()]
+            tasks[id(node)] = asyncio.ensure_future(self._reclaim_fixture_node(node, dependents))
+        for error in await asyncio.gather(*tasks.values(), return_exceptions=True):
+            if error is not None:
+                raise error
+
+    async def _reclaim_fixture_node(self, node, dependents):
+        await asyncio.gather(*dependents, return_exceptions=True)
+        for value in node.values:
+            await _await_if_needed(node.fixture.reclaim(value))
+
+    async def _execute_test(self, test_definition, semaphore):
+        from .testrunner import PARAMETER_GROUP_FAILED, PARAMETER_GROUP_RECLAIM, PHASE_PROVIDE, PHASE_RECLAIM, \
+            PhaseTimer
+
+        # Fixtures are resolved by one test at a time so that cached fixtures are provided only once.
+        async with self._fixture_lock:
+            timer = PhaseTimer()
+            timer.start(PHASE_PROVIDE)
+            fixtures, reclaimable, failed_node = await self._resolve_fixtures(test_definition)
+            timer.stop()
+
+        if failed_node is not None:
+            timer.start(PHASE_RECLAIM)
+            await self._reclaim_fixtures(reclaimable)
+            timer.stop()
+            return [self._injector._create_fixture_failure_result(test_definition, failed_node, timer)]
+
+        lazy_names = self._injector._get_lazy_fixture_names(fixtures)
+        results = []
+
+        try:
+            for kind, item in self._injector._iterate_parameter_groups(fixtures, lazy_names):
+                if kind == PARAMETER_GROUP_RECLAIM:
+                    fixture, value = item
+                    timer.start(PHASE_RECLAIM)
+                    await _await_if_needed(fixture.reclaim(value))
+                    timer.stop()
+                elif kind == PARAMETER_GROUP_FAILED:
+                    fixture, error = item
+                    results.append(self._injector._create_fixture_error_result(test_definition, fixture, error,
+                                                                               PhaseTimer()))
+                else:
+                    results += await self._execute_parameter_sets(test_definition, fixtures, item, semaphore)
+        finally:
+            timer.start(PHASE_RECLAIM)
+            await self._reclaim_fixtures(reclaimable)
+            timer.stop()
+
+        self._injector._add_fixture_phase_times(results, timer.phase_times)
+        return results
+
+    async def _execute_parameter_sets(self, test_definition, fixtures, parameter_sets, semaphore):
+        parameter_sets = enumerate(parameter_sets)
+        results = {}
+
+        # The workers share a single (lazy) iterator so only a bounded number of parameter sets exist at a time.
+        async def execute_parameter_sets():
+            for index, parameters in parameter_sets:
+                async with semaphore:
+                    results[index] = await self._execute_test_once(test_definition, fixtures, parameters)
+
+        await asyncio.gather(*[execute_parameter_sets() for _ in range(self._concurrency)])
+
+        return [results[index] for index in range(len(results))]
+
+    async def _execute_interceptors(self, interceptors):
+        for interceptor in interceptors:
+            await _await_if_needed(interceptor())
+
+    async def _execute_test_once(self, test_definition, fixtures, parameters):
+        timeout = self._injector.get_timeout(test_definition)
+        if timeout is None:
+            return await self._execute_test_once_without_timeout(test_definition, fixtures, parameters)
+
+        start = perf_counter_ns()
+        task = asyncio.ensure_future(self._execute_test_once_without_timeout(test_definition, fixtures, parameters))
+        done, pending = await asyncio.wait([task], timeout=timeout)
+        if done:
+            return task.result()
+
+        end = perf_counter_ns()
+
+        stack = _format_coroutine_stack(task.get_coro())
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+        return self._injector._create_timeout_result(test_definition, fixtures, parameters, timeout,
+                                                     end - start, stack)
+
+    async def _execute_test_once_without_timeout(self, test_definition, fixtures, parameters):
+        from .testrunner import PHASE_AFTER, PHASE_BEFORE, PHASE_TEST, PhaseTimer, TestResult, \
+            _NANO_SECONDS_PER_MILLI_SECOND
+
+        timer = PhaseTimer()
+
+        message = None
+        traceback = None
+        success = False
+
+        try:
+            timer.start(PHASE_BEFORE)
+            await self._execute_interceptors(test_definition.before_interceptors)
+
+            timer.start(PHASE_TEST)
+            try:
+                await _await_if_needed(test_definition.function(**parameters))
+                success = True
+            except AssertionError as error:
+                message = str(error)
+            except:
+                message, traceback = self._injector._get_exception_information()
+
+        except:
+            message, traceback = self._injector._get_exception_information()
+            message = "Execution of before interceptor failed: " + message
+            success = False
+
+        finally:
+            timer.start(PHASE_AFTER)
+            try:
+                await self._execute_interceptors(test_definition.after_interceptors)
+            except:
+                message, traceback = self._injector._get_exception_information()
+                message = "Execution of after interceptor failed: " + message
+                success = False
+
+        timer.stop()
+
+        return TestResult(test_definition, success, timer.total // _NANO_SECONDS_PER_MILLI_SECOND,
+            self._injector._build_parameter_description(fixtures, parameters), message, traceback, timer.total,
+            timer.phase_times, parameter_key=self._injector._build_parameter_key(fixtures, parameters))
@@ -0,0 +1,200 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides a persistent baseline of execution times that later runs are compared against in order to detect
+performance regressions.
+"""
+
+__author__ = "Alexander Metzner"
+
+import math
+
+from .benchmark import format_time
+from .resultcache import get_test_key
+from .testrunner import TestRunListener
+from .utils import read_json_file, write_json_file
+
+DEFAULT_BASELINE_FILE = ".pyfix-baseline.json"
+DEFAULT_THRESHOLD = 0.1
+DEFAULT_HISTORY = 10
+
+# Critical values of the one-sided t-test with a significance level of 5% for 1 to 30 degrees of freedom.
+_CRITICAL_T_VALUES = (6.314, 2.920, 2.353, 2.132, 2.015, 1.943, 1.895, 1.860, 1.833, 1.812, 1.796, 1.782, 1.771,
+                      1.761, 1.753, 1.746, 1.740, 1.734, 1.729, 1.725, 1.721, 1.717, 1.714, 1.711, 1.708, 1.706,
+                      1.703, 1.701, 1.699, 1.697)
+_CRITICAL_Z_VALUE = 1.645
+
+
+def get_result_key(test_result):
+    "Returns the key identifying the execution the given TestResult belongs to: test key and parameters."
+    key = get_test_key(test_result.test_definition)
+    if test_result.parameter_key:
+        key += " [{0}]".format(test_result.parameter_key)
+    return key
+
+
+def get_samples(test_result):
+    """
+    Returns the timing samples in nano seconds of the given TestResult: the timings of all rounds for a benchmark or
+    the execution time otherwise.
+    """
+    if test_result.benchmark_statistics is not None:
+        return list(test_result.benchmark_statistics.timings)
+    return [test_result.execution_time_ns]
+
+
+def _mean_and_variance(samples):
+    mean = sum(samples) / float(len(samples))
+    if len(samples) < 2:
+        return mean, 0.0
+    return mean, sum((sample - mean) ** 2 for sample in samples) / (len(samples) - 1)
+
+
+def _get_critical_t_value(degrees_of_freedom):
+    degrees_of_freedom = int(degrees_of_freedom)
+    if degrees_of_freedom < 1:
+        degrees_of_freedom = 1
+    if degrees_of_freedom > len(_CRITICAL_T_VALUES):
+        return _CRITICAL_Z_VALUE
+    return _CRITICAL_T_VALUES[degrees_of_freedom - 1]
+
+
+def is_significantly_slower(baseline_samples, samples, threshold):
+    """
+    Returns True if the given samples are slower than the baseline samples increased by the given threshold (i.e.
+    0.1 for 10%) with a significance level of 5%.
+
+    Uses Welch's t-test if both sides contain more than one sample. A single sample is tested against the prediction
+    interval of the baseline. At least two baseline samples are required to detect a regression.
+    """
+    if len(baseline_samples) < 2 or not samples:
+        return False
+
+    factor = 1.0 + threshold
+    baseline_mean, baseline_variance = _mean_and_variance(baseline_samples)
+    mean, variance = _mean_and_variance(samples)
+
+    difference = mean - factor * baseline_mean
+    scaled_baseline_variance = factor ** 2 * baseline_variance / len(baseline_samples)
+
+    if len(samples) < 2:
+        standard_error_squared = factor ** 2 * baseline_variance + scaled_baseline_variance
+        degrees_of_freedom = len(baseline_samples) - 1
+    else:
+        sample_variance = variance / len(samples)
+        standard_error_squared = sample_variance + scaled_baseline_variance
+        denominator = sample_variance ** 2 / (len(samples) - 1) + \
+                      scaled_baseline_variance ** 2 / (len(baseline_samples) - 1)
+        degrees_of_freedom = standard_error_squared ** 2 / denominator if denominator else len(samples) - 1
+
+    if standard_error_squared == 0:
+        return difference > 0
+    return difference / math.sqrt(standard_error_squared) > _get_critical_t_value(degrees_of_freedom)
+
+
+class Regression(object):
+    "Describes an execution that is significantly slower than its baseline."
+
+    def __init__(self, key, baseline_mean, mean):
+        self.key = key
+        self.baseline_mean = baseline_mean
+        self.mean = mean
+
+    @property
+    def slowdown(self):
+        "Relative increase of the mean execution time, i.e. 0.3 if the execution got 30% slower."
+        return self.mean / self.baseline_mean - 1.0 if self.baseline_mean else float("inf")
+
+    def describe(self):
+        return "{0} got {1:.1f}% slower ({2} -> {3})".format(self.key, self.slowdown * 100,
+                                                           format_time(self.baseline_mean), format_time(self.mean))
+
+
+class Baseline(object):
+    """
+    Baseline of the timing samples of each execution stored as a JSON document in the given file.
+
+    threshold -- relative slowdown (i.e. 0.1 for 10%) an execution may show before it is considered a regression
+    history -- number of samples kept per execution; benchmarks keep at least the samples of their last run
+    """
+
+    def __init__(self, filename=DEFAULT_BASELINE_FILE, threshold=DEFAULT_THRESHOLD, history=DEFAULT_HISTORY):
+        self.filename = filename
+        self.threshold = threshold
+        self.history = history
+        self._entries = {}
+
+    def load(self):
+        "Loads the baseline from its file. A missing or unreadable file results in an empty baseline."
+        self._entries = read_json_file(self.filename, {})
+
+    def save(self):
+        "Writes the baseline to its file."
+        write_json_file(self.filename, self._entries)
+
+    def record(self, test_result):
+        "Adds the samples of the given successful TestResult to the baseline."
+        if not test_result.success:
+            return
+        samples = get_samples(test_result)
+        key = get_result_key(test_result)
+        self._entries[key] = (self._entries.get(key, []) + samples)[-max(self.history, len(samples)):]
+
+    def compare(self, test_result):
+        "Returns a Regression if the given successful TestResult is significantly slower than its baseline or None."
+        baseline_samples = self._entries.get(get_result_key(test_result))
+        if not test_result.success or not baseline_samples:
+            return None
+
+        samples = get_samples(test_result)
+        if not is_significantly_slower(baseline_samples, samples, self.threshold):
+            return None
+        return Regression(get_result_key(test_result), _mean_and_variance(baseline_samples)[0],
+                          _mean_and_variance(samples)[0])
+
+
+class BaselineTestRunListener(TestRunListener):
+    """
+    TestRunListener comparing all results to a Baseline. Regressions are collected in the regressions list of the
+    TestSuiteResult. If fail is True, results of executions that regressed are marked as failed. If update is True,
+    the samples of all results are added to the baseline which is saved when the suite finished.
+
+    The listener has to be registered before all listeners reporting results so that these observe the changes.
+    """
+
+    def __init__(self, baseline, update=False, fail=False):
+        self._baseline = baseline
+        self._update = update
+        self._fail = fail
+        self._regressions = []
+
+    def after_test(self, test_results):
+        for test_result in test_results:
+            regression = self._baseline.compare(test_result)
+            if self._update:
+                self._baseline.record(test_result)
+            if regression is None:
+                continue
+
+            self._regressions.append(regression)
+            if self._fail:
+                test_result.success = False
+                test_result.message = "Performance regression: " + regression.describe()
+
+    def after_suite(self, test_suite_result):
+        test_suite_result.regressions += self._regressions
+        if self._update:
+            self._baseline.save()
@@ -0,0 +1,135 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides the machinery used to execute benchmarks: tests whose function is executed repeatedly in order to measure
+the time a single invocation takes.
+"""
+
+__author__ = "Alexander Metzner"
+
+import math
+
+from .utils import perf_counter_ns
+
+DEFAULT_WARMUP = 1
+DEFAULT_ROUNDS = 10
+DEFAULT_MIN_ROUND_TIME = 0.01
+
+_MAXIMUM_ITERATIONS = 10 ** 9
+_TIME_UNITS = ((1000000000, "s"), (1000000, "ms"), (1000, "us"), (1, "ns"))
+
+
+def format_time(nano_seconds):
+    "Formats the given time in nano seconds using the largest unit that keeps the value at or above one."
+    for factor, unit in _TIME_UNITS:
+        if nano_seconds >= factor:
+            break
+    return "{0:.3f} {1}".format(nano_seconds / float(factor), unit)
+
+
+def _percentile(sorted_values, percent):
+    "Returns the given percentile of the given sorted values using the nearest rank method."
+    rank = int(math.ceil(percent / 100.0 * len(sorted_values)))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def _median(sorted_values):
+    middle = len(sorted_values) // 2
+    if len(sorted_values) % 2:
+        return sorted_values[middle]
+    return (sorted_values[middle - 1] + sorted_values[middle]) / 2.0
+
+
+def _standard_deviation(values, mean):
+    if len(values) < 2:
+        return 0.0
+    return math.sqrt(sum((value - mean) ** 2 for value in values) / (len(values) - 1))
+
+
+class BenchmarkStatistics(object):
+    """
+    Statistics of the time a single invocation of a benchmarked function took. All times are given in nano seconds
+    per invocation and are computed from the timings of the individual rounds.
+    """
+
+    def __init__(self, timings, iterations):
+        """
+        timings -- list of the times in nano seconds a single invocation took during each round
+        iterations -- number of invocations per round
+        """
+        sorted_timings = sorted(timings)
+        self.timings = list(timings)
+        self.iterations = iterations
+        self.rounds = len(timings)
+        self.minimum = sorted_timings[0]
+        self.maximum = sorted_timings[-1]
+        self.mean = sum(timings) / float(len(timings))
+        self.median = _median(sorted_timings)
+        self.p95 = _percentile(sorted_timings, 95)
+        self.stddev = _standard_deviation(timings, self.mean)
+
+    def describe(self):
+        "Returns a one line summary of these statistics."
+        return "min {0} median {1} p95 {2} stddev {3} ({4} rounds of {5} iterations)".format(
+            format_time(self.minimum), format_time(self.median), format_time(self.p95), format_time(self.stddev),
+            self.rounds, self.iterations)
+
+
+class Benchmark(object):
+    """
+    Executes a function repeatedly and measures the time a single invocation takes.
+
+    The function is first invoked warmup times without measuring. Then the number of iterations per round is
+    calibrated so that a round takes at least min_round_time seconds: it is increased following the sequence 1, 2, 5,
+    10, 20, 50, ... Finally the given number of rounds is executed and timed.
+    """
+
+    def __init__(self, warmup=DEFAULT_WARMUP, rounds=DEFAULT_ROUNDS, min_round_time=DEFAULT_MIN_ROUND_TIME):
+        if warmup < 0:
+            raise ValueError("Number of warmup invocations must not be negative but was {0}".format(warmup))
+        if rounds < 1:
+            raise ValueError("Number of rounds must be at least 1 but was {0}".format(rounds))
+        if min_round_time < 0:
+            raise ValueError("Minimum round time must not be negative but was {0}".format(min_round_time))
+        self.warmup = warmup
+        self.rounds = rounds
+        self.min_round_time = min_round_time
+
+    def run(self, function):
+        "Benchmarks the given function, which is invoked without arguments, and returns BenchmarkStatistics."
+        for _ in range(self.warmup):
+            function()
+
+        iterations = self.calibrate(function)
+        timings = [self._time_round(function, iterations) / float(iterations) for _ in range(self.rounds)]
+        return BenchmarkStatistics(timings, iterations)
+
+    def calibrate(self, function):
+        "Returns the number of iterations per round needed so that a round takes at least min_round_time seconds."
+        min_round_time = self.min_round_time * 1000000000
+        base = 1
+        while True:
+            for multiplier in (1, 2, 5):
+                iterations = base * multiplier
+                if iterations >= _MAXIMUM_ITERATIONS or self._time_round(function, iterations) >= min_round_time:
+                    return iterations
+            base *= 10
+
+    def _time_round(self, function, iterations):
+        start = perf_counter_ns()
+        for _ in range(iterations):
+            function()
+        return perf_counter_ns() - start
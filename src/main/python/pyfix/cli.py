@@ -21,76 +21,181 @@ from __future__ import print_function
 
 __author__ = "Alexander Metzner"
 
+import argparse
 import sys
 
 from pyfix import __version__
+from .baseline import DEFAULT_BASELINE_FILE, DEFAULT_THRESHOLD, Baseline, BaselineTestRunListener
+from .discovery import DEFAULT_INDEX_FILE, DEFAULT_PATTERN, TestDiscovery
+from .distributed import Coordinator, Worker
+from .profiling import DEFAULT_TOP, ProfilingTestRunListener, TestProfiler
+from .reports import JsonLinesTestRunListener, JUnitXmlTestRunListener
+from .resultcache import DEFAULT_CACHE_FILE, ResultCache, ResultCacheTestRunListener
+from .scheduling import parse_shard, schedule
 from .testcollector import TestCollector
-from .testrunner import TestRunListener, TestRunner
+from .testrunner import PHASES, TestRunListener, TestRunner
+from .utils import perf_counter_ns
 
-def red(message):
-    if sys.stdout.isatty():
+def _is_colored(colored):
+    if colored is None:
+        return sys.stdout.isatty()
+    return colored
+
+
+def red(message, colored=None):
+    if _is_colored(colored):
         return "\033[31m%s\033[0;0m" % message
     return message
 
 
-def green(message):
-    if sys.stdout.isatty():
+def green(message, colored=None):
+    if _is_colored(colored):
         return "\033[32m%s\033[0;0m" % message
     return message
 
 
-def bold(message):
-    if sys.stdout.isatty():
+def bold(message, colored=None):
+    if _is_colored(colored):
         return "\033[1m%s\033[0;0m" % message
     return message
 
 
-class TtyTestRunListener(TestRunListener):
-    def __init__ (self):
+class _ConsoleTestRunListener(TestRunListener):
+    """
+    Base class for listeners reporting to a console stream (defaults to STDOUT). Whether the stream is a tty is
+    detected once when the listener is created.
+    """
+
+    def __init__(self, stream=None):
+        self._stream = stream if stream is not None else sys.stdout
+        self._colored = self._stream.isatty()
+
+    def before_suite(self, test_definitions):
+        number_of_tests = len(test_definitions)
+        self._stream.write("Running {0} test{1}.\n{2}\n".format(number_of_tests, "s" if number_of_tests else "",
+                                                                 "=" * 80))
+
+    def after_suite(self, test_suite_result):
+        lines = ["=" * 80, "TEST RESULTS SUMMARY",
+                 "\t{0:3d} tests executed in {1:d} ms".format(test_suite_result.number_of_tests_executed,
+                                                             test_suite_result.execution_time),
+                 "\t{0:3d} tests failed".format(test_suite_result.number_of_failures),
+                 "\ttime spent in phases: {0}".format(", ".join("{0} {1}".format(
+                     phase, format_duration(test_suite_result.phase_times.get(phase, 0))) for phase in PHASES))]
+        if test_suite_result.aborted:
+            lines.append(red("\tstopped after {0} failures, {1} tests not executed".format(
+                test_suite_result.number_of_failures, test_suite_result.number_of_tests_not_executed), self._colored))
+        if test_suite_result.regressions:
+            lines.append(red("\t{0:3d} tests regressed".format(len(test_suite_result.regressions)), self._colored))
+            for regression in test_suite_result.regressions:
+                lines.append("\t\t{0}".format(regression.describe()))
+        self._stream.write("\n".join(lines) + "\n")
+        self._stream.flush()
+
+    def _format_test_result(self, test_result):
+        parts = ["\n\t"]
+        if test_result.parameter_description:
+            parts.append("{0}: ".format(test_result.parameter_description))
+        if test_result.success:
+            parts.append(green("passed", self._colored))
+        else:
+            parts.append(red("failed", self._colored))
+        parts.append(" [{0}]".format(format_duration(test_result.execution_time_ns)))
+        if test_result.benchmark_statistics is not None:
+            parts.append(" {0}".format(test_result.benchmark_statistics.describe()))
+        if not test_result.success:
+            parts.append(" {0}".format(test_result.message))
+        if test_result.traceback:
+            parts.append("\n{0}".format(test_result.traceback_as_string))
+        return "".join(parts)
+
+
+class TtyTestRunListener(_ConsoleTestRunListener):
+    "Reports the name of each test before it is executed and the outcome of each of its executions."
+
+    def __init__ (self, stream=None):
+        super(TtyTestRunListener, self).__init__(stream)
         self._test_written = False
 
     def before_test(self, test_definition):
-        if self._test_written:
-            self._hr()
-
-        sys.stdout.write("{0}: ".format(bold(test_definition.name)))
-        sys.stdout.flush()
+        separator = "-" * 80 + "\n" if self._test_written else ""
+        self._stream.write("{0}{1}: ".format(separator, bold(test_definition.name, self._colored)))
+        self._stream.flush()
 
     def after_test(self, test_results):
-        for test_result in test_results:
+        if test_results:
             self._test_written = True
-            sys.stdout.write("\n\t")
-            if test_result.parameter_description:
-                sys.stdout.write("{0}: ".format(test_result.parameter_description))
-            if test_result.success:
-                sys.stdout.write(green("passed"))
-            else:
-                sys.stdout.write(red("failed"))
-            sys.stdout.write(" [{0:d} ms]".format(test_result.execution_time))
-            if not test_result.success:
-                sys.stdout.write(" {0}".format(test_result.message))
-            if test_result.traceback:
-                sys.stdout.write("\n{0}".format(test_result.traceback_as_string))
-        sys.stdout.write("\n")
+        self._stream.write("".join(self._format_test_result(r) for r in test_results) + "\n")
 
 
+class CompactTestRunListener(_ConsoleTestRunListener):
+    """
+    Reports progress compactly: on a tty, a single status line is rewritten at most every update_interval seconds;
+    otherwise a dot (or F for a failure) is written per execution, 80 per line. Details are only reported for failed
+    executions once the suite has finished.
+    """
+
+    def __init__(self, stream=None, update_interval=0.1):
+        super(CompactTestRunListener, self).__init__(stream)
+        self._update_interval_ns = int(update_interval * 1000000000)
+        self._number_of_tests = 0
+        self._number_of_executions = 0
+        self._number_of_failures = 0
+        self._last_update = None
+        self._progress = []
+        self._failures = []
+
     def before_suite(self, test_definitions):
-        number_of_tests = len(test_definitions)
-        print("Running {0} test{1}.".format(number_of_tests, "s" if number_of_tests else ""))
-        self._bold_hr()
+        super(CompactTestRunListener, self).before_suite(test_definitions)
+        self._number_of_tests = len(test_definitions)
+        self._last_update = perf_counter_ns()
+
+    def before_test(self, test_definition):
+        pass
+
+    def after_test(self, test_results):
+        for test_result in test_results:
+            self._number_of_executions += 1
+            if not test_result.success:
+                self._number_of_failures += 1
+                self._failures.append("{0}:{1}".format(bold(test_result.test_definition.name, self._colored),
+                                                       self._format_test_result(test_result)))
+            if not self._colored:
+                self._progress.append("." if test_result.success else "F")
+                if len(self._progress) == 80:
+                    self._write_progress()
+
+        if self._colored and perf_counter_ns() - self._last_update >= self._update_interval_ns:
+            self._write_status_line()
 
     def after_suite(self, test_suite_result):
-        self._bold_hr()
-        print("TEST RESULTS SUMMARY")
-        print("\t{0:3d} tests executed in {1:d} ms".format(test_suite_result.number_of_tests_executed,
-            test_suite_result.execution_time))
-        print("\t{0:3d} tests failed".format(test_suite_result.number_of_failures))
+        if self._colored:
+            self._write_status_line()
+            self._stream.write("\n")
+        elif self._progress:
+            self._write_progress()
+        if self._failures:
+            self._stream.write("{0}\n{1}\n".format("=" * 80, ("\n" + "-" * 80 + "\n").join(self._failures)))
+        super(CompactTestRunListener, self).after_suite(test_suite_result)
+
+    def _write_progress(self):
+        self._stream.write("".join(self._progress) + "\n")
+        self._stream.flush()
+        self._progress = []
 
-    def _bold_hr(self):
-        print("=" * 80)
+    def _write_status_line(self):
+        failures = "{0} failed".format(self._number_of_failures)
+        if self._number_of_failures:
+            failures = red(failures, self._colored)
+        self._stream.write("\r{0} executions of {1} tests, {2}".format(self._number_of_executions,
+                                                                      self._number_of_tests, failures))
+        self._stream.flush()
+        self._last_update = perf_counter_ns()
 
-    def _hr(self):
-        print("-" * 80)
+
+def format_duration(nano_seconds):
+    "Formats the given duration in nano seconds as milli seconds with micro second precision."
+    return "{0:.3f} ms".format(nano_seconds / 1000000.0)
 
 
 def banner():
@@ -98,21 +203,262 @@ def banner():
     print()
 
 
-def run_tests():
+def _parse_shard(shard):
+    try:
+        return parse_shard(shard)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def create_option_parser(paths=False):
+    """
+    Creates the parser for the command line options understood by run_tests. If paths is True, the parser also
+    accepts the paths and options used to discover test modules (see main).
+    """
+    parser = argparse.ArgumentParser(description="Executes pyfix tests.")
+    parser.add_argument("--workers", type=int,
+                        help="number of worker processes used to execute the tests in parallel")
+    parser.add_argument("--async-concurrency", type=int,
+                        help="maximum number of asynchronous test executions running concurrently")
+    parser.add_argument("--timeout", type=float,
+                        help="number of seconds each execution of a test without a timeout of its own may take")
+    parser.add_argument("--profile", action="store_true", default=None,
+                        help="profile each test execution using cProfile and report the hottest functions")
+    parser.add_argument("--profile-memory", action="store_true", default=None,
+                        help="trace the memory allocated by each test execution and report the top allocating tests")
+    parser.add_argument("--profile-dir",
+                        help="directory to store the cProfile statistics of each test execution in")
+    parser.add_argument("--profile-top", type=int,
+                        help="number of entries shown in profiling reports (default: {0})".format(DEFAULT_TOP))
+    parser.add_argument("--baseline-file",
+                        help="file storing the baseline of execution times (default: {0})".format(
+                            DEFAULT_BASELINE_FILE))
+    parser.add_argument("--update-baseline", action="store_true", default=None,
+                        help="add the execution times of this run to the baseline")
+    parser.add_argument("--regression-threshold", type=float,
+                        help="relative slowdown compared to the baseline that is reported as regression if it is "
+                             "statistically significant (default: {0})".format(DEFAULT_THRESHOLD))
+    parser.add_argument("--fail-on-regression", action="store_true", default=None,
+                        help="mark tests that regressed compared to the baseline as failed")
+    parser.add_argument("--compact", action="store_true", default=None,
+                        help="report progress compactly and only give details of failed tests")
+    parser.add_argument("--json-lines",
+                        help="file to write a JSON document for each test execution to")
+    parser.add_argument("--junit-xml",
+                        help="file to write a JUnit XML report to")
+    parser.add_argument("--coordinator", metavar="ADDRESS",
+                        help="hand out the tests to workers connecting to the given address (host:port or unix:path)")
+    parser.add_argument("--worker", metavar="ADDRESS",
+                        help="execute the tests handed out by the coordinator at the given address and report nothing")
+    parser.add_argument("--isolate", action="store_true", default=None,
+                        help="execute the tests in worker processes forked from the runner; crashes fail the test")
+    parser.add_argument("--max-tests-per-worker", type=int, metavar="N",
+                        help="replace an isolated worker after N tests (default: 1, 0 for no limit)")
+    parser.add_argument("--max-worker-memory-growth", type=float, metavar="MB",
+                        help="replace an isolated worker once its resident memory grew by more than MB megabytes")
+    parser.add_argument("--fixture-threads", type=int, metavar="N",
+                        help="provide and reclaim the fixtures of each test concurrently using N threads")
+    parser.add_argument("--fail-fast", action="store_true", default=None,
+                        help="stop executing tests after the first failure")
+    parser.add_argument("--max-failures", type=int, metavar="N",
+                        help="stop executing tests after N failures")
+    parser.add_argument("--shard", type=_parse_shard, metavar="I/N",
+                        help="execute only the I-th of N shards, balanced by the durations given by --durations or "
+                             "by count")
+    parser.add_argument("--durations", metavar="FILE",
+                        help="result cache file shared by all shards providing the expected durations of the tests")
+    parser.add_argument("--longest-first", action="store_true", default=None,
+                        help="execute the tests with the longest expected duration first")
+    parser.add_argument("--failed-first", action="store_true", default=None,
+                        help="execute the tests that failed during the last run before all other tests")
+    parser.add_argument("--changed-only", action="store_true", default=None,
+                        help="skip tests that passed during the last run and have not been changed since")
+    parser.add_argument("--cache-file",
+                        help="file used to store test results between runs (default: {0})".format(DEFAULT_CACHE_FILE))
+    parser.add_argument("--no-cache", action="store_true", default=False,
+                        help="do not read or write the test result cache")
+
+    if paths:
+        parser.add_argument("paths", nargs="*", default=["."],
+                            help="directories, packages or module files to search for tests (default: .)")
+        parser.add_argument("--pattern",
+                            help="pattern test module files have to match (default: {0})".format(DEFAULT_PATTERN))
+        parser.add_argument("--index-file",
+                            help="file used to store the index of discovered tests (default: {0})".format(
+                                DEFAULT_INDEX_FILE))
+        parser.add_argument("--no-index", action="store_true", default=False,
+                            help="do not read or write the index of discovered tests")
+        parser.add_argument("--import-workers", type=int,
+                            help="number of worker processes used to import changed modules during discovery")
+    return parser
+
+
+def parse_options(args=None):
+    """
+    Parses the given command line arguments (defaults to sys.argv). Unknown arguments are ignored so that test modules
+    can define arguments of their own. Options not given on the command line are set to None.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    options, _ = create_option_parser().parse_known_args(args)
+    return options
+
+
+def _apply_defaults(options, **defaults):
+    "Sets all options that have not been given on the command line to the given default values."
+    for name, value in defaults.items():
+        if getattr(options, name, None) is None:
+            setattr(options, name, value)
+    if options.no_cache:
+        options.cache_file = None
+    return options
+
+
+def run_tests(workers=None, async_concurrency=1, timeout=None, failed_first=False, changed_only=False,
+              cache_file=DEFAULT_CACHE_FILE, profile=False, profile_memory=False, profile_dir=None,
+              profile_top=DEFAULT_TOP, baseline_file=DEFAULT_BASELINE_FILE, update_baseline=False,
+              regression_threshold=DEFAULT_THRESHOLD, fail_on_regression=False, json_lines=None, junit_xml=None,
+              compact=False, coordinator=None, worker=None, shard=None, durations=None, longest_first=False,
+              fail_fast=False, max_failures=None, isolate=False, max_tests_per_worker=1,
+              max_worker_memory_growth=None, fixture_threads=None):
     """
     Main cli function. Executes all tests defined in the __main__ module and issues all reports to STDOUT using
     tty coloring if supported by STDOUT.
+
+    All arguments can be overridden using the respective command line options (see create_option_parser).
+
+    workers -- number of worker processes used to execute the tests in parallel; None executes all tests sequentially
+    async_concurrency -- maximum number of asynchronous test executions running concurrently on the event loop
+    timeout -- number of seconds each execution of a test without a timeout of its own may take; None for no limit
+    failed_first -- execute the tests that failed during the last run before all other tests
+    changed_only -- skip tests that passed during the last run and have not been changed since
+    cache_file -- file used to store test results between runs; None disables the cache
+    profile -- profile each test execution using cProfile and report the hottest functions
+    profile_memory -- trace the memory allocated by each test execution and report the top allocating tests
+    profile_dir -- directory to store the cProfile statistics of each test execution in
+    profile_top -- number of entries shown in profiling reports
+    baseline_file -- file storing the baseline of execution times; None disables comparisons with a baseline
+    update_baseline -- add the execution times of this run to the baseline
+    regression_threshold -- relative slowdown (i.e. 0.1 for 10%) that is reported as regression if significant
+    fail_on_regression -- mark tests that regressed compared to the baseline as failed
+    json_lines -- file to write a JSON document for each test execution to
+    junit_xml -- file to write a JUnit XML report to
+    compact -- report progress compactly and only give details of failed tests
+    coordinator -- hand out the tests to workers connecting to the given address (host:port or unix:path)
+    worker -- execute the tests handed out by the coordinator at the given address instead of reporting them
+    shard -- tuple (i, n) to execute only the i-th (counting from 1) of n shards of balanced expected duration
+    durations -- result cache file shared by all shards providing the expected durations; shards are balanced by
+    count if it is not given
+    longest_first -- execute the tests with the longest expected duration first
+    fail_fast -- stop executing tests after the first failure
+    max_failures -- stop executing tests after the given number of failures
+    isolate -- execute the tests in worker processes forked from the runner and report crashes as failures
+    max_tests_per_worker -- replace an isolated worker after the given number of tests (0 for no limit)
+    max_worker_memory_growth -- replace an isolated worker once its resident memory grew by more than the given
+    number of megabytes
+    fixture_threads -- provide and reclaim the fixtures of each test concurrently using the given number of threads
     """
-    banner()
+    options = _apply_defaults(parse_options(), workers=workers, async_concurrency=async_concurrency, timeout=timeout,
+                              failed_first=failed_first, changed_only=changed_only, cache_file=cache_file,
+                              profile=profile, profile_memory=profile_memory, profile_dir=profile_dir,
+                              profile_top=profile_top, baseline_file=baseline_file, update_baseline=update_baseline,
+                              regression_threshold=regression_threshold, fail_on_regression=fail_on_regression,
+                              json_lines=json_lines, junit_xml=junit_xml, compact=compact, coordinator=coordinator,
+                              worker=worker, shard=shard, durations=durations, longest_first=longest_first,
+                              fail_fast=fail_fast, max_failures=max_failures, isolate=isolate,
+                              max_tests_per_worker=max_tests_per_worker,
+                              max_worker_memory_growth=max_worker_memory_growth, fixture_threads=fixture_threads)
 
-    import __main__
+    banner()
 
+    # Looked up in sys.modules as "import __main__" would import pyfix.__main__ on Python 2 (implicit relative import).
     collector = TestCollector()
-    collector.collect_tests(__main__)
+    collector.collect_tests(sys.modules["__main__"])
+
+    _run_test_suite(collector.test_suite, options)
+
+
+def main(args=None):
+    """
+    Entry point of the pyfix command. Discovers all test modules in the paths given on the command line, executes
+    their tests and issues all reports to STDOUT.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    options = _apply_defaults(create_option_parser(paths=True).parse_args(args), async_concurrency=1,
+                              failed_first=False, changed_only=False, cache_file=DEFAULT_CACHE_FILE,
+                              profile=False, profile_memory=False, profile_top=DEFAULT_TOP,
+                              baseline_file=DEFAULT_BASELINE_FILE, update_baseline=False,
+                              regression_threshold=DEFAULT_THRESHOLD, fail_on_regression=False, compact=False,
+                              longest_first=False, fail_fast=False, isolate=False, max_tests_per_worker=1,
+                              pattern=DEFAULT_PATTERN, index_file=DEFAULT_INDEX_FILE)
+
+    banner()
+
+    discovery = TestDiscovery(options.pattern, None if options.no_index else options.index_file,
+                              options.import_workers)
+    collector = discovery.collect_tests(options.paths)
+
+    _run_test_suite(collector.test_suite, options)
+
+
+def _run_test_suite(test_suite, options):
+    if options.worker is not None:
+        number_of_tests = Worker(test_suite, options.worker, options.async_concurrency, options.timeout,
+                                 options.fixture_threads).run()
+        print("Executed {0} tests for coordinator at {1}.".format(number_of_tests, options.worker))
+        return
+
+    profiler = None
+    if options.profile or options.profile_memory or options.profile_dir is not None:
+        profiler = TestProfiler(options.profile or options.profile_dir is not None, options.profile_memory,
+                                options.profile_dir)
+
+    max_failures = 1 if options.fail_fast else options.max_failures
+
+    # The reports are issued by listeners, so the results do not need to be kept until the suite finished.
+    if options.coordinator is not None:
+        runner = Coordinator(options.coordinator, keep_results=False, max_failures=max_failures)
+        runner.listen()
+        print("Waiting for workers to connect to {0}.".format(runner.address))
+    else:
+        runner = TestRunner(options.workers, options.async_concurrency, options.timeout, profiler,
+                            keep_results=False, max_failures=max_failures, isolated=options.isolate,
+                            max_tests_per_worker=options.max_tests_per_worker or None,
+                            max_memory_growth=options.max_worker_memory_growth,
+                            fixture_threads=options.fixture_threads)
+    if options.baseline_file is not None:
+        baseline = Baseline(options.baseline_file, options.regression_threshold)
+        baseline.load()
+        # Registered first so that the reporting listeners observe results marked as failed.
+        runner.add_test_run_listener(BaselineTestRunListener(baseline, options.update_baseline,
+                                                             options.fail_on_regression))
+    runner.add_test_run_listener(CompactTestRunListener() if options.compact else TtyTestRunListener())
+    if options.json_lines is not None:
+        runner.add_test_run_listener(JsonLinesTestRunListener(options.json_lines))
+    if options.junit_xml is not None:
+        runner.add_test_run_listener(JUnitXmlTestRunListener(options.junit_xml))
+    if profiler is not None:
+        runner.add_test_run_listener(ProfilingTestRunListener(profiler, options.profile_top))
+
+    result_cache = None
+    if options.cache_file is not None:
+        result_cache = ResultCache(options.cache_file)
+        result_cache.load()
+
+    shared_durations = None
+    if options.durations is not None:
+        shared_durations = ResultCache(options.durations)
+        shared_durations.load()
+
+    # Shards are computed from the complete suite before the result cache selects tests.
+    test_suite = schedule(test_suite, options.shard, options.longest_first, result_cache, shared_durations)
+
+    if result_cache is not None:
+        test_suite = result_cache.select(test_suite, options.failed_first, options.changed_only)
+        runner.add_test_run_listener(ResultCacheTestRunListener(result_cache))
 
-    runner = TestRunner()
-    runner.add_test_run_listener(TtyTestRunListener())
-    test_suite_result = runner.run_tests(collector.test_suite)
+    test_suite_result = runner.run_tests(test_suite)
 
     if test_suite_result.success:
         print(green("ALL TESTS PASSED"))
@@ -15,13 +15,22 @@
 
 __author__ = "Alexander Metzner"
 
+import inspect
+
+from .benchmark import Benchmark, DEFAULT_MIN_ROUND_TIME, DEFAULT_ROUNDS, DEFAULT_WARMUP
+
 TEST_ATTRIBUTE = "pyfix_test"
 GIVEN_ATTRIBUTE = "pyfix_given"
 BEFORE_ATTRIBUTE = "pyfix_before"
 AFTER_ATTRIBUTE = "pyfix_after"
+PARALLEL_ATTRIBUTE = "pyfix_parallel"
+TIMEOUT_ATTRIBUTE = "pyfix_timeout"
+BENCHMARK_ATTRIBUTE = "pyfix_benchmark"
 
 _DUPLICATE_FIXTURE_NAME_PATTERN = "Unable to define fixture with name '{0}' and value '{1}' because it is already given with value '{2}'"
 
+_test_registry = {}
+
 def test(function):
     """
     Marks a function as a test:
@@ -29,11 +38,20 @@ def test(function):
     @test
     def ensure_that_something_is_valid (...):
         ...
+
+    The function is registered with the module it is defined in, so tests can be collected without inspecting the
+    module's namespace.
     """
     setattr(function, TEST_ATTRIBUTE, True)
+    _test_registry.setdefault(getattr(function, "__module__", None), []).append(function)
     return function
 
 
+def get_registered_tests(module_name):
+    "Returns the list of functions marked as test in the named module in the order they have been defined."
+    return list(_test_registry.get(module_name, []))
+
+
 def given(**fixture_demands):
     """
     Defines expectations that have to be fulfilled before a test method is executed. Givens are values that are
@@ -124,3 +142,70 @@ def after(*interceptors):
         return _add_interceptors(function, AFTER_ATTRIBUTE, interceptors)
 
     return add_interceptors
+
+
+def parallel(threads):
+    """
+    Executes the parameterized variants of the decorated test concurrently using a pool of the given number of
+    threads:
+
+      @test
+      @parallel(threads=8)
+      @given(url=enumerate("/spam", "/eggs"))
+      def some_test (url): pass
+
+    The results are reported in the same order as the variants would have been executed sequentially.
+    """
+    if threads < 1:
+        raise ValueError("Number of threads must be at least 1 but was {0}".format(threads))
+
+    def mark_parallel(function):
+        setattr(function, PARALLEL_ATTRIBUTE, threads)
+        return function
+
+    return mark_parallel
+
+
+def timeout(seconds):
+    """
+    Defines the number of seconds each execution of the decorated test may take:
+
+      @test
+      @timeout(2.5)
+      def some_test (): pass
+
+    An execution that takes longer is reported as failed and the runner moves on to the next execution.
+    """
+    if seconds <= 0:
+        raise ValueError("Timeout must be greater than 0 but was {0}".format(seconds))
+
+    def mark_timeout(function):
+        setattr(function, TIMEOUT_ATTRIBUTE, seconds)
+        return function
+
+    return mark_timeout
+
+
+def benchmark(warmup=DEFAULT_WARMUP, rounds=DEFAULT_ROUNDS, min_round_time=DEFAULT_MIN_ROUND_TIME):
+    """
+    Marks the decorated test as a benchmark. The test function is invoked warmup times before the number of
+    invocations per round is calibrated so that a round takes at least min_round_time seconds. Then the given number
+    of rounds is timed:
+
+      @test
+      @benchmark(rounds=20)
+      @given(size=enumerate(10, 1000, 100000))
+      def sorting_a_list (size): pass
+
+    The result of each execution carries the minimum, median, 95th percentile and standard deviation of the time a
+    single invocation took. Asynchronous tests cannot be benchmarked.
+    """
+    options = Benchmark(warmup, rounds, min_round_time)
+
+    def mark_benchmark(function):
+        if getattr(inspect, "iscoroutinefunction", lambda f: False)(function):
+            raise ValueError("Asynchronous test '{0}' cannot be benchmarked".format(function.__name__))
+        setattr(function, BENCHMARK_ATTRIBUTE, options)
+        return function
+
+    return mark_benchmark
@@ -0,0 +1,169 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides the discovery of test modules in directories and packages.
+
+Discovered modules are recorded in an index file together with the modification time and size of the module file and
+the names of the tests it defines. Modules that have not been changed since are not imported again just to find out
+whether they contain any tests.
+"""
+
+__author__ = "Alexander Metzner"
+
+import fnmatch
+import importlib
+import os
+import sys
+
+from .parallel import get_multiprocessing_context
+from .testcollector import TestCollector
+from .utils import read_json_file, write_json_file
+
+DEFAULT_PATTERN = "*_tests.py"
+DEFAULT_INDEX_FILE = ".pyfix-index.json"
+
+
+def find_test_modules(paths, pattern=DEFAULT_PATTERN):
+    """
+    Returns a list of tuples (root, filename, module_name) for all module files matching the given pattern found in
+    the given paths. A path may name a module file or a directory which is searched recursively. The root is the
+    directory that has to be on sys.path to import the module by the given name.
+    """
+    result = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            result.append(_describe_module_file(os.path.dirname(path), path))
+            continue
+
+        for directory, directory_names, filenames in os.walk(path):
+            directory_names[:] = sorted(d for d in directory_names if not d.startswith(".") and d != "__pycache__")
+            for filename in sorted(filenames):
+                if fnmatch.fnmatch(filename, pattern):
+                    result.append(_describe_module_file(path, os.path.join(directory, filename)))
+    return result
+
+
+def _describe_module_file(directory, filename):
+    root = directory
+    while os.path.exists(os.path.join(root, "__init__.py")):
+        root = os.path.dirname(root)
+
+    module_name = os.path.splitext(os.path.relpath(filename, root))[0].replace(os.sep, ".")
+    return root, filename, module_name
+
+
+def import_module(root, module_name):
+    "Imports the named module after adding the given root to sys.path (if it is not already)."
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    return importlib.import_module(module_name)
+
+
+def _find_test_names(root, module_name):
+    collector = TestCollector()
+    collector.collect_tests(import_module(root, module_name))
+    return [test_definition.function.__name__ for test_definition in collector.test_suite]
+
+
+def _find_test_names_in_worker(module_description):
+    root, filename, module_name = module_description
+    try:
+        return _find_test_names(root, module_name)
+    except Exception:
+        # The module is imported again by the collecting process which will report the error.
+        return None
+
+
+class TestDiscovery(object):
+    """
+    Discovers test modules and collects their tests.
+
+    pattern -- glob pattern module files have to match
+    index_file -- file used to store the index of discovered modules; None disables the index
+    workers -- number of worker processes used to import changed modules when searching for tests; None imports all
+               modules in the current process
+    """
+
+    def __init__(self, pattern=DEFAULT_PATTERN, index_file=DEFAULT_INDEX_FILE, workers=None):
+        self._pattern = pattern
+        self._index_file = index_file
+        self._workers = workers
+
+    def discover(self, paths):
+        """
+        Returns a list of index entries (dictionaries containing root, module, mtime, size and tests) for all test
+        modules found in the given paths.
+        """
+        index = self._load_index()
+        entries = []
+        pending = []
+
+        for root, filename, module_name in find_test_modules(paths, self._pattern):
+            status = os.stat(filename)
+            entry = index.get(filename)
+            if entry is None or entry["mtime"] != status.st_mtime or entry["size"] != status.st_size or \
+                    entry["module"] != module_name:
+                entry = {"root": root, "module": module_name, "mtime": status.st_mtime, "size": status.st_size,
+                         "tests": None}
+                pending.append((len(entries), (root, filename, module_name)))
+            entries.append((filename, entry))
+
+        for (position, module_description), test_names in zip(pending, self._find_test_names(
+                [module_description for position, module_description in pending])):
+            entries[position][1]["tests"] = test_names
+
+        self._save_index(entries)
+        return [entry for filename, entry in entries]
+
+    def collect_tests(self, paths, collector=None):
+        """
+        Imports all modules found in the given paths that contain tests and collects their tests using the given
+        TestCollector (or a new one). Returns the collector.
+        """
+        if collector is None:
+            collector = TestCollector()
+
+        for entry in self.discover(paths):
+            if entry["tests"] is None or entry["tests"]:
+                collector.collect_tests(import_module(entry["root"], entry["module"]))
+
+        return collector
+
+    def _find_test_names(self, module_descriptions):
+        if not module_descriptions:
+            return []
+
+        if self._workers is None or self._workers <= 1:
+            return [_find_test_names(root, module_name) for root, filename, module_name in module_descriptions]
+
+        pool = get_multiprocessing_context().Pool(self._workers)
+        try:
+            return pool.map(_find_test_names_in_worker, module_descriptions)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def _load_index(self):
+        if self._index_file is None:
+            return {}
+        return read_json_file(self._index_file, {})
+
+    def _save_index(self, entries):
+        if self._index_file is None:
+            return
+        write_json_file(self._index_file,
+                        dict((filename, entry) for filename, entry in entries if entry["tests"] is not None))
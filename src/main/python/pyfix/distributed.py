@@ -0,0 +1,309 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides distributed execution of tests: a Coordinator hands out TestDefinitions to Workers that connect to it using
+TCP (address "host:port") or a Unix socket (address "unix:path").
+
+Both sides collect the same tests; only the key of a TestDefinition (see pyfix.resultcache.get_test_key) is sent to a
+worker and the results are sent back. Messages are JSON documents, one per line:
+
+    worker -> coordinator: {"type": "request"}
+    coordinator -> worker: {"type": "test", "key": ...} or {"type": "done"}
+    worker -> coordinator: {"type": "results", "key": ..., "results": [...]}
+"""
+
+__author__ = "Alexander Metzner"
+
+import json
+import os
+import socket
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .benchmark import BenchmarkStatistics
+from .fixturecache import FixtureCache
+from .resultcache import get_test_key
+from .testrunner import TestInjector, TestResult, TestSuiteResult
+from .utils import perf_counter_ns
+
+_NANO_SECONDS_PER_MILLI_SECOND = 1000000
+
+
+def parse_address(address):
+    "Parses the given address and returns a tuple (socket family, socket address)."
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError("Invalid address '{0}': expected host:port or unix:path".format(address))
+    return socket.AF_INET, (host, int(port))
+
+
+def format_address(family, socket_address):
+    "Formats the given socket address as understood by parse_address."
+    if family == socket.AF_INET:
+        return "{0}:{1}".format(*socket_address)
+    return "unix:" + socket_address
+
+
+def encode_test_result(test_result):
+    "Returns a dict describing the given TestResult that can be sent to the coordinator."
+    document = {
+        "success": test_result.success,
+        "execution_time_ns": test_result.execution_time_ns,
+        "parameter_description": test_result.parameter_description,
+        "parameter_key": test_result.parameter_key,
+        "message": test_result.message,
+        "traceback": test_result.traceback_as_string if test_result.traceback is not None else None,
+        "phase_times": test_result.phase_times
+    }
+    if test_result.benchmark_statistics is not None:
+        document["benchmark"] = {"timings": test_result.benchmark_statistics.timings,
+                                 "iterations": test_result.benchmark_statistics.iterations}
+    return document
+
+
+def decode_test_result(test_definition, document):
+    "Creates a TestResult of the given TestDefinition from the given dict (see encode_test_result)."
+    benchmark_statistics = None
+    if document.get("benchmark") is not None:
+        benchmark_statistics = BenchmarkStatistics(document["benchmark"]["timings"],
+                                                   document["benchmark"]["iterations"])
+    return TestResult(test_definition, document["success"],
+                      document["execution_time_ns"] // _NANO_SECONDS_PER_MILLI_SECOND,
+                      document["parameter_description"], document["message"], document["traceback"],
+                      document["execution_time_ns"], document["phase_times"], benchmark_statistics,
+                      document.get("parameter_key"))
+
+
+class _Connection(object):
+    "Sends and receives JSON messages, one per line, using a socket."
+
+    def __init__(self, connection):
+        self._socket = connection
+        self._file = connection.makefile("rwb")
+
+    def send(self, message):
+        self._file.write(json.dumps(message).encode("utf-8") + b"\n")
+        self._file.flush()
+
+    def receive(self):
+        "Returns the next message or None if the connection has been closed."
+        line = self._file.readline()
+        if not line:
+            return None
+        return json.loads(line.decode("utf-8"))
+
+    def close(self):
+        try:
+            self._file.close()
+        finally:
+            self._socket.close()
+
+
+class Coordinator(object):
+    """
+    Executes tests by handing them out to Workers connecting to the given address. The interface matches the one of
+    TestRunner: listeners are notified in the order of the given TestDefinitions, regardless of the order in which
+    the workers finish them.
+
+    If a worker disconnects while executing a test, the test is reported as failed. If max_failures is given, no more
+    tests are handed out as soon as that many executions failed.
+    """
+
+    def __init__(self, address, keep_results=True, result_sink=None, max_failures=None):
+        self._family, self._socket_address = parse_address(address)
+        self._keep_results = keep_results
+        self._result_sink = result_sink
+        self._max_failures = max_failures
+        self._stopped = threading.Event()
+        self._listeners = []
+        self._server = None
+        self._pending = None
+        self._results = None
+
+    @property
+    def address(self):
+        "The address workers have to connect to. Only available once listen has been called."
+        return format_address(self._family, self._server.getsockname())
+
+    def add_test_run_listener(self, test_run_listener):
+        "Registers the given TestRunListener."
+        self._listeners.append(test_run_listener)
+
+    def listen(self):
+        "Starts listening for workers. Called by run_tests if it has not been called before."
+        if self._server is not None:
+            return
+        self._server = socket.socket(self._family, socket.SOCK_STREAM)
+        if self._family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(self._socket_address)
+        self._server.listen(16)
+
+    def run_tests(self, test_definitions):
+        "Executes all given TestDefinitions using the connected workers and returns a TestSuiteResult."
+        self.listen()
+
+        test_suite_result = TestSuiteResult(self._keep_results, self._result_sink)
+        self._notify_listeners(lambda l: l.before_suite(test_definitions))
+
+        start = perf_counter_ns()
+
+        self._stopped.clear()
+        self._pending = queue.Queue()
+        for index in range(len(test_definitions)):
+            self._pending.put(index)
+        self._results = queue.Queue()
+
+        acceptor = threading.Thread(target=self._accept_workers, args=(test_definitions,))
+        acceptor.daemon = True
+        acceptor.start()
+
+        try:
+            finished = {}
+            for index, test_definition in enumerate(test_definitions):
+                while index not in finished:
+                    finished_index, test_results = self._results.get()
+                    finished[finished_index] = test_results
+                test_results = finished.pop(index)
+
+                self._notify_listeners(lambda l: l.before_test(test_definition))
+                self._notify_listeners(lambda l: l.after_test(test_results))
+                test_suite_result.add_test_results(test_results)
+
+                if self._max_failures is not None and test_suite_result.number_of_failures >= self._max_failures:
+                    # Workers finish their current test and are sent away when requesting the next one.
+                    self._stopped.set()
+                    test_suite_result.aborted = index + 1 < len(test_definitions)
+                    test_suite_result.number_of_tests_not_executed = len(test_definitions) - index - 1
+                    break
+        finally:
+            self._close_server()
+
+        end = perf_counter_ns()
+        test_suite_result.execution_time_ns = end - start
+        test_suite_result.execution_time = test_suite_result.execution_time_ns // _NANO_SECONDS_PER_MILLI_SECOND
+
+        self._notify_listeners(lambda l: l.after_suite(test_suite_result))
+
+        return test_suite_result
+
+    def _close_server(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            # Wakes up the thread blocked in accept.
+            server.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        server.close()
+        if self._family == socket.AF_UNIX and os.path.exists(self._socket_address):
+            os.remove(self._socket_address)
+
+    def _accept_workers(self, test_definitions):
+        server = self._server
+        while True:
+            try:
+                connection, _ = server.accept()
+            except (socket.error, OSError):
+                return
+            handler = threading.Thread(target=self._serve_worker, args=(_Connection(connection), test_definitions))
+            handler.daemon = True
+            handler.start()
+
+    def _serve_worker(self, connection, test_definitions):
+        index = None
+        try:
+            while True:
+                message = connection.receive()
+                if message is None:
+                    break
+
+                if message["type"] == "results":
+                    test_definition = test_definitions[index]
+                    self._results.put((index, [decode_test_result(test_definition, document)
+                                               for document in message["results"]]))
+                    index = None
+                elif message["type"] == "request":
+                    if self._stopped.is_set():
+                        connection.send({"type": "done"})
+                        break
+                    try:
+                        index = self._pending.get_nowait()
+                    except queue.Empty:
+                        connection.send({"type": "done"})
+                        break
+                    connection.send({"type": "test", "key": get_test_key(test_definitions[index])})
+        except (socket.error, OSError, ValueError):
+            pass
+        finally:
+            connection.close()
+            if index is not None:
+                self._results.put((index, [TestResult(test_definitions[index], False, 0, "",
+                                                      "Worker disconnected during execution", None)]))
+
+    def _notify_listeners(self, callback):
+        for listener in self._listeners:
+            callback(listener)
+
+
+class Worker(object):
+    """
+    Connects to a Coordinator at the given address and executes the tests it hands out until there are none left.
+    test_definitions have to contain all tests the coordinator may hand out. async_concurrency, timeout and
+    fixture_threads are used like with a TestRunner.
+    """
+
+    def __init__(self, test_definitions, address, async_concurrency=1, timeout=None, fixture_threads=None):
+        self._test_definitions = dict((get_test_key(d), d) for d in test_definitions)
+        self._family, self._socket_address = parse_address(address)
+        self._injector = TestInjector(async_concurrency, FixtureCache(), timeout, fixture_threads=fixture_threads)
+
+    def run(self):
+        "Executes tests until the coordinator has none left. Returns the number of tests executed."
+        connection = socket.socket(self._family, socket.SOCK_STREAM)
+        connection.connect(self._socket_address)
+        connection = _Connection(connection)
+        number_of_tests = 0
+        try:
+            while True:
+                connection.send({"type": "request"})
+                message = connection.receive()
+                if message is None or message["type"] == "done":
+                    break
+
+                test_definition = self._test_definitions.get(message["key"])
+                if test_definition is None:
+                    test_results = [TestResult(None, False, 0, "", "Worker did not collect test '{0}'".format(
+                        message["key"]), None)]
+                else:
+                    test_results = self._injector.execute_test(test_definition)
+                connection.send({"type": "results", "key": message["key"],
+                                 "results": [encode_test_result(r) for r in test_results]})
+                number_of_tests += 1
+        finally:
+            connection.close()
+            try:
+                self._injector.release_fixtures()
+            finally:
+                self._injector.close()
+        return number_of_tests
@@ -15,14 +15,40 @@
 
 __author__ = "Alexander Metzner"
 
+SCOPE_TEST = "test"
+SCOPE_MODULE = "module"
+SCOPE_SUITE = "suite"
+
+SCOPES = (SCOPE_TEST, SCOPE_MODULE, SCOPE_SUITE)
+
 
 class Fixture(object):
     """
     Base class for objects that provide values to be injected to test functions.
+
+    The scope defines how long provided values are kept:
+    SCOPE_TEST -- values are provided for each test and reclaimed after the test has been executed (default)
+    SCOPE_MODULE -- values are provided once and shared by all tests of a module
+    SCOPE_SUITE -- values are provided once and shared by all tests of the suite
+
+    A fixture may depend on other fixtures by mapping argument names of provide to fixtures (classes, instances or
+    constant values just like the given decorator accepts) in dependencies. A fixture others depend on has to provide a
+    single value and its scope must not be narrower than the scope of the fixtures depending on it. Within a test,
+    each fixture is provided once and shared by all fixtures depending on it (and the test if it is given as well).
     """
 
+    scope = SCOPE_TEST
+    dependencies = {}
+
     def provide(self):
-        "Called by the framework to obtain the list of values to be passed in to a test."
+        """
+        Called by the framework to obtain the list of values to be passed in to a test. The values of the fixtures
+        declared in dependencies are passed as keyword arguments.
+
+        Instead of a list a fixture may return an iterator (i.e. implement provide as a generator). Such a lazy fixture
+        has its values obtained one at a time and each value is reclaimed as soon as all executions using it have
+        finished.
+        """
         pass
 
     def reclaim(self, value):
@@ -0,0 +1,46 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+from .fixture import SCOPE_MODULE, SCOPE_SUITE
+
+
+class FixtureCache(object):
+    """
+    Caches the values provided by fixtures with a module or suite scope until the respective scope ends.
+    """
+
+    def __init__(self):
+        self._entries = {SCOPE_MODULE: [], SCOPE_SUITE: []}
+        self._index = {}
+
+    def get(self, key):
+        "Returns the tuple (fixture, values) cached for the given key or None."
+        return self._index.get(key)
+
+    def put(self, scope, key, fixture, values):
+        "Caches the given fixture and its values until the given scope ends."
+        self._index[key] = (fixture, values)
+        self._entries[scope].append(key)
+
+    def end_scope(self, scope):
+        """
+        Removes all entries of the given scope from the cache and returns them as a list of (fixture, values) tuples
+        in reverse order of their creation. The caller is responsible for reclaiming the values.
+        """
+        keys = self._entries[scope]
+        self._entries[scope] = []
+        return [self._index.pop(key) for key in reversed(keys)]
@@ -15,4 +15,7 @@
 
 __author__ = "Alexander Metzner"
 
-from .temporary_directory_fixture import TemporaryDirectoryHandle, TemporaryDirectoryFixture
+from .temporary_directory_fixture import TemporaryDirectoryHandle, TemporaryDirectoryFixture, \
+    TemporaryDirectoryPool, PooledTemporaryDirectoryFixture, get_temporary_directory_pool
+from .template_directory_fixture import TemplateDirectoryFixture, SeededDirectoryFixture, materialize, \
+    METHOD_REFLINK, METHOD_HARDLINK, METHOD_COPY
@@ -0,0 +1,171 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import errno
+import os
+import shutil
+import stat
+
+# fcntl (and with it reflink copies) is not available on all supported platforms
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from pyfix import Fixture, SCOPE_SUITE
+from .temporary_directory_fixture import TemporaryDirectoryHandle, get_shared_memory_root, \
+    get_temporary_directory_pool
+
+METHOD_REFLINK = "reflink"
+METHOD_HARDLINK = "hardlink"
+METHOD_COPY = "copy"
+
+METHODS = (METHOD_REFLINK, METHOD_HARDLINK, METHOD_COPY)
+
+# ioctl request cloning a file on Linux file systems supporting copy-on-write (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+# Errors signalling that a file system cannot clone or link a file
+_UNSUPPORTED_ERRORS = set(getattr(errno, name) for name in ("EOPNOTSUPP", "ENOTSUP", "ENOTTY", "EXDEV", "EINVAL",
+                                                              "EPERM", "EMLINK") if hasattr(errno, name))
+
+
+def _reflink_file(source, target):
+    with open(source, "rb") as source_file:
+        with open(target, "wb") as target_file:
+            fcntl.ioctl(target_file.fileno(), _FICLONE, source_file.fileno())
+    shutil.copymode(source, target)
+
+
+def _copy_file(source, target):
+    shutil.copyfile(source, target)
+    shutil.copymode(source, target)
+
+
+def _materialize_file(source, target, methods):
+    while methods[0] != METHOD_COPY:
+        try:
+            if methods[0] == METHOD_REFLINK:
+                _reflink_file(source, target)
+            else:
+                os.link(source, target)
+            return
+        except (IOError, OSError) as error:
+            if error.errno not in _UNSUPPORTED_ERRORS:
+                raise
+            if os.path.lexists(target):
+                os.unlink(target)
+            # The file system does not support the method, so the remaining files use the next one.
+            methods.pop(0)
+    _copy_file(source, target)
+
+
+def _materialize_directory(source, target, methods):
+    for name in os.listdir(source):
+        source_path = os.path.join(source, name)
+        target_path = os.path.join(target, name)
+        mode = os.lstat(source_path).st_mode
+        if stat.S_ISLNK(mode):
+            os.symlink(os.readlink(source_path), target_path)
+        elif stat.S_ISDIR(mode):
+            os.mkdir(target_path)
+            _materialize_directory(source_path, target_path, methods)
+            shutil.copymode(source_path, target_path)
+        else:
+            _materialize_file(source_path, target_path, methods)
+
+
+def materialize(source, target, method=METHOD_REFLINK):
+    """
+    Recreates the tree of files, directories and symbolic links inside source inside the existing directory target.
+
+    Files are cloned (METHOD_REFLINK) if the file system supports copy-on-write, hard linked (METHOD_HARDLINK) or
+    copied (METHOD_COPY). If a file system does not support cloning or linking, files are copied instead. Note that hard
+    linked files share their content with the source: writing to them changes the source, replacing them does not.
+    """
+    if method not in METHODS:
+        raise ValueError("Unknown method '{0}': expected one of {1}".format(method, ", ".join(METHODS)))
+
+    methods = [method, METHOD_COPY] if method != METHOD_COPY else [METHOD_COPY]
+    if method == METHOD_REFLINK and fcntl is None:
+        methods.pop(0)
+    _materialize_directory(source, target, methods)
+
+
+class TemplateDirectoryFixture(Fixture):
+    """
+    Base class for fixtures that lay out a tree of files once per suite. Subclasses implement populate which receives
+    a TemporaryDirectoryHandle of the empty template directory. The template is created inside root (or the shared
+    memory file system if shared_memory is True and it is available) and removed when the fixture is reclaimed.
+
+    Tests do not use the template directly but a SeededDirectoryFixture depending on it.
+    """
+
+    scope = SCOPE_SUITE
+    root = None
+    shared_memory = False
+
+    def populate(self, template):
+        "Called once to create the files and directories of the template inside the given TemporaryDirectoryHandle."
+        pass
+
+    def provide(self):
+        root = self.root
+        if root is None and self.shared_memory:
+            root = get_shared_memory_root()
+        template = TemporaryDirectoryHandle(prefix="{0}-template".format(__name__), root=root)
+        try:
+            self.populate(template)
+        except:
+            template.remove()
+            raise
+        return [template]
+
+    def reclaim(self, template):
+        template.remove()
+
+
+def _get_seeded_directory_pool(root):
+    return get_temporary_directory_pool(prefix="{0}-seeded".format(__name__), root=root)
+
+
+class SeededDirectoryFixture(Fixture):
+    """
+    Fixture that provides a TemporaryDirectoryHandle of a directory containing a private copy of the tree laid out by
+    the given TemplateDirectoryFixture. The tree is materialized for each test using the given method (see
+    materialize). The directories are taken from a TemporaryDirectoryPool next to the template, so copies are on the
+    same file system.
+    """
+
+    def __init__(self, template_fixture, method=METHOD_REFLINK):
+        if method not in METHODS:
+            raise ValueError("Unknown method '{0}': expected one of {1}".format(method, ", ".join(METHODS)))
+        self.dependencies = {"template": template_fixture}
+        self._method = method
+
+    def provide(self, template):
+        pool = _get_seeded_directory_pool(os.path.dirname(template.basedir))
+        handle = pool.acquire()
+        try:
+            materialize(template.basedir, handle.basedir, self._method)
+        except:
+            pool.release(handle)
+            raise
+        return [handle]
+
+    def reclaim(self, handle):
+        _get_seeded_directory_pool(os.path.dirname(handle.basedir)).release(handle)
@@ -15,9 +15,17 @@
 
 __author__ = "Alexander Metzner"
 
+import multiprocessing.util
 import os
 import tempfile
 import shutil
+import threading
+
+# os.scandir is not available on all supported Python versions
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
 
 from pyfix import Fixture
 
@@ -27,24 +35,59 @@ try:
 except NameError:
     basestring = unicode = str
 
+SHARED_MEMORY_ROOT = "/dev/shm"
+
+
+def get_shared_memory_root():
+    "Returns the root of the shared memory file system if it is available and writable or None otherwise."
+    if os.path.isdir(SHARED_MEMORY_ROOT) and os.access(SHARED_MEMORY_ROOT, os.W_OK | os.X_OK):
+        return SHARED_MEMORY_ROOT
+    return None
+
+
+def clear_directory(path):
+    "Removes all files and sub-directories inside the given directory, keeping the directory itself."
+    if scandir is not None:
+        entries = [(entry.path, entry.is_dir(follow_symlinks=False)) for entry in scandir(path)]
+    else:
+        entries = [(os.path.join(path, name), None) for name in os.listdir(path)]
+
+    for entry_path, is_directory in entries:
+        if is_directory is None:
+            is_directory = os.path.isdir(entry_path) and not os.path.islink(entry_path)
+        if is_directory:
+            shutil.rmtree(entry_path)
+        else:
+            os.unlink(entry_path)
+
+
 class TemporaryDirectoryHandle(object):
     """
     Handle for working in a temporary directory.
 
-    Each instance of this handle creates a new and empty temporary directory (basedir)
-    which can be used to add files and sub-directories for filesystem testing.
+    Each instance of this handle creates a new and empty temporary directory (basedir) inside the given root (or the
+    default temporary directory) which can be used to add files and sub-directories for filesystem testing.
 
-    Upon deletion the temporary directory and all its children are removed.
+    The temporary directory and all its children are removed by remove or upon deletion of the handle. A handle
+    created for an existing basedir does not remove it.
     """
 
-    def __init__(self, prefix=None, suffix=None):
+    def __init__(self, prefix=None, suffix=None, root=None, basedir=None):
         if prefix is None:
             prefix = __name__
         if suffix is None:
             suffix = ""
-        self.basedir = tempfile.mkdtemp(prefix=prefix, suffix=suffix)
+        self._owns_basedir = basedir is None
+        if basedir is None:
+            basedir = tempfile.mkdtemp(prefix=prefix, suffix=suffix, dir=root)
+        self.basedir = basedir
 
     def __del__(self):
+        if self._owns_basedir:
+            self.remove()
+
+    def remove(self):
+        "Removes the temporary directory and all its children."
         if os.path.exists(self.basedir):
             shutil.rmtree(self.basedir)
 
@@ -85,7 +128,95 @@ class TemporaryDirectoryFixture(Fixture):
         self._suffix = suffix
 
     def reclaim(self, temp_dir_handle):
-        del temp_dir_handle
+        temp_dir_handle.remove()
 
     def provide(self):
         return [TemporaryDirectoryHandle(self._prefix, self._suffix)]
+
+
+class TemporaryDirectoryPool(object):
+    """
+    Thread-safe pool of temporary directories inside the given root (or the default temporary directory).
+
+    Released directories are wiped using clear_directory and handed out again instead of being deleted and created
+    for each test. A directory that cannot be wiped is removed. A pool inherited by a forked process starts empty so
+    parent and child never share a directory. Idle directories are removed by close, which is called when the process
+    exits (including worker processes started by multiprocessing, which skip atexit handlers).
+    """
+
+    def __init__(self, prefix=None, suffix=None, root=None):
+        self.prefix = prefix if prefix is not None else __name__
+        self.suffix = suffix if suffix is not None else ""
+        self.root = root
+        self._lock = threading.Lock()
+        self._idle = []
+        self._pid = None
+
+    def acquire(self):
+        "Returns a TemporaryDirectoryHandle of an empty directory that has to be given back using release."
+        with self._lock:
+            self._check_process()
+            basedir = self._idle.pop() if self._idle else None
+        if basedir is None:
+            basedir = tempfile.mkdtemp(prefix=self.prefix, suffix=self.suffix, dir=self.root)
+        return TemporaryDirectoryHandle(basedir=basedir)
+
+    def release(self, temp_dir_handle):
+        "Wipes the directory of the given handle and keeps it for the next call to acquire."
+        try:
+            clear_directory(temp_dir_handle.basedir)
+        except OSError:
+            shutil.rmtree(temp_dir_handle.basedir, ignore_errors=True)
+            return
+        with self._lock:
+            self._check_process()
+            self._idle.append(temp_dir_handle.basedir)
+
+    def close(self):
+        "Removes all idle directories."
+        with self._lock:
+            self._check_process()
+            idle, self._idle = self._idle, []
+        for basedir in idle:
+            shutil.rmtree(basedir, ignore_errors=True)
+
+    def _check_process(self):
+        if self._pid != os.getpid():
+            # The idle directories of a parent process are removed by that process.
+            self._pid = os.getpid()
+            self._idle = []
+            # Run after the finalizer of pyfix.parallel reclaimed the fixtures of a worker (exit priority 10).
+            multiprocessing.util.Finalize(None, self.close, exitpriority=0)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_temporary_directory_pool(prefix=None, suffix=None, root=None):
+    "Returns the TemporaryDirectoryPool shared by all callers passing the same arguments."
+    key = prefix, suffix, root
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = TemporaryDirectoryPool(prefix, suffix, root)
+        return _pools[key]
+
+
+class PooledTemporaryDirectoryFixture(Fixture):
+    """
+    Fixture that acquires a TemporaryDirectoryHandle from a shared TemporaryDirectoryPool and releases it when the
+    test has been executed. The directory is empty for each test but is created only once per concurrently executed
+    test. If shared_memory is True, the directories are created in the shared memory file system if it is available
+    (unless a root is given).
+    """
+
+    def __init__(self, prefix=None, suffix=None, root=None, shared_memory=False):
+        if root is None and shared_memory:
+            root = get_shared_memory_root()
+        self._pool = get_temporary_directory_pool(prefix, suffix, root)
+
+    def reclaim(self, temp_dir_handle):
+        self._pool.release(temp_dir_handle)
+
+    def provide(self):
+        return [self._pool.acquire()]
@@ -0,0 +1,220 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides isolated execution of TestDefinitions: each worker process is forked from the runner which has already
+imported the test modules, executes a limited number of tests and is replaced by a fresh one afterwards. A test that
+crashes its worker is reported as failed instead of taking down the runner.
+"""
+
+__author__ = "Alexander Metzner"
+
+import collections
+
+# multiprocessing.connection.wait is not available on all supported Python versions
+try:
+    from multiprocessing.connection import wait
+except ImportError:
+    wait = None
+
+from .parallel import get_multiprocessing_context
+from .utils import get_resident_memory_size
+
+_BYTES_PER_MEGA_BYTE = 1024 * 1024
+
+
+def _has_exceeded_memory_growth(initial_memory_size, max_memory_growth):
+    if max_memory_growth is None or initial_memory_size is None:
+        return False
+    return get_resident_memory_size() - initial_memory_size > max_memory_growth * _BYTES_PER_MEGA_BYTE
+
+
+def _run_worker(connection, test_definitions, injector, max_tests, max_memory_growth):
+    """
+    Main loop of a worker process: executes the definitions whose indexes are received until None is received or the
+    worker has to be recycled. Each result is sent as a tuple (index, test_results, retiring).
+    """
+    initial_memory_size = get_resident_memory_size()
+    number_of_tests = 0
+    try:
+        while True:
+            try:
+                index = connection.recv()
+            except EOFError:
+                break
+            if index is None:
+                break
+
+            test_results = injector.execute_test(test_definitions[index])
+            number_of_tests += 1
+            retiring = (max_tests is not None and number_of_tests >= max_tests) or \
+                _has_exceeded_memory_growth(initial_memory_size, max_memory_growth)
+            connection.send((index, test_results, retiring))
+            if retiring:
+                break
+    finally:
+        try:
+            injector.release_fixtures()
+        finally:
+            injector.close()
+            connection.close()
+
+
+def _describe_exit_code(exit_code):
+    if exit_code is not None and exit_code < 0:
+        return "killed by signal {0}".format(-exit_code)
+    return "exited with code {0}".format(exit_code)
+
+
+class _IsolatedWorker(object):
+    "Handle of a worker process and the index of the definition it currently executes."
+
+    def __init__(self, context, test_definitions, injector, max_tests, max_memory_growth):
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(target=_run_worker, args=(worker_connection, test_definitions, injector,
+                                                                 max_tests, max_memory_growth))
+        self.process.daemon = True
+        self.process.start()
+        worker_connection.close()
+        self.index = None
+
+    def assign(self, index):
+        "Hands out the definition with the given index. Returns False if the worker is gone."
+        try:
+            self.connection.send(index)
+        except (IOError, OSError):
+            return False
+        self.index = index
+        return True
+
+    def receive(self):
+        "Returns the next message of the worker or None if the worker is gone."
+        try:
+            if self.connection.poll():
+                return self.connection.recv()
+        except (EOFError, IOError, OSError):
+            pass
+        return None
+
+    def stop(self):
+        "Asks the worker to reclaim its fixtures and exit once it finished its current test."
+        try:
+            self.connection.send(None)
+        except (IOError, OSError):
+            pass
+
+    def join(self):
+        self.process.join()
+        self.connection.close()
+
+
+def is_isolation_supported():
+    "Returns True if isolated execution is supported by the running Python version."
+    return wait is not None
+
+
+def execute_in_isolated_workers(test_definitions, injector, workers, max_tests_per_worker=None,
+                                max_memory_growth=None, should_stop=None):
+    """
+    Generator that executes the given TestDefinitions in up to the given number of isolated worker processes.
+
+    A worker is replaced by a fresh process forked from the current one after it executed max_tests_per_worker tests
+    (if given) or after its resident memory grew by more than max_memory_growth megabytes (if given). A worker that
+    dies while executing a test is replaced as well and the test is reported as failed.
+
+    Yields a tuple (test_definition, test_results) for each TestDefinition in the order the definitions have been
+    given. should_stop is handled like by pyfix.parallel.execute_in_process_pool.
+    """
+    context = get_multiprocessing_context()
+    pending = collections.deque(range(len(test_definitions)))
+    finished = {}
+    active = []
+
+    def start_worker():
+        while pending:
+            worker = _IsolatedWorker(context, test_definitions, injector, max_tests_per_worker, max_memory_growth)
+            active.append(worker)
+            if worker.assign(pending[0]):
+                pending.popleft()
+                return
+            active.remove(worker)
+            worker.join()
+
+    def handle(worker):
+        message = worker.receive()
+        if message is not None:
+            index, test_results, retiring = message
+            finished[index] = test_results
+            worker.index = None
+            if not retiring and worker.process.is_alive():
+                if not pending:
+                    return
+                index = pending.popleft()
+                if worker.assign(index):
+                    return
+                pending.appendleft(index)
+        elif worker.process.is_alive():
+            return
+
+        active.remove(worker)
+        worker.join()
+        if worker.index is not None:
+            from .testrunner import TestResult
+            finished[worker.index] = [TestResult(test_definitions[worker.index], False, 0, "",
+                                                 "Worker process {0} during execution".format(
+                                                     _describe_exit_code(worker.process.exitcode)), None)]
+        start_worker()
+
+    completed = False
+    try:
+        for _ in range(min(workers, len(test_definitions))):
+            start_worker()
+
+        for index, test_definition in enumerate(test_definitions):
+            while index not in finished:
+                ready = wait([w.connection for w in active] + [w.process.sentinel for w in active])
+                for worker in list(active):
+                    if worker.connection in ready or worker.process.sentinel in ready:
+                        handle(worker)
+
+            test_results = finished.pop(index)
+            for test_result in test_results:
+                test_result.test_definition = test_definition
+            yield test_definition, test_results
+            if should_stop is not None and should_stop():
+                break
+        completed = True
+    finally:
+        if completed:
+            _shut_down(active)
+        else:
+            for worker in active:
+                worker.process.terminate()
+                worker.join()
+
+
+def _shut_down(workers):
+    "Stops all given workers, discarding the results of the tests they still execute, and waits for them to exit."
+    for worker in workers:
+        worker.stop()
+    while workers:
+        ready = wait([w.connection for w in workers] + [w.process.sentinel for w in workers])
+        for worker in list(workers):
+            if worker.connection in ready and worker.receive() is not None:
+                continue
+            if worker.connection in ready or worker.process.sentinel in ready:
+                # The worker closed its connection or exited.
+                workers.remove(worker)
+                worker.join()
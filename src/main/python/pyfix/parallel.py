@@ -0,0 +1,95 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides the machinery used by the TestRunner to execute TestDefinitions in a pool of worker processes.
+
+Workers are forked from the running process (where the platform supports it) so test functions, fixtures and
+interceptors do not need to be picklable. Only the index of a TestDefinition is sent to a worker and only the
+resulting TestResults are shipped back.
+"""
+
+__author__ = "Alexander Metzner"
+
+import multiprocessing
+import multiprocessing.util
+
+_worker_test_definitions = None
+_worker_injector = None
+_worker_stopped = None
+
+
+def _initialize_worker(test_definitions, injector, stopped):
+    global _worker_test_definitions, _worker_injector, _worker_stopped
+    _worker_test_definitions = test_definitions
+    _worker_injector = injector
+    _worker_stopped = stopped
+    multiprocessing.util.Finalize(None, _finalize_worker, exitpriority=10)
+
+
+def _finalize_worker():
+    try:
+        _worker_injector.release_fixtures()
+    finally:
+        _worker_injector.close()
+
+
+def _execute_in_worker(index):
+    if _worker_stopped.is_set():
+        return None
+    return _worker_injector.execute_test(_worker_test_definitions[index])
+
+
+def get_multiprocessing_context():
+    "Returns the multiprocessing context used to start worker processes; workers are forked where supported."
+    if hasattr(multiprocessing, "get_context") and "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing
+
+
+def execute_in_process_pool(test_definitions, injector, workers, should_stop=None):
+    """
+    Generator that executes the given TestDefinitions using a pool of the given number of worker processes.
+
+    Yields a tuple (test_definition, test_results) for each TestDefinition in the order the definitions have been
+    given, regardless of the order in which the workers finish them.
+
+    If should_stop is given, it is called after each yielded tuple. Once it returns True, workers skip all definitions
+    they have not started yet and nothing more is yielded.
+
+    Workers reclaim the values of their cached fixtures when they shut down after all definitions have been executed
+    or skipped; the generator returns once they did.
+    """
+    context = get_multiprocessing_context()
+    stopped = context.Event()
+    pool = context.Pool(workers, _initialize_worker, (test_definitions, injector, stopped))
+    completed = False
+    try:
+        for index, test_results in enumerate(pool.imap(_execute_in_worker, range(len(test_definitions)))):
+            test_definition = test_definitions[index]
+            for test_result in test_results:
+                test_result.test_definition = test_definition
+            yield test_definition, test_results
+            if should_stop is not None and should_stop():
+                stopped.set()
+                break
+        completed = True
+    finally:
+        if completed:
+            pool.close()
+            pool.join()
+        else:
+            pool.terminate()
+        pool.join()
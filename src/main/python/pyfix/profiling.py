@@ -0,0 +1,194 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides profiling of test executions using cProfile (CPU time) and tracemalloc (memory allocations).
+"""
+
+from __future__ import print_function
+
+__author__ = "Alexander Metzner"
+
+import contextlib
+import cProfile
+import os
+import pstats
+import re
+import threading
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+# tracemalloc is not available on all supported Python versions
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from .testrunner import TestRunListener
+
+DEFAULT_TOP = 10
+
+_UNSAFE_FILENAME_CHARACTERS = re.compile(r"[^\w.-]+")
+
+
+def _get_execution_name(test_definition, parameter_description):
+    if parameter_description:
+        return "{0} [{1}]".format(test_definition.name, parameter_description)
+    return test_definition.name
+
+
+def _format_size(size):
+    return "{0:.1f} KiB".format(size / 1024.0)
+
+
+class TestProfiler(object):
+    """
+    Profiles executions of tests. If cpu is True, each execution is profiled using cProfile; if memory is True, the
+    memory allocated by each execution is traced using tracemalloc. If directory is given, the cProfile statistics of
+    each execution are stored in a file of their own in that directory.
+
+    Profilers cannot observe several threads at once, so profiled executions are serialized even if a test is executed
+    using a pool of threads. Asynchronous tests are not profiled. While an execution that timed out and has been
+    abandoned (see abandon) is still being profiled, other executions are not profiled instead of waiting for it.
+    """
+
+    def __init__(self, cpu=True, memory=False, directory=None):
+        if memory and tracemalloc is None:
+            raise ValueError("Tracing memory allocations requires tracemalloc which is not available")
+        self.cpu = cpu
+        self.memory = memory
+        self.directory = directory
+        self._condition = threading.Condition()
+        self._profiled_thread = None
+        self._abandoned_threads = set()
+        self._stats = None
+        self._allocations = []
+        self._number_of_executions = 0
+        self._started_tracing = False
+
+    @contextlib.contextmanager
+    def profile(self, test_definition, parameter_description):
+        "Context manager profiling the execution of the given TestDefinition with the given parameters."
+        if not self._start_profiling():
+            yield
+            return
+
+        try:
+            self._number_of_executions += 1
+            if self.memory:
+                self._start_tracing()
+                baseline = tracemalloc.get_traced_memory()[0]
+                if hasattr(tracemalloc, "reset_peak"):
+                    tracemalloc.reset_peak()
+
+            profile = cProfile.Profile() if self.cpu else None
+            if profile is not None:
+                profile.enable()
+            try:
+                yield
+            finally:
+                if profile is not None:
+                    profile.disable()
+                    self._record_profile(test_definition, parameter_description, profile)
+                if self.memory:
+                    current, peak = tracemalloc.get_traced_memory()
+                    self._allocations.append((peak - baseline, current - baseline,
+                                              _get_execution_name(test_definition, parameter_description)))
+        finally:
+            self._stop_profiling()
+
+    def abandon(self, thread):
+        "Called when the execution in the given thread has been abandoned, so no other execution waits for it."
+        with self._condition:
+            self._abandoned_threads.add(thread)
+            self._condition.notify_all()
+
+    def close(self):
+        "Stops tracing memory allocations if tracing has been started by this profiler."
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def format_hottest_functions(self, top=DEFAULT_TOP):
+        "Returns a report of the top functions (by time spent in the function itself) across all executions."
+        if self._stats is None:
+            return "No executions have been profiled."
+        stream = StringIO()
+        self._stats.stream = stream
+        self._stats.sort_stats("tottime").print_stats(top)
+        return stream.getvalue()
+
+    def format_top_allocating_tests(self, top=DEFAULT_TOP):
+        "Returns a report of the top executions by peak memory allocated."
+        if not self._allocations:
+            return "No allocations have been traced."
+        lines = ["{0:>14} {1:>14}  {2}".format("peak", "retained", "test")]
+        for peak, retained, name in sorted(self._allocations, key=lambda allocation: -allocation[0])[:top]:
+            lines.append("{0:>14} {1:>14}  {2}".format(_format_size(peak), _format_size(retained), name))
+        return "\n".join(lines)
+
+    def _start_profiling(self):
+        "Waits until no other execution is profiled and returns True or returns False if that one has been abandoned."
+        with self._condition:
+            while self._profiled_thread is not None and self._profiled_thread not in self._abandoned_threads:
+                self._condition.wait()
+            if self._profiled_thread is not None:
+                return False
+            self._profiled_thread = threading.current_thread()
+            return True
+
+    def _stop_profiling(self):
+        with self._condition:
+            self._abandoned_threads.discard(self._profiled_thread)
+            self._profiled_thread = None
+            self._condition.notify_all()
+
+    def _start_tracing(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def _record_profile(self, test_definition, parameter_description, profile):
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+
+        if self.directory is not None:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            name = _UNSAFE_FILENAME_CHARACTERS.sub("_", _get_execution_name(test_definition, parameter_description))
+            filename = "{0:04d}-{1}.prof".format(self._number_of_executions, name.strip("_"))
+            profile.dump_stats(os.path.join(self.directory, filename))
+
+
+class ProfilingTestRunListener(TestRunListener):
+    "TestRunListener printing the reports of a TestProfiler to STDOUT when the suite finished."
+
+    def __init__(self, profiler, top=DEFAULT_TOP):
+        self._profiler = profiler
+        self._top = top
+
+    def after_suite(self, test_suite_result):
+        self._profiler.close()
+        if self._profiler.cpu:
+            print("HOTTEST FUNCTIONS")
+            print(self._profiler.format_hottest_functions(self._top))
+        if self._profiler.memory:
+            print("TOP ALLOCATING TESTS")
+            print(self._profiler.format_top_allocating_tests(self._top))
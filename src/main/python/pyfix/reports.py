@@ -0,0 +1,160 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides TestRunListeners writing machine readable reports (JSON Lines and JUnit XML). Both write the results of each
+test to a buffered file as soon as the test has been executed, so the reports never have to be held in memory.
+"""
+
+__author__ = "Alexander Metzner"
+
+import io
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+from .testrunner import PHASES, TestRunListener
+
+_BUFFER_SIZE = 64 * 1024
+
+
+def _get_execution_name(test_result):
+    if test_result.parameter_description:
+        return "{0} [{1}]".format(test_result.test_definition.name, test_result.parameter_description)
+    return test_result.test_definition.name
+
+
+def _get_seconds(nano_seconds):
+    return "{0:.6f}".format(nano_seconds / 1000000000.0)
+
+
+def create_result_document(test_result):
+    "Returns a dict describing the given TestResult that can be serialized to JSON."
+    document = {
+        "name": test_result.test_definition.name,
+        "module": test_result.test_definition.module,
+        "parameters": test_result.parameter_description,
+        "success": test_result.success,
+        "execution_time_ns": test_result.execution_time_ns,
+        "phase_times": test_result.phase_times,
+        "message": test_result.message,
+        "traceback": test_result.traceback_as_string if test_result.traceback is not None else None
+    }
+    if test_result.benchmark_statistics is not None:
+        statistics = test_result.benchmark_statistics
+        document["benchmark"] = {
+            "rounds": statistics.rounds,
+            "iterations": statistics.iterations,
+            "min_ns": statistics.minimum,
+            "median_ns": statistics.median,
+            "p95_ns": statistics.p95,
+            "stddev_ns": statistics.stddev
+        }
+    return document
+
+
+class _FileTestRunListener(TestRunListener):
+    "Base class for listeners writing a report to a buffered file that is flushed after each test."
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = None
+
+    def before_suite(self, test_definitions):
+        self._file = io.open(self.filename, "wb", buffering=_BUFFER_SIZE)
+        self._write_header()
+
+    def after_test(self, test_results):
+        self._write_test_results(test_results)
+        self._file.flush()
+
+    def after_suite(self, test_suite_result):
+        try:
+            self._write_footer(test_suite_result)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def _write(self, text):
+        "Writes the given text encoded as UTF-8. Byte strings (native strings on Python 2) are written as they are."
+        if not isinstance(text, bytes):
+            text = text.encode("utf-8")
+        self._file.write(text)
+
+    def _write_header(self):
+        pass
+
+    def _write_test_results(self, test_results):
+        pass
+
+    def _write_footer(self, test_suite_result):
+        pass
+
+
+class JsonLinesTestRunListener(_FileTestRunListener):
+    """
+    TestRunListener writing a JSON document for each test execution (see create_result_document) to the given file,
+    one document per line.
+    """
+
+    def _write_test_results(self, test_results):
+        for test_result in test_results:
+            self._write(json.dumps(create_result_document(test_result), sort_keys=True))
+            self._write("\n")
+
+
+class JUnitXmlTestRunListener(_FileTestRunListener):
+    """
+    TestRunListener writing a JUnit XML report to the given file. Each TestDefinition is reported as a testsuite of its
+    own that contains a testcase for each execution; parameters and phase times are given as properties.
+    """
+
+    def _write_header(self):
+        self._write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n')
+
+    def _write_test_results(self, test_results):
+        if not test_results:
+            return
+
+        test_definition = test_results[0].test_definition
+        self._write('  <testsuite name={0} tests="{1}" failures="{2}" time="{3}">\n'.format(
+            quoteattr(test_definition.name), len(test_results), len([r for r in test_results if not r.success]),
+            _get_seconds(sum(r.execution_time_ns for r in test_results))))
+        for test_result in test_results:
+            self._write_test_case(test_result)
+        self._write("  </testsuite>\n")
+
+    def _write_test_case(self, test_result):
+        self._write('    <testcase classname={0} name={1} time="{2}">\n'.format(
+            quoteattr(test_result.test_definition.module), quoteattr(_get_execution_name(test_result)),
+            _get_seconds(test_result.execution_time_ns)))
+
+        self._write("      <properties>\n")
+        self._write_property("parameters", test_result.parameter_description)
+        for phase in PHASES:
+            if phase in test_result.phase_times:
+                self._write_property("phase." + phase, _get_seconds(test_result.phase_times[phase]))
+        self._write("      </properties>\n")
+
+        if not test_result.success:
+            self._write("      <failure message={0}>{1}</failure>\n".format(
+                quoteattr(test_result.message or ""),
+                escape(test_result.traceback_as_string if test_result.traceback is not None else "")))
+        self._write("    </testcase>\n")
+
+    def _write_property(self, name, value):
+        self._write("        <property name={0} value={1}/>\n".format(quoteattr(name), quoteattr(value)))
+
+    def _write_footer(self, test_suite_result):
+        self._write("</testsuites>\n")
@@ -0,0 +1,184 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides a persistent cache of test outcomes and durations that is used to select and order the tests of a rerun.
+"""
+
+__author__ = "Alexander Metzner"
+
+import hashlib
+import inspect
+import types
+
+from .fixture import Fixture
+from .testrunner import TestRunListener
+from .utils import get_stable_repr, read_json_file, write_json_file
+
+DEFAULT_CACHE_FILE = ".pyfix-cache.json"
+
+_MAXIMUM_HASH_DEPTH = 4
+
+# Class attributes that do not affect the behaviour of a class
+_IGNORED_CLASS_ATTRIBUTES = ("__dict__", "__doc__", "__module__", "__qualname__", "__weakref__")
+
+
+def get_test_key(test_definition):
+    "Returns the key identifying the given TestDefinition across test runs: module and qualified function name."
+    function = test_definition.function
+    name = getattr(function, "__qualname__", getattr(function, "__name__", repr(function)))
+    return "{0}:{1}".format(test_definition.module, name)
+
+
+def compute_test_hash(test_definition):
+    """
+    Computes a hash of the given TestDefinition covering the code of the test function, its givens and its
+    interceptors. The hash changes whenever one of these is changed.
+    """
+    digest = hashlib.sha1()
+    _hash_value(digest, test_definition.function, 0)
+    for name in sorted(test_definition.givens.keys()):
+        _update(digest, name)
+        _hash_value(digest, test_definition.givens[name], 0)
+    for interceptor in test_definition.before_interceptors + test_definition.after_interceptors:
+        _hash_value(digest, interceptor, 0)
+    return digest.hexdigest()
+
+
+def _update(digest, text):
+    digest.update(text.encode("utf-8"))
+
+
+def _hash_code(digest, code):
+    digest.update(code.co_code)
+    _update(digest, " ".join(code.co_names))
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            _hash_code(digest, constant)
+        else:
+            _update(digest, get_stable_repr(constant))
+
+
+def _hash_value(digest, value, depth):
+    if depth > _MAXIMUM_HASH_DEPTH:
+        return
+
+    code = getattr(value, "__code__", None)
+    if code is not None:
+        _hash_code(digest, code)
+    elif inspect.isclass(value):
+        _update(digest, "{0}.{1}".format(value.__module__, value.__name__))
+        # Inherited attributes are hashed as well; the ones of Fixture are part of pyfix.
+        for klass in value.__mro__:
+            if klass in (Fixture, object):
+                break
+            for name in sorted(vars(klass).keys()):
+                if name not in _IGNORED_CLASS_ATTRIBUTES:
+                    _update(digest, name)
+                    _hash_value(digest, vars(klass)[name], depth + 1)
+    elif isinstance(value, (staticmethod, classmethod)):
+        _hash_value(digest, value.__func__, depth)
+    elif isinstance(value, property):
+        for accessor in (value.fget, value.fset, value.fdel):
+            _hash_value(digest, accessor, depth)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _hash_value(digest, item, depth + 1)
+    elif isinstance(value, dict):
+        # Covers the dependencies of fixtures which map names to fixture classes or instances.
+        for key in sorted(value.keys(), key=get_stable_repr):
+            _update(digest, get_stable_repr(key))
+            _hash_value(digest, value[key], depth + 1)
+    elif hasattr(value, "__dict__"):
+        # Instances are hashed by their class and state as the default repr contains the memory address.
+        _hash_value(digest, type(value), depth + 1)
+        for name in sorted(vars(value).keys()):
+            _update(digest, name)
+            _hash_value(digest, vars(value)[name], depth + 1)
+    else:
+        _update(digest, get_stable_repr(value))
+
+
+class ResultCache(object):
+    """
+    Cache of the outcome, duration and hash of each test executed. The cache is stored as a JSON document in the
+    given file.
+    """
+
+    def __init__(self, filename=DEFAULT_CACHE_FILE):
+        self.filename = filename
+        self._entries = {}
+
+    def load(self):
+        "Loads the cache from its file. A missing or unreadable file results in an empty cache."
+        self._entries = read_json_file(self.filename, {})
+
+    def save(self):
+        "Writes the cache to its file."
+        write_json_file(self.filename, self._entries)
+
+    def record(self, test_definition, test_results):
+        "Records the outcome and duration of the given TestResults of a single TestDefinition."
+        self._entries[get_test_key(test_definition)] = {
+            "hash": compute_test_hash(test_definition),
+            "success": all(r.success for r in test_results),
+            "duration": sum(r.execution_time_ns for r in test_results) / 1000000.0
+        }
+
+    def has_failed(self, test_definition):
+        "Returns True if the last recorded execution of the given TestDefinition failed."
+        entry = self._entries.get(get_test_key(test_definition))
+        return entry is not None and not entry["success"]
+
+    def has_changed(self, test_definition):
+        "Returns True if the given TestDefinition has never been recorded or has changed since it has been recorded."
+        entry = self._entries.get(get_test_key(test_definition))
+        return entry is None or entry["hash"] != compute_test_hash(test_definition)
+
+    def get_duration(self, test_definition, default=None):
+        "Returns the recorded duration of the given TestDefinition in milliseconds or the default."
+        entry = self._entries.get(get_test_key(test_definition))
+        if entry is None:
+            return default
+        return entry["duration"]
+
+    def select(self, test_definitions, failed_first=False, changed_only=False):
+        """
+        Returns the list of TestDefinitions to execute.
+
+        failed_first -- order tests that failed during their last execution before all other tests
+        changed_only -- skip tests that passed during their last execution and have not changed since. Note that
+                        changes to the code under test are not detected.
+        """
+        if changed_only:
+            test_definitions = [d for d in test_definitions if self.has_failed(d) or self.has_changed(d)]
+        if failed_first:
+            test_definitions = [d for d in test_definitions if self.has_failed(d)] + \
+                               [d for d in test_definitions if not self.has_failed(d)]
+        return list(test_definitions)
+
+
+class ResultCacheTestRunListener(TestRunListener):
+    "TestRunListener recording the results of all tests in a ResultCache that is saved when the suite finished."
+
+    def __init__(self, result_cache):
+        self._result_cache = result_cache
+
+    def after_test(self, test_results):
+        if test_results:
+            self._result_cache.record(test_results[0].test_definition, test_results)
+
+    def after_suite(self, test_suite_result):
+        self._result_cache.save()
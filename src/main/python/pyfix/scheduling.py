@@ -0,0 +1,105 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Provides scheduling of TestDefinitions based on their expected durations: ordering the longest tests first and
+partitioning a suite into shards of balanced duration.
+"""
+
+__author__ = "Alexander Metzner"
+
+import heapq
+
+_DEFAULT_DURATION = 1.0
+
+
+def parse_shard(shard):
+    "Parses a shard given as 'i/n' (the i-th of n shards, counting from 1) and returns the tuple (i, n)."
+    index, _, number_of_shards = shard.partition("/")
+    try:
+        index, number_of_shards = int(index), int(number_of_shards)
+    except ValueError:
+        raise ValueError("Invalid shard '{0}': expected i/n".format(shard))
+    if number_of_shards < 1 or not 1 <= index <= number_of_shards:
+        raise ValueError("Invalid shard '{0}': i has to be between 1 and n".format(shard))
+    return index, number_of_shards
+
+
+def get_expected_durations(test_definitions, result_cache=None):
+    """
+    Returns the list of expected durations of the given TestDefinitions as recorded in the given ResultCache. Tests
+    without a recorded duration are expected to take as long as the median recorded test (or all tests take the same
+    time if no durations have been recorded at all).
+    """
+    durations = [None] * len(test_definitions)
+    if result_cache is not None:
+        durations = [result_cache.get_duration(d) for d in test_definitions]
+
+    known_durations = sorted(d for d in durations if d is not None)
+    default = known_durations[len(known_durations) // 2] if known_durations else _DEFAULT_DURATION
+    return [d if d is not None else default for d in durations]
+
+
+def order_longest_first(test_definitions, durations):
+    "Returns the given TestDefinitions ordered by decreasing expected duration; ties keep their order."
+    order = sorted(range(len(test_definitions)), key=lambda index: (-durations[index], index))
+    return [test_definitions[index] for index in order]
+
+
+def partition(test_definitions, durations, number_of_shards):
+    """
+    Partitions the given TestDefinitions into the given number of shards of balanced expected duration using the
+    longest processing time first rule: each test, longest first, is assigned to the shard with the least total
+    duration so far. The partition is deterministic and the tests of each shard keep the order in which they have
+    been given, so tests of the same module stay together.
+    """
+    shards = [(0.0, shard, []) for shard in range(number_of_shards)]
+    for index in sorted(range(len(test_definitions)), key=lambda index: (-durations[index], index)):
+        total, shard, indexes = heapq.heappop(shards)
+        indexes.append(index)
+        heapq.heappush(shards, (total + durations[index], shard, indexes))
+
+    result = [None] * number_of_shards
+    for _, shard, indexes in shards:
+        result[shard] = [test_definitions[index] for index in sorted(indexes)]
+    return result
+
+
+def select_shard(test_definitions, durations, index, number_of_shards):
+    """
+    Returns the TestDefinitions of the index-th (counting from 1) of number_of_shards balanced shards. The shards only
+    agree on the partition if all of them are given the same test definitions and durations.
+    """
+    return partition(test_definitions, durations, number_of_shards)[index - 1]
+
+
+def schedule(test_definitions, shard=None, longest_first=False, result_cache=None, shared_durations=None):
+    """
+    Returns the given TestDefinitions restricted to the given shard (a tuple (i, n) as returned by parse_shard) and
+    ordered longest first if requested.
+
+    The shard is balanced using the durations recorded in shared_durations, a ResultCache all shards read, or is
+    balanced by count if it is not given. The local result_cache is never used for sharding, as the caches of the
+    shards only know the tests each shard executed and would result in different partitions. Ordering uses
+    shared_durations if given and the result_cache otherwise.
+    """
+    if shard is not None:
+        index, number_of_shards = shard
+        test_definitions = select_shard(test_definitions, get_expected_durations(test_definitions, shared_durations),
+                                        index, number_of_shards)
+    if longest_first:
+        durations = get_expected_durations(test_definitions, shared_durations or result_cache)
+        test_definitions = order_longest_first(test_definitions, durations)
+    return test_definitions
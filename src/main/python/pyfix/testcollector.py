@@ -1,6 +1,8 @@
 __author__ = "Alexander Metzner"
 
-from .decorators import TEST_ATTRIBUTE
+import types
+
+from .decorators import TEST_ATTRIBUTE, get_registered_tests
 from .testdefinition import TestDefinition
 
 class TestCollector(object):
@@ -12,6 +14,32 @@ class TestCollector(object):
         return self._tests
 
     def collect_tests (self, module):
+        """
+        Collects all tests of the given module in the order they have been defined. Tests of real modules are looked
+        up in the registry filled by the test decorator, followed by the test functions imported from other modules in
+        the order of the module namespace; all other objects have their attributes inspected.
+        """
+        if not isinstance(module, types.ModuleType):
+            self._collect_tests_from_attributes(module)
+            return
+
+        collected = set()
+        for function in get_registered_tests(module.__name__):
+            # The module attribute is used as the function may have been wrapped or replaced after decoration.
+            candidate = getattr(module, function.__name__, None)
+            if candidate is not None and hasattr(candidate, TEST_ATTRIBUTE) and id(candidate) not in collected:
+                collected.add(id(candidate))
+                self.register_test(candidate)
+
+        # Tests imported from other modules are not registered with this module. The namespace is read as a plain dict
+        # and only functions are inspected so no attribute lookup of other objects is triggered.
+        for candidate in list(vars(module).values()):
+            if isinstance(candidate, types.FunctionType) and candidate.__dict__.get(TEST_ATTRIBUTE) and \
+                    candidate.__module__ != module.__name__ and id(candidate) not in collected:
+                collected.add(id(candidate))
+                self.register_test(candidate)
+
+    def _collect_tests_from_attributes (self, module):
         for name in dir(module):
             candidate = getattr(module, name)
             if hasattr(candidate, TEST_ATTRIBUTE):
@@ -16,7 +16,8 @@
 __author__ = "Alexander Metzner"
 
 from .utils import humanize_camel_case_name, humanize_underscore_name
-from .decorators import GIVEN_ATTRIBUTE, BEFORE_ATTRIBUTE, AFTER_ATTRIBUTE
+from .decorators import GIVEN_ATTRIBUTE, BEFORE_ATTRIBUTE, AFTER_ATTRIBUTE, PARALLEL_ATTRIBUTE, TIMEOUT_ATTRIBUTE, \
+    BENCHMARK_ATTRIBUTE
 
 class TestDefinition(object):
     @classmethod
@@ -41,9 +42,15 @@ class TestDefinition(object):
         if hasattr(function, AFTER_ATTRIBUTE):
             after = getattr(function, AFTER_ATTRIBUTE)
 
-        return cls(function, name, description, function.__module__, givens, before, after)
+        threads = getattr(function, PARALLEL_ATTRIBUTE, 1)
+        timeout = getattr(function, TIMEOUT_ATTRIBUTE, None)
+        benchmark = getattr(function, BENCHMARK_ATTRIBUTE, None)
 
-    def __init__(self, function, name, description, module, givens, before_interceptors=None, after_interceptors=None):
+        return cls(function, name, description, function.__module__, givens, before, after, threads, timeout,
+                   benchmark)
+
+    def __init__(self, function, name, description, module, givens, before_interceptors=None, after_interceptors=None,
+                 threads=1, timeout=None, benchmark=None):
         self.function = function
         self.name = name
         self.description = description
@@ -51,3 +58,6 @@ class TestDefinition(object):
         self.givens = givens
         self.before_interceptors = before_interceptors if before_interceptors is not None else []
         self.after_interceptors = after_interceptors if after_interceptors is not None else []
+        self.threads = threads
+        self.timeout = timeout
+        self.benchmark = benchmark
@@ -15,13 +15,52 @@
 
 __author__ = "Alexander Metzner"
 
-import copy
 import inspect
+import itertools
 import sys
-import time
+import threading
 import traceback
 
-from .fixture import Fixture, ConstantFixture
+from multiprocessing.pool import ThreadPool
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from .isolation import execute_in_isolated_workers, is_isolation_supported
+from .parallel import execute_in_process_pool
+from .fixture import Fixture, ConstantFixture, SCOPES, SCOPE_TEST, SCOPE_MODULE, SCOPE_SUITE
+from .fixturecache import FixtureCache
+from .utils import get_stable_repr, perf_counter_ns
+
+# asyncio is not available on all supported Python versions
+try:
+    from . import asynchronous
+except (ImportError, SyntaxError):
+    asynchronous = None
+
+_THREAD_POOL_BATCH_FACTOR = 4
+_DEFAULT_FIXTURE_THREADS = 8
+
+PARAMETER_GROUP_EXECUTE = "execute"
+PARAMETER_GROUP_RECLAIM = "reclaim"
+PARAMETER_GROUP_FAILED = "failed"
+
+PHASE_PROVIDE = "provide"
+PHASE_BEFORE = "before"
+PHASE_TEST = "test"
+PHASE_AFTER = "after"
+PHASE_RECLAIM = "reclaim"
+
+PHASES = (PHASE_PROVIDE, PHASE_BEFORE, PHASE_TEST, PHASE_AFTER, PHASE_RECLAIM)
+
+_NANO_SECONDS_PER_MILLI_SECOND = 1000000
+
+def format_traceback(traceback_object):
+    "Formats the given traceback object to a string."
+    return "\n".join(traceback.format_tb(traceback_object))
+
 
 class TestRunListener(object):
     """
@@ -52,14 +91,23 @@ class TestRunListener(object):
 class TestResult(object):
     "The result of a single test execution."
 
-    def __init__(self, test_definition, success, execution_time, parameter_description, message, traceback):
+    def __init__(self, test_definition, success, execution_time, parameter_description, message, traceback,
+                 execution_time_ns=None, phase_times=None, benchmark_statistics=None, parameter_key=None):
         """
         test_definition -- the TestDefinition that has been executed
         success -- True if the execution was successfull, False otherwise
         execution_time -- Time in milli seconds it took to execute the test
         parameter_description -- String that describes the parameter that have been used for this execution
         message -- Message describing the failure
-        traceback -- Traceback in case of a failure or None
+        traceback -- Traceback (object or formatted string) in case of a failure or None
+        execution_time_ns -- Time in nano seconds it took to execute the test; defaults to execution_time
+        phase_times -- dict mapping phases (see PHASES) to the time in nano seconds spent in them
+        benchmark_statistics -- BenchmarkStatistics if the test is a benchmark, None otherwise
+        parameter_key -- String identifying the parameters across test runs; defaults to parameter_description
+
+        Executions of a test comprise the before interceptors, test function and after interceptors. Time spent
+        providing and reclaiming the values of fixtures is shared by all executions of a TestDefinition and is
+        accounted to the phase times of its first result only.
         """
         self.test_definition = test_definition
         self.success = success
@@ -67,120 +115,655 @@ class TestResult(object):
         self.parameter_description = parameter_description
         self.message = message
         self.traceback = traceback
+        if execution_time_ns is None:
+            execution_time_ns = execution_time * _NANO_SECONDS_PER_MILLI_SECOND
+        self.execution_time_ns = execution_time_ns
+        self.phase_times = phase_times if phase_times is not None else {}
+        self.benchmark_statistics = benchmark_statistics
+        self.parameter_key = parameter_key if parameter_key is not None else parameter_description
 
     @property
     def traceback_as_string(self):
-        return "\n".join(traceback.format_tb(self.traceback))
+        if isinstance(self.traceback, str):
+            return self.traceback
+        return format_traceback(self.traceback)
+
+    def __getstate__(self):
+        """
+        Returns a picklable state of this result. Traceback objects cannot be pickled so the traceback is formatted to
+        a string; the test definition is dropped and has to be re-attached by the receiver.
+        """
+        state = self.__dict__.copy()
+        state["test_definition"] = None
+        if self.traceback is not None:
+            state["traceback"] = self.traceback_as_string
+        return state
 
 
 class TestSuiteResult(object):
-    "The result of an execution of a test suite a.k.a. a list of test definitions."
+    """
+    The result of an execution of a test suite a.k.a. a list of test definitions.
 
-    def __init__(self):
+    Counters and phase times are updated as results are added. Tracebacks are formatted to strings when a result is
+    added so the frames of failed tests are not kept alive. If keep_results is False, the results are not kept in
+    test_results, so the memory used stays constant regardless of the size of the suite. If a sink is given, it is
+    called with each list of added results, e.g. to write them to a file.
+
+    If the runner stopped early because too many tests failed, aborted is True and number_of_tests_not_executed gives
+    the number of TestDefinitions that have not been reported.
+    """
+
+    def __init__(self, keep_results=True, sink=None):
         self.test_results = []
         self.execution_time = -1
+        self.execution_time_ns = -1
+        self.phase_times = dict((phase, 0) for phase in PHASES)
+        self.regressions = []
+        self.aborted = False
+        self.number_of_tests_not_executed = 0
+        self._keep_results = keep_results
+        self._sink = sink
+        self._number_of_tests_executed = 0
+        self._number_of_failures = 0
 
     def add_test_results(self, test_results):
-        self.test_results += [r for r in test_results]
+        for test_result in test_results:
+            if test_result.traceback is not None:
+                test_result.traceback = test_result.traceback_as_string
+
+            self._number_of_tests_executed += 1
+            if not test_result.success:
+                self._number_of_failures += 1
+            for phase, phase_time in test_result.phase_times.items():
+                self.phase_times[phase] = self.phase_times.get(phase, 0) + phase_time
+
+        if self._keep_results:
+            self.test_results += test_results
+        if self._sink is not None:
+            self._sink(test_results)
 
     @property
     def number_of_tests_executed(self):
-        return len(self.test_results)
+        return self._number_of_tests_executed
 
     @property
     def number_of_failures(self):
-        return len([r for r in self.test_results if not r.success])
+        return self._number_of_failures
 
     @property
     def success(self):
-        for test_result in self.test_results:
-            if not test_result.success:
-                return False
-        return True
+        return self._number_of_failures == 0
+
+
+class PhaseTimer(object):
+    """
+    Measures the time spent in consecutive phases using a monotonic clock. Calling start ends the current phase (if
+    any) and starts the given one; the times of phases started more than once are summed up.
+    """
+
+    def __init__(self):
+        self.phase_times = {}
+        self._phase = None
+        self._start = None
+
+    def start(self, phase):
+        now = perf_counter_ns()
+        if self._phase is not None:
+            self.phase_times[self._phase] = self.phase_times.get(self._phase, 0) + now - self._start
+        self._phase = phase
+        self._start = now
+
+    def stop(self):
+        self.start(None)
+
+    @property
+    def total(self):
+        "Total time in nano seconds spent in all phases that have been ended."
+        return sum(self.phase_times.values())
+
+
+class _FixtureNode(object):
+    """
+    A fixture in the dependency graph of a test. values is None until the fixture has provided its values;
+    dependencies maps the names of the arguments of provide to the nodes of the fixtures they are taken from. If
+    providing (or reclaiming) the values failed, error holds the message and formatted traceback.
+    """
+
+    def __init__(self, fixture, scope, cache_key, values=None):
+        self.fixture = fixture
+        self.scope = scope
+        self.cache_key = cache_key
+        self.values = values
+        self.dependencies = {}
+        self.is_dependency = False
+        self.error = None
+        self.exception = None
 
 
 class TestInjector(object):
     """
     Instances of this class are used to calculate parameter values from TestDefinitions and execute the test function
     with the respective arguments.
+
+    Test functions, interceptors and fixtures may be asynchronous (i.e. return awaitables). These are executed on an
+    event loop that is shared by all tests until close is called. Up to async_concurrency executions of asynchronous
+    tests are run concurrently by execute_tests_concurrently.
+
+    Values of fixtures with a module or suite scope are kept in the given FixtureCache. Values with module scope are
+    reclaimed when a test of another module is executed; all others are reclaimed by release_fixtures.
+
+    Fixtures may depend on other fixtures (see Fixture.dependencies). The fixtures of a test form a graph in which each
+    fixture is provided once per scope; if the graph has dependencies, independent fixtures are provided and reclaimed
+    concurrently. If fixture_threads is given, the fixtures of every test are provided and reclaimed concurrently by a
+    pool of that many threads (or sequentially if fixture_threads is 1). A fixture failing to provide its values is
+    reported as a failed TestResult after the values provided so far have been reclaimed.
+
+    Executions of tests that do not define a timeout of their own are limited to default_timeout seconds (if given).
+
+    If a TestProfiler (see pyfix.profiling) is given, every execution of a synchronous test is profiled.
     """
 
+    def __init__(self, async_concurrency=1, fixture_cache=None, default_timeout=None, profiler=None,
+                 fixture_threads=None):
+        self._fixture_cache = fixture_cache if fixture_cache is not None else FixtureCache()
+        self._default_timeout = default_timeout
+        self._profiler = profiler
+        self._fixture_threads = fixture_threads
+        self._fixture_pool = None
+        self._current_module = None
+        self._async_executor = None
+        if asynchronous is not None:
+            self._async_executor = asynchronous.AsyncTestExecutor(self, async_concurrency)
+
+    def close(self):
+        "Releases the event loop used to execute asynchronous tests and the threads providing fixtures."
+        if self._async_executor is not None:
+            self._async_executor.close()
+        if self._fixture_pool is not None:
+            self._fixture_pool.close()
+            self._fixture_pool.join()
+            self._fixture_pool = None
+
+    def release_fixtures(self, scope=None):
+        "Reclaims all cached values of fixtures with the given scope or of all scopes if no scope is given."
+        scopes = [scope] if scope is not None else [SCOPE_MODULE, SCOPE_SUITE]
+        for scope in scopes:
+            for fixture, values in self._fixture_cache.end_scope(scope):
+                for value in values:
+                    self._resolve_awaitable(fixture.reclaim(value))
+
+    def is_asynchronous(self, test_definition):
+        "Returns True if the given TestDefinition is an asynchronous test (i.e. the test function is a coroutine)."
+        return asynchronous is not None and asynchronous.is_coroutine_function(test_definition.function)
+
+    def execute_tests_concurrently(self, test_definitions):
+        """
+        Executes the given asynchronous TestDefinitions concurrently on the shared event loop and returns a list of
+        TestResults for each TestDefinition.
+        """
+        self._enter_module(test_definitions[0].module)
+        return self._async_executor.execute_tests(test_definitions)
+
     def execute_test(self, test_definition):
         "Executes the given TestDefinition and returns a list of TestResults; one result for each execution."
-        results = []
+        if self.is_asynchronous(test_definition):
+            return self.execute_tests_concurrently([test_definition])[0]
 
-        fixtures = self._resolve_fixtures(test_definition)
+        self._enter_module(test_definition.module)
 
-        parameter_sets = self._multiply_parameter_maps(fixtures)
+        results = []
+        timer = PhaseTimer()
+
+        timer.start(PHASE_PROVIDE)
+        fixtures, reclaimable, failed_node = self._resolve_fixtures(test_definition)
+        timer.stop()
+        if failed_node is not None:
+            timer.start(PHASE_RECLAIM)
+            self._reclaim_fixtures(reclaimable)
+            timer.stop()
+            return [self._create_fixture_failure_result(test_definition, failed_node, timer)]
+        lazy_names = self._get_lazy_fixture_names(fixtures)
+
+        pool = None
+        if test_definition.threads > 1:
+            pool = ThreadPool(test_definition.threads)
 
-        for parameters in parameter_sets:
-            results.append(self._execute_test_once(test_definition, fixtures, parameters))
+        try:
+            for kind, item in self._iterate_parameter_groups(fixtures, lazy_names):
+                if kind == PARAMETER_GROUP_RECLAIM:
+                    fixture, value = item
+                    timer.start(PHASE_RECLAIM)
+                    self._resolve_awaitable(fixture.reclaim(value))
+                    timer.stop()
+                elif kind == PARAMETER_GROUP_FAILED:
+                    fixture, error = item
+                    # The time spent providing and reclaiming fixtures is accounted to the first result below.
+                    results.append(self._create_fixture_error_result(test_definition, fixture, error, PhaseTimer()))
+                elif pool is not None:
+                    results += self._execute_test_in_thread_pool(test_definition, fixtures, item, pool)
+                else:
+                    for parameters in item:
+                        results.append(self._execute_test_once(test_definition, fixtures, parameters))
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
-        for name, (fixture, values) in fixtures.items():
-            for value in values:
-                fixture.reclaim(value)
+            timer.start(PHASE_RECLAIM)
+            self._reclaim_fixtures(reclaimable)
+            timer.stop()
 
+        self._add_fixture_phase_times(results, timer.phase_times)
         return results
 
-    def _multiply_parameter_maps(self, fixtures):
-        results = None
+    def _add_fixture_phase_times(self, results, phase_times):
+        "Accounts the time spent providing and reclaiming fixture values to the first of the given TestResults."
+        if not results:
+            return
+        for phase, phase_time in phase_times.items():
+            results[0].phase_times[phase] = results[0].phase_times.get(phase, 0) + phase_time
 
-        for name, (fixture, values) in fixtures.items():
-            if results is None:
-                results = []
-                for value in values:
-                    results.append({name: value})
-            else:
-                new_results = []
-                for result in results:
-                    for value in values:
-                        result = copy.deepcopy(result)
-                        result[name] = value
-                        new_results.append(result)
-                results = new_results
-
-        if results is None:
-            results = [{}]
+    def _enter_module(self, module):
+        if module != self._current_module:
+            self.release_fixtures(SCOPE_MODULE)
+            self._current_module = module
+
+    def _execute_test_in_thread_pool(self, test_definition, fixtures, parameter_sets, pool):
+        """
+        Executes the test once for every parameter set using the given pool of test_definition.threads threads.
+        Parameter sets are taken from the (lazy) iterable in batches so that only a bounded number of them is held at a
+        time. Returns the results in the order of the parameter sets.
+        """
+        results = []
+        batch_size = test_definition.threads * _THREAD_POOL_BATCH_FACTOR
+        while True:
+            batch = list(itertools.islice(parameter_sets, batch_size))
+            if not batch:
+                break
+            results += pool.map(lambda parameters: self._execute_test_once(test_definition, fixtures, parameters),
+                                batch)
         return results
 
-    def _resolve_fixtures(self, test_definition):
-        result = {}
-        for name, value in test_definition.givens.items():
-            result[name] = self._resolve_fixture_and_values(value)
-        return result
+    def _get_lazy_fixture_names(self, fixtures):
+        "Returns the names of all lazy fixtures, i.e. fixtures that provided an iterator (such as a generator)."
+        return [name for name, (fixture, values) in fixtures.items() if iter(values) is values]
+
+    def _iterate_parameter_groups(self, fixtures, lazy_names, parameters=None):
+        """
+        Generator driving the executions of a test with lazy fixtures. Yields tuples (kind, item) where kind is either
+        PARAMETER_GROUP_EXECUTE and item is an iterable of parameter maps to execute, kind is PARAMETER_GROUP_RECLAIM
+        and item is a tuple (fixture, value) denoting a value of a lazy fixture that is no longer used or kind is
+        PARAMETER_GROUP_FAILED and item is a tuple (fixture, (message, traceback)) denoting a lazy fixture that raised
+        an error while its values were obtained. No further values of a failed fixture are obtained.
+
+        Values of lazy fixtures are obtained one at a time. Callers have to finish all executions of a group before
+        resuming the generator, so at most one value per lazy fixture is alive at a time. Lazy fixtures other than the
+        first one have their provide method called once for each value of the preceding lazy fixtures.
+        """
+        if parameters is None:
+            parameters = {}
+
+        if not lazy_names:
+            eager_fixtures = dict((name, fixtures[name]) for name in fixtures if name not in parameters)
+            yield PARAMETER_GROUP_EXECUTE, self._multiply_parameter_maps(eager_fixtures, parameters)
+            return
 
-    def _resolve_fixture_and_values(self, given_value):
+        name = lazy_names[0]
+        fixture, values = fixtures[name]
+        fixtures[name] = (fixture, None)
+
+        error = None
+        try:
+            values = iter(fixture.provide() if values is None else values)
+        except:
+            error = self._get_exception_information()
+
+        while error is None:
+            # A lazy fixture runs its provide method only when its next value is obtained.
+            try:
+                value = next(values)
+            except StopIteration:
+                break
+            except:
+                error = self._get_exception_information()
+                break
+
+            parameters[name] = value
+            for group in self._iterate_parameter_groups(fixtures, lazy_names[1:], parameters):
+                yield group
+            yield PARAMETER_GROUP_RECLAIM, (fixture, value)
+        parameters.pop(name, None)
+
+        if error is not None:
+            yield PARAMETER_GROUP_FAILED, (fixture, error)
+
+    def _multiply_parameter_maps(self, fixtures, parameters=None):
+        """
+        Generator yielding a parameter map for every combination of the values provided by the given fixtures. The
+        combinations are computed lazily and the values are passed on as they are, i.e. they are not copied. The
+        optional parameters are added to every map.
+        """
+        names = list(fixtures.keys())
+        for values in itertools.product(*[fixtures[name][1] for name in names]):
+            result = dict(parameters) if parameters else {}
+            result.update(zip(names, values))
+            yield result
+
+    def _resolve_fixtures(self, test_definition):
+        """
+        Provides the values of all fixtures given to the test and of the fixtures these depend on. Returns a dict
+        mapping the name of each given to a tuple (fixture, values), the list of _FixtureNodes with test scope that have
+        been provided and have to be reclaimed after the test (in the order they have been created) and the node of
+        the fixture that failed to provide its values or None. Once a fixture failed, no further fixtures are provided.
+        """
+        givens, nodes = self._build_fixture_graph(test_definition)
+        pending = [node for node in nodes if node.values is None]
+        if self._is_concurrent(pending):
+            self._provide_concurrently(pending)
+        else:
+            for node in pending:
+                try:
+                    self._set_provided_values(node, self._resolve_awaitable(
+                        node.fixture.provide(**self._get_dependency_values(node))))
+                except:
+                    node.error = self._get_exception_information()
+                    break
+        return self._get_resolved_fixtures(givens, nodes)
+
+    def _build_fixture_graph(self, test_definition):
+        """
+        Instantiates the fixtures given to the test and, recursively, the fixtures they depend on. Returns a dict
+        mapping each given name to its _FixtureNode and the list of all nodes with dependencies preceding their
+        dependents. Cached fixtures are not instantiated again and a fixture several fixtures depend on is represented
+        by a single node, so it is provided only once.
+        """
+        nodes = []
+        shared = {}
+        givens = {}
+        for name, given_value in test_definition.givens.items():
+            givens[name] = self._get_fixture_node(test_definition, given_value, nodes, shared, False, ())
+        return givens, nodes
+
+    def _get_fixture_node(self, test_definition, given_value, nodes, shared, is_dependency, path):
+        scope = self._get_scope(given_value)
+        if scope == SCOPE_TEST:
+            key = SCOPE_TEST, id(given_value)
+        else:
+            key = self._get_cache_key(test_definition, scope, given_value)
+
+        # Fixtures with test scope given to the test more than once provide distinct values unless they are shared
+        # with a dependency.
+        node = shared.get(key)
+        if node is not None and (is_dependency or node.is_dependency or scope != SCOPE_TEST):
+            node.is_dependency = node.is_dependency or is_dependency
+            return node
+        if key in path:
+            raise ValueError("Fixture '{0}' depends on itself".format(given_value))
+
+        cached = self._fixture_cache.get(key) if scope != SCOPE_TEST else None
+        if cached is not None:
+            node = _FixtureNode(cached[0], scope, key, cached[1])
+        else:
+            node = _FixtureNode(self._instantiate_fixture(given_value), scope, key)
+            for name, dependency in node.fixture.dependencies.items():
+                dependency_node = self._get_fixture_node(test_definition, dependency, nodes, shared, True,
+                                                         path + (key,))
+                if SCOPES.index(dependency_node.scope) < SCOPES.index(scope):
+                    raise ValueError("Fixture '{0}' with scope {1} cannot depend on '{2}' with scope {3}".format(
+                        given_value, scope, dependency, dependency_node.scope))
+                node.dependencies[name] = dependency_node
+
+        node.is_dependency = is_dependency
+        shared.setdefault(key, node)
+        nodes.append(node)
+        return node
+
+    def _is_concurrent(self, nodes):
+        """
+        Returns True if the given fixture nodes are provided (or reclaimed) concurrently: always if fixture_threads is
+        greater than one, by default only if the nodes depend on each other.
+        """
+        if len(nodes) < 2:
+            return False
+        if self._fixture_threads is None:
+            return any(node.dependencies for node in nodes)
+        return self._fixture_threads > 1
+
+    def _get_fixture_pool(self):
+        if self._fixture_pool is None:
+            self._fixture_pool = ThreadPool(self._fixture_threads or _DEFAULT_FIXTURE_THREADS)
+        return self._fixture_pool
+
+    def _execute_graph_concurrently(self, nodes, get_prerequisites, execute, complete, stop_on_failure=True):
+        """
+        Executes the given nodes on the fixture thread pool, each one as soon as all its prerequisites (a subset of
+        the given nodes) have been completed. execute is called for a node by a pool thread; complete is called with
+        the node and the result of execute by the calling thread. If stop_on_failure is True, no further nodes are
+        started once a node failed. The message and formatted traceback of an error raised by execute or complete are
+        stored in the error attribute of the node, the exception itself in its exception attribute.
+        """
+        completed = queue.Queue()
+        remaining = dict((id(node), len(get_prerequisites(node))) for node in nodes)
+        dependents = dict((id(node), []) for node in nodes)
+        for node in nodes:
+            for prerequisite in get_prerequisites(node):
+                dependents[id(prerequisite)].append(node)
+
+        def run(node):
+            try:
+                completed.put((node, execute(node), None))
+            except:
+                completed.put((node, None, (self._get_exception_information(), sys.exc_info()[1])))
+
+        pool = self._get_fixture_pool()
+        running = 0
+        failed = False
+        ready = [node for node in nodes if not remaining[id(node)]]
+        while True:
+            if not (failed and stop_on_failure):
+                for node in ready:
+                    pool.apply_async(run, (node,))
+                    running += 1
+            ready = []
+            if not running:
+                break
+
+            node, result, error = completed.get()
+            running -= 1
+            if error is None:
+                try:
+                    complete(node, result)
+                except:
+                    error = self._get_exception_information(), sys.exc_info()[1]
+            if error is not None:
+                node.error, node.exception = error
+                failed = True
+                if stop_on_failure:
+                    continue
+            for dependent in dependents[id(node)]:
+                remaining[id(dependent)] -= 1
+                if not remaining[id(dependent)]:
+                    ready.append(dependent)
+
+    def _provide_concurrently(self, nodes):
+        "Provides the values of the given nodes on the fixture thread pool, dependencies first."
+        pending = set(id(node) for node in nodes)
+        self._execute_graph_concurrently(
+            nodes, lambda node: [d for d in node.dependencies.values() if id(d) in pending],
+            lambda node: node.fixture.provide(**self._get_dependency_values(node)),
+            lambda node, values: self._set_provided_values(node, self._resolve_awaitable(values)))
+
+    def _reclaim_fixtures(self, nodes):
+        """
+        Reclaims all values of the given _FixtureNodes, dependents before their dependencies. If reclaiming values
+        concurrently, the first error is raised once all values have been reclaimed.
+        """
+        if not self._is_concurrent(nodes):
+            for node in reversed(nodes):
+                for value in node.values:
+                    self._resolve_awaitable(node.fixture.reclaim(value))
+            return
+
+        reclaimed = set(id(node) for node in nodes)
+        dependents = dict((id(node), []) for node in nodes)
+        for node in nodes:
+            for dependency in node.dependencies.values():
+                if id(dependency) in reclaimed:
+                    dependents[id(dependency)].append(node)
+
+        self._execute_graph_concurrently(
+            nodes, lambda node: dependents[id(node)],
+            lambda node: [node.fixture.reclaim(value) for value in node.values],
+            lambda node, results: [self._resolve_awaitable(result) for result in results], False)
+        for node in nodes:
+            if node.exception is not None:
+                raise node.exception
+
+    def _get_dependency_values(self, node):
+        "Returns the keyword arguments passed to provide of the given node: a single value of each dependency."
+        arguments = {}
+        for name, dependency in node.dependencies.items():
+            if len(dependency.values) != 1:
+                raise ValueError("Fixture '{0}' has to provide a single value as other fixtures depend on it".format(
+                    type(dependency.fixture).__name__))
+            arguments[name] = dependency.values[0]
+        return arguments
+
+    def _set_provided_values(self, node, values):
+        "Stores the values provided by the fixture of the given node and caches them according to its scope."
+        if node.is_dependency or node.scope != SCOPE_TEST:
+            values = list(values)
+        if node.scope != SCOPE_TEST:
+            self._fixture_cache.put(node.scope, node.cache_key, node.fixture, values)
+        node.values = values
+
+    def _get_resolved_fixtures(self, givens, nodes):
+        "Returns the fixtures, reclaimable nodes and failed node of the given graph (see _resolve_fixtures)."
+        fixtures = dict((name, (node.fixture, node.values)) for name, node in givens.items())
+        reclaimable = [node for node in nodes if node.scope == SCOPE_TEST and node.values is not None and
+                       iter(node.values) is not node.values]
+        failed = [node for node in nodes if node.error is not None]
+        return fixtures, reclaimable, failed[0] if failed else None
+
+    def _create_fixture_failure_result(self, test_definition, node, timer):
+        "Returns the TestResult reporting that the fixture of the given node failed to provide its values."
+        return self._create_fixture_error_result(test_definition, node.fixture, node.error, timer)
+
+    def _create_fixture_error_result(self, test_definition, fixture, error, timer):
+        "Returns the TestResult reporting that the given fixture failed to provide its values with the given error."
+        message, traceback = error
+        return TestResult(test_definition, False, timer.total // _NANO_SECONDS_PER_MILLI_SECOND, "",
+                          "Providing fixture '{0}' failed: {1}".format(type(fixture).__name__, message),
+                          traceback, timer.total, timer.phase_times)
+
+    def _get_scope(self, given_value):
+        scope = SCOPE_TEST
+        if isinstance(given_value, Fixture) or (inspect.isclass(given_value) and issubclass(given_value, Fixture)):
+            scope = given_value.scope
+
+        if scope not in SCOPES:
+            raise ValueError("Fixture '{0}' has unknown scope '{1}'".format(given_value, scope))
+        return scope
+
+    def _get_cache_key(self, test_definition, scope, given_value):
+        if scope == SCOPE_MODULE:
+            return scope, test_definition.module, given_value
+        return scope, given_value
+
+    def _instantiate_fixture(self, given_value):
         if inspect.isclass(given_value):
             given_value = given_value()
 
         if not isinstance(given_value, Fixture):
             given_value = ConstantFixture(given_value)
 
-        return (given_value, given_value.provide())
+        return given_value
 
+    def _resolve_awaitable(self, value):
+        if self._async_executor is not None:
+            return self._async_executor.resolve(value)
+        return value
 
     def _get_exception_information(self):
+        "Returns the message and formatted traceback of the exception being handled."
         exception_information = sys.exc_info()
         type_name = exception_information[0].__name__
         value = str(exception_information[1])
-        return type_name + ": " + value, exception_information[2]
+        # The traceback is formatted right away as it would keep the frames and locals of the failed test alive.
+        return type_name + ": " + value, format_traceback(exception_information[2])
 
     def _execute_interceptors(self, interceptors):
         for interceptor in interceptors:
-            interceptor()
+            self._resolve_awaitable(interceptor())
+
+    def get_timeout(self, test_definition):
+        "Returns the timeout in seconds that applies to executions of the given TestDefinition or None."
+        if test_definition.timeout is not None:
+            return test_definition.timeout
+        return self._default_timeout
+
+    def _create_timeout_result(self, test_definition, fixtures, parameters, timeout, execution_time_ns, stack):
+        return TestResult(test_definition, False, execution_time_ns // _NANO_SECONDS_PER_MILLI_SECOND,
+            self._build_parameter_description(fixtures, parameters),
+            "Execution timed out after {0} seconds".format(timeout), stack, execution_time_ns,
+            parameter_key=self._build_parameter_key(fixtures, parameters))
 
     def _execute_test_once(self, test_definition, fixtures, parameters):
-        start = time.time()
+        timeout = self.get_timeout(test_definition)
+        if timeout is None:
+            return self._execute_test_once_profiled(test_definition, fixtures, parameters)
+
+        # The execution happens in a daemon thread which is abandoned when it does not finish in time as Python
+        # provides no means to interrupt a thread.
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            self._execute_test_once_profiled(test_definition, fixtures, parameters)))
+        thread.daemon = True
+
+        start = perf_counter_ns()
+        thread.start()
+        thread.join(timeout)
+        if results:
+            return results[0]
+
+        end = perf_counter_ns()
+        if self._profiler is not None:
+            self._profiler.abandon(thread)
+        if self._async_executor is not None:
+            self._async_executor.abandon(thread)
+
+        stack = None
+        frame = sys._current_frames().get(thread.ident)
+        if frame is not None:
+            stack = "".join(traceback.format_stack(frame))
+
+        return self._create_timeout_result(test_definition, fixtures, parameters, timeout, end - start, stack)
+
+    def _execute_test_once_profiled(self, test_definition, fixtures, parameters):
+        if self._profiler is None:
+            return self._execute_test_once_without_timeout(test_definition, fixtures, parameters)
+
+        with self._profiler.profile(test_definition, self._build_parameter_description(fixtures, parameters)):
+            return self._execute_test_once_without_timeout(test_definition, fixtures, parameters)
+
+    def _execute_test_once_without_timeout(self, test_definition, fixtures, parameters):
+        timer = PhaseTimer()
 
         message = None
         traceback = None
         success = False
+        benchmark_statistics = None
 
         try:
+            timer.start(PHASE_BEFORE)
             self._execute_interceptors(test_definition.before_interceptors)
 
+            timer.start(PHASE_TEST)
             try:
-                test_definition.function(**parameters)
+                if test_definition.benchmark is not None:
+                    benchmark_statistics = test_definition.benchmark.run(lambda: test_definition.function(**parameters))
+                else:
+                    test_definition.function(**parameters)
                 success = True
             except AssertionError as error:
                 message = str(error)
@@ -193,6 +776,7 @@ class TestInjector(object):
             success = False
 
         finally:
+            timer.start(PHASE_AFTER)
             try:
                 self._execute_interceptors(test_definition.after_interceptors)
             except:
@@ -200,10 +784,11 @@ class TestInjector(object):
                 message = "Execution of after interceptor failed: " + message
                 success = False
 
-        end = time.time()
+        timer.stop()
 
-        return TestResult(test_definition, success, int((end - start) * 1000),
-            self._build_parameter_description(fixtures, parameters), message, traceback)
+        return TestResult(test_definition, success, timer.total // _NANO_SECONDS_PER_MILLI_SECOND,
+            self._build_parameter_description(fixtures, parameters), message, traceback, timer.total,
+            timer.phase_times, benchmark_statistics, self._build_parameter_key(fixtures, parameters))
 
     def _build_parameter_description(self, fixtures, parameters):
         result_list = []
@@ -212,6 +797,10 @@ class TestInjector(object):
 
         return " ".join(result_list)
 
+    def _build_parameter_key(self, fixtures, parameters):
+        # Unlike the description, the key must not truncate the values as it has to tell all parameter sets apart.
+        return " ".join("{0}={1}".format(name, get_stable_repr(parameters[name])) for name in sorted(fixtures.keys()))
+
 
 class TestRunner(object):
     """
@@ -219,11 +808,53 @@ class TestRunner(object):
 
     Multiple TestRunListener can be registered with a test runner to receive notifications about events during
     execution.
+
+    If workers is set to a number greater than one, the test definitions are executed by a pool of that many worker
+    processes. Listeners are still notified in the parent process in the order of the given test definitions.
+
+    Asynchronous tests share a single event loop per suite. If async_concurrency is set to a number greater than one,
+    up to that many executions of consecutive asynchronous tests are run concurrently.
+
+    Values of fixtures with a module or suite scope are cached by the runner until the scope ends.
+
+    If timeout is given, each execution of a test that does not define a timeout of its own may take up to timeout
+    seconds before it is reported as failed.
+
+    If a TestProfiler (see pyfix.profiling) is given, executions of synchronous tests are profiled. Profiling is not
+    supported in combination with worker processes.
+
+    keep_results and result_sink are passed on to the TestSuiteResult; pass False for keep_results to run very large
+    suites with constant memory.
+
+    If max_failures is given, the runner stops executing tests as soon as that many executions failed. Fixtures are
+    reclaimed as usual and the TestSuiteResult is marked as aborted.
+
+    If isolated is True, tests are executed by workers (one unless workers is given) forked from the runner (see
+    pyfix.isolation). A worker is replaced after max_tests_per_worker tests or after its resident memory grew by more
+    than max_memory_growth megabytes; a test crashing its worker is reported as failed.
+
+    fixture_threads is passed on to the TestInjector to provide and reclaim the fixtures of each test concurrently.
     """
 
-    def __init__(self):
-        self._injector = TestInjector()
+    def __init__(self, workers=None, async_concurrency=1, timeout=None, profiler=None, keep_results=True,
+                 result_sink=None, max_failures=None, isolated=False, max_tests_per_worker=1, max_memory_growth=None,
+                 fixture_threads=None):
+        if profiler is not None and (isolated or workers is not None and workers > 1):
+            raise ValueError("Profiling is not supported when executing tests in worker processes")
+        if isolated and not is_isolation_supported():
+            raise ValueError("Isolated execution is not supported by this version of Python")
+
+        self._fixture_cache = FixtureCache()
+        self._injector = TestInjector(async_concurrency, self._fixture_cache, timeout, profiler, fixture_threads)
+        self._async_concurrency = async_concurrency
         self._listeners = []
+        self._workers = workers
+        self._keep_results = keep_results
+        self._result_sink = result_sink
+        self._max_failures = max_failures
+        self._isolated = isolated
+        self._max_tests_per_worker = max_tests_per_worker
+        self._max_memory_growth = max_memory_growth
 
     def add_test_run_listener(self, test_run_listener):
         "Registers the given TestRunListener."
@@ -231,16 +862,44 @@ class TestRunner(object):
 
     def run_tests(self, test_definitions):
         "Executes all given TestDefinitions and returns a TestSuiteResult."
-        test_suite_result = TestSuiteResult()
+        test_suite_result = TestSuiteResult(self._keep_results, self._result_sink)
         self._notify_listeners(lambda l: l.before_suite(test_definitions))
 
-        start = time.time()
+        start = perf_counter_ns()
+        number_of_tests_reported = 0
 
-        for test_definition in test_definitions:
-            test_suite_result.add_test_results(self.run_test(test_definition))
+        try:
+            if self._isolated or self._workers is not None and self._workers > 1:
+                for test_definition, test_results in self._execute_in_worker_processes(test_definitions,
+                                                                                      test_suite_result):
+                    self._notify_test_executed(test_definition, test_results)
+                    test_suite_result.add_test_results(test_results)
+                    number_of_tests_reported += 1
+            else:
+                for group in self._group_test_definitions(test_definitions):
+                    if self._has_too_many_failures(test_suite_result):
+                        break
+                    if len(group) == 1:
+                        test_suite_result.add_test_results(self.run_test(group[0]))
+                        number_of_tests_reported += 1
+                        continue
+
+                    for test_definition, test_results in zip(group, self._injector.execute_tests_concurrently(group)):
+                        self._notify_test_executed(test_definition, test_results)
+                        test_suite_result.add_test_results(test_results)
+                        number_of_tests_reported += 1
+        finally:
+            try:
+                self._injector.release_fixtures()
+            finally:
+                self._injector.close()
 
-        end = time.time()
-        test_suite_result.execution_time = int((end - start) * 1000)
+        end = perf_counter_ns()
+        test_suite_result.execution_time_ns = end - start
+        test_suite_result.execution_time = test_suite_result.execution_time_ns // _NANO_SECONDS_PER_MILLI_SECOND
+        if number_of_tests_reported < len(test_definitions):
+            test_suite_result.aborted = True
+            test_suite_result.number_of_tests_not_executed = len(test_definitions) - number_of_tests_reported
 
         self._notify_listeners(lambda l: l.after_suite(test_suite_result))
 
@@ -256,6 +915,34 @@ class TestRunner(object):
         return test_results
 
 
+    def _group_test_definitions(self, test_definitions):
+        """
+        Splits the given TestDefinitions into groups that are executed together. Consecutive asynchronous tests form
+        a single group when they may run concurrently; every other test forms a group of its own.
+        """
+        groups = []
+        for test_definition in test_definitions:
+            if self._async_concurrency > 1 and self._injector.is_asynchronous(test_definition) and groups and \
+                    self._injector.is_asynchronous(groups[-1][-1]):
+                groups[-1].append(test_definition)
+            else:
+                groups.append([test_definition])
+        return groups
+
+    def _execute_in_worker_processes(self, test_definitions, test_suite_result):
+        should_stop = lambda: self._has_too_many_failures(test_suite_result)
+        if self._isolated:
+            return execute_in_isolated_workers(test_definitions, self._injector, self._workers or 1,
+                                               self._max_tests_per_worker, self._max_memory_growth, should_stop)
+        return execute_in_process_pool(test_definitions, self._injector, self._workers, should_stop)
+
+    def _has_too_many_failures(self, test_suite_result):
+        return self._max_failures is not None and test_suite_result.number_of_failures >= self._max_failures
+
+    def _notify_test_executed(self, test_definition, test_results):
+        self._notify_listeners(lambda l: l.before_test(test_definition))
+        self._notify_listeners(lambda l: l.after_test(test_results))
+
     def _notify_listeners(self, callback):
         for listener in self._listeners:
             callback(listener)
@@ -19,8 +19,51 @@ Provides some utility functions and classes.
 
 __author__ = "Alexander Metzner"
 
+import json
+import os
+import re
+import sys
+import time
 import types
 
+# resource is not available on all supported platforms
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# os.replace is not available on all supported Python versions
+_replace = getattr(os, "replace", os.rename)
+
+# time.perf_counter_ns is not available on all supported Python versions
+try:
+    perf_counter_ns = time.perf_counter_ns
+except AttributeError:
+    def perf_counter_ns():
+        "Returns the value of a monotonic clock (where supported) in nano seconds."
+        return int(getattr(time, "perf_counter", time.time)() * 1000000000)
+
+
+_MEMORY_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def get_resident_memory_size():
+    """
+    Returns the resident set size of the current process in bytes. Falls back to the peak resident set size where the
+    current one is not available and returns None if neither is.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in bytes on Mac OS X and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
 def humanize_underscore_name(function_name):
     if "_" in function_name:
         return function_name.replace("_", " ").capitalize()
@@ -43,3 +86,41 @@ def _de_camel_case(name):
     if result[0] == " ":
         result = result[1:]
     return result.capitalize()
+
+
+def get_stable_repr(value):
+    """
+    Returns a representation of the given value that does not change between interpreter runs: the items of sets are
+    sorted as their order depends on the hash seed and values whose representation contains a memory address are
+    represented by their type only.
+    """
+    if isinstance(value, (set, frozenset)):
+        return "{0}({{{1}}})".format(type(value).__name__, ", ".join(sorted(get_stable_repr(v) for v in value)))
+    if isinstance(value, (list, tuple)):
+        return "{0}({1})".format(type(value).__name__, ", ".join(get_stable_repr(v) for v in value))
+    if isinstance(value, dict):
+        return "dict({{{0}}})".format(", ".join(sorted("{0}: {1}".format(get_stable_repr(k), get_stable_repr(v))
+                                                      for k, v in value.items())))
+    text = repr(value)
+    if _MEMORY_ADDRESS.search(text):
+        return "<{0}.{1}>".format(type(value).__module__, type(value).__name__)
+    return text
+
+
+def read_json_file(filename, default=None):
+    "Reads the JSON document stored in the given file. Returns the default if the file is missing or unreadable."
+    if not os.path.exists(filename):
+        return default
+    try:
+        with open(filename) as json_file:
+            return json.load(json_file)
+    except ValueError:
+        return default
+
+
+def write_json_file(filename, document):
+    "Writes the given document to the given file. The file is replaced atomically where supported."
+    temporary_filename = filename + ".tmp"
+    with open(temporary_filename, "w") as json_file:
+        json.dump(document, json_file, indent=1, sort_keys=True)
+    _replace(temporary_filename, filename)
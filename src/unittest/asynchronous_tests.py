@@ -0,0 +1,319 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import asyncio
+import time
+import unittest
+from pyassert import assert_that
+
+from pyfix.asynchronous import is_coroutine_function
+from pyfix.decorators import benchmark
+from pyfix.fixture import Fixture, enumerate
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestInjector, TestRunner
+
+
+class IsCoroutineFunctionTest(unittest.TestCase):
+    def test_should_return_true_when_coroutine_function_is_given(self):
+        async def some_test(): pass
+
+        assert_that(is_coroutine_function(some_test)).is_true()
+
+    def test_should_return_false_when_plain_function_is_given(self):
+        def some_test(): pass
+
+        assert_that(is_coroutine_function(some_test)).is_false()
+
+
+class AsyncBenchmarkTest(unittest.TestCase):
+    def test_should_raise_exception_when_coroutine_test_is_benchmarked(self):
+        async def some_test(): pass
+
+        self.assertRaises(ValueError, benchmark(), some_test)
+
+
+class AsyncTestInjectorTest(unittest.TestCase):
+    def setUp(self):
+        self.injector = TestInjector()
+
+    def tearDown(self):
+        self.injector.close()
+
+    def test_should_execute_coroutine_test_function(self):
+        async def test_function():
+            await asyncio.sleep(0)
+            test_function.executed = True
+
+        test_function.executed = False
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module", {}))
+
+        assert_that(test_function.executed).is_true()
+        assert_that(results[0].success).is_true()
+
+    def test_should_mark_coroutine_test_as_failed_when_assertion_fails(self):
+        async def test_function():
+            raise AssertionError("Caboom")
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module", {}))
+
+        assert_that(results[0].success).is_false()
+        assert_that(results[0].message).equals("Caboom")
+
+    def test_should_execute_all_parameter_sets_of_coroutine_test(self):
+        async def test_function(spam):
+            test_function.values.append(spam)
+
+        test_function.values = []
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"spam": enumerate("spam", "eggs")}))
+
+        assert_that(test_function.values).equals(["spam", "eggs"])
+        assert_that([r.parameter_description for r in results]).equals(["spam=spam", "spam=eggs"])
+
+    def test_should_execute_asynchronous_interceptors(self):
+        events = []
+
+        async def before():
+            events.append("before")
+
+        async def after():
+            events.append("after")
+
+        def test_function():
+            events.append("test")
+
+        self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module", {}, [before],
+                                                  [after]))
+
+        assert_that(events).equals(["before", "test", "after"])
+
+    def test_should_execute_asynchronous_interceptors_of_variants_executed_in_parallel(self):
+        async def before():
+            await asyncio.sleep(0.01)
+
+        def test_function(spam):
+            pass
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"spam": enumerate(*range(8))}, [before], threads=4))
+
+        assert_that(len(results)).equals(8)
+        assert_that(all(result.success for result in results)).is_true()
+
+    def test_should_provide_and_reclaim_values_of_asynchronous_fixture(self):
+        events = []
+
+        class AsyncFixture(Fixture):
+            async def provide(self):
+                return ["spam"]
+
+            async def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        def test_function(spam):
+            events.append("test " + spam)
+
+        self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"spam": AsyncFixture}))
+
+        assert_that(events).equals(["test spam", "reclaim spam"])
+
+    def test_should_reclaim_value_of_lazy_fixture_after_execution_of_coroutine_test(self):
+        events = []
+
+        class LazyFixture(Fixture):
+            def provide(self):
+                for value in ["spam", "eggs"]:
+                    yield value
+
+            async def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        async def test_function(spam):
+            events.append("test " + spam)
+
+        self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"spam": LazyFixture}))
+
+        assert_that(events).equals(["test spam", "reclaim spam", "test eggs", "reclaim eggs"])
+
+    def test_should_report_error_of_lazy_fixture_of_coroutine_test_as_failed_result(self):
+        events = []
+
+        class FailingLazyFixture(Fixture):
+            def provide(self):
+                yield "spam"
+                raise RuntimeError("Caboom")
+
+        class EagerFixture(Fixture):
+            def provide(self):
+                return ["foo"]
+
+            async def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        async def test_function(spam, eggs):
+            events.append("test " + spam)
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"spam": FailingLazyFixture, "eggs": EagerFixture}))
+
+        assert_that(len(results)).equals(2)
+        assert_that(results[1].message).equals("Providing fixture 'FailingLazyFixture' failed: RuntimeError: Caboom")
+        assert_that(events).equals(["test spam", "reclaim foo"])
+
+    def test_should_provide_independent_asynchronous_fixtures_concurrently_for_coroutine_test(self):
+        started = []
+
+        async def wait_until_started(name):
+            for _ in range(1000):
+                if name in started:
+                    return True
+                await asyncio.sleep(0.001)
+            return False
+
+        class LeftFixture(Fixture):
+            async def provide(self):
+                started.append("left")
+                return [await wait_until_started("right")]
+
+        class RightFixture(Fixture):
+            async def provide(self):
+                started.append("right")
+                return [await wait_until_started("left")]
+
+        class JoiningFixture(Fixture):
+            dependencies = {"left": LeftFixture, "right": RightFixture}
+
+            async def provide(self, left, right):
+                return [left and right]
+
+        async def test_function(joined):
+            assert joined
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"joined": JoiningFixture}))
+
+        assert_that(results[0].success).is_true()
+
+    def test_should_provide_asynchronous_dependency_of_fixture_given_to_plain_test(self):
+        class AsyncFixture(Fixture):
+            async def provide(self):
+                return ["spam"]
+
+        class DependentFixture(Fixture):
+            dependencies = {"spam": AsyncFixture}
+
+            def provide(self, spam):
+                return [spam + " and eggs"]
+
+        def test_function(value):
+            assert value == "spam and eggs"
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"value": DependentFixture}))
+
+        assert_that(results[0].success).is_true()
+
+    def test_should_report_failing_asynchronous_fixture_of_coroutine_test_as_failed_result(self):
+        class FailingFixture(Fixture):
+            async def provide(self):
+                raise RuntimeError("Caboom")
+
+        async def test_function(spam):
+            pass
+
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module",
+                {"spam": FailingFixture}))
+
+        assert_that(results[0].success).is_false()
+        assert_that(results[0].message).equals("Providing fixture 'FailingFixture' failed: RuntimeError: Caboom")
+
+    def test_should_execute_all_tests_on_the_same_event_loop(self):
+        loops = []
+
+        async def test_function():
+            loops.append(asyncio.get_running_loop())
+
+        test_definition = TestDefinition(test_function, "unittest", "unittest", "module", {})
+
+        self.injector.execute_test(test_definition)
+        self.injector.execute_test(test_definition)
+
+        assert_that(loops[0]).is_identical_to(loops[1])
+
+    def test_should_cancel_coroutine_test_exceeding_timeout(self):
+        async def hanging_test_function():
+            await asyncio.sleep(5)
+
+        results = self.injector.execute_test(TestDefinition(hanging_test_function, "unittest", "unittest", "module",
+                {}, timeout=0.05))
+
+        assert_that(results[0].success).is_false()
+        assert_that(results[0].message).equals("Execution timed out after 0.05 seconds")
+        assert_that(results[0].traceback_as_string).contains("hanging_test_function")
+
+
+    def test_should_use_new_event_loop_when_thread_waiting_for_blocked_loop_is_abandoned(self):
+        async def blocking_before():
+            time.sleep(1)
+
+        async def before():
+            await asyncio.sleep(0)
+
+        def test_function():
+            pass
+
+        self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module", {},
+                [blocking_before], timeout=0.1))
+        results = self.injector.execute_test(TestDefinition(test_function, "unittest", "unittest", "module", {},
+                [before], timeout=0.5))
+        self.injector.close()
+
+        assert_that(results[0].success).is_true()
+
+
+class AsyncTestRunnerTest(unittest.TestCase):
+    def _create_test_definition(self, started, expected_number_of_concurrent_tests):
+        async def test_function():
+            started.append(True)
+            while len(started) < expected_number_of_concurrent_tests:
+                await asyncio.sleep(0.001)
+
+        async def test_function_with_timeout():
+            await asyncio.wait_for(test_function(), 1)
+
+        return TestDefinition(test_function_with_timeout, "unittest", "unittest", "module", {})
+
+    def test_should_execute_consecutive_asynchronous_tests_concurrently(self):
+        started = []
+        suite = [self._create_test_definition(started, 3) for _ in range(3)]
+
+        test_suite_result = TestRunner(async_concurrency=3).run_tests(suite)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(3)
+        assert_that(test_suite_result.success).is_true()
+
+    def test_should_limit_number_of_concurrent_asynchronous_tests(self):
+        started = []
+        suite = [self._create_test_definition(started, 3) for _ in range(3)]
+
+        test_suite_result = TestRunner(async_concurrency=2).run_tests(suite)
+
+        assert_that(test_suite_result.number_of_failures).equals(2)
@@ -0,0 +1,158 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import tempfile
+import unittest
+from pyassert import assert_that
+
+from pyfix.baseline import Baseline, BaselineTestRunListener, get_result_key, is_significantly_slower
+from pyfix.benchmark import BenchmarkStatistics
+from pyfix.fixture import enumerate
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestInjector, TestResult, TestSuiteResult
+
+
+def some_test():
+    pass
+
+
+def parameterized_test(url):
+    pass
+
+
+def create_test_result(execution_time_ns, success=True, timings=None, parameter_description=""):
+    benchmark_statistics = BenchmarkStatistics(timings, 1) if timings is not None else None
+    return TestResult(TestDefinition(some_test, "unittest", "unittest", "module", {}), success, 0,
+                      parameter_description, None, None, execution_time_ns, None, benchmark_statistics)
+
+
+class GetResultKeyTest(unittest.TestCase):
+    def test_should_return_test_key_when_result_has_no_parameters(self):
+        assert_that(get_result_key(create_test_result(1))).equals("module:some_test")
+
+    def test_should_append_parameter_description(self):
+        assert_that(get_result_key(create_test_result(1, parameter_description="size=10"))).equals(
+            "module:some_test [size=10]")
+
+    def test_should_tell_parameters_with_same_truncated_description_apart(self):
+        results = TestInjector().execute_test(TestDefinition(parameterized_test, "unittest", "unittest", "module",
+                {"url": enumerate("/spam/eggs", "/spam/ham")}))
+
+        assert_that(results[0].parameter_description).equals(results[1].parameter_description)
+        assert_that(get_result_key(results[0])).equals("module:parameterized_test [url='/spam/eggs']")
+        assert_that(get_result_key(results[1])).equals("module:parameterized_test [url='/spam/ham']")
+
+
+class IsSignificantlySlowerTest(unittest.TestCase):
+    def test_should_detect_consistent_slowdown_above_threshold(self):
+        assert_that(is_significantly_slower([100, 101, 99, 100], [130, 131, 129, 130], 0.1)).is_true()
+
+    def test_should_not_detect_slowdown_below_threshold(self):
+        assert_that(is_significantly_slower([100, 101, 99, 100], [105, 106, 104, 105], 0.1)).is_false()
+
+    def test_should_not_detect_slowdown_hidden_in_noise(self):
+        assert_that(is_significantly_slower([50, 150, 60, 140], [70, 190, 80, 180], 0.1)).is_false()
+
+    def test_should_test_single_sample_against_prediction_interval_of_baseline(self):
+        assert_that(is_significantly_slower([100, 101, 99, 100], [130], 0.1)).is_true()
+        assert_that(is_significantly_slower([100, 101, 99, 100], [112], 0.1)).is_false()
+
+    def test_should_require_two_baseline_samples(self):
+        assert_that(is_significantly_slower([100], [1000, 1000], 0.1)).is_false()
+
+    def test_should_detect_slowdown_when_samples_do_not_vary(self):
+        assert_that(is_significantly_slower([100, 100], [120, 120], 0.1)).is_true()
+
+
+class BaselineTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.baseline = Baseline(os.path.join(self.directory, "baseline.json"), history=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_load_saved_samples(self):
+        self.baseline.record(create_test_result(100))
+        self.baseline.record(create_test_result(101))
+        self.baseline.save()
+
+        baseline = Baseline(self.baseline.filename)
+        baseline.load()
+
+        assert_that(baseline.compare(create_test_result(200))).is_not_none()
+
+    def test_should_keep_configured_number_of_samples(self):
+        for execution_time_ns in [1000, 1000, 100, 101, 99]:
+            self.baseline.record(create_test_result(execution_time_ns))
+
+        assert_that(self.baseline.compare(create_test_result(200))).is_not_none()
+
+    def test_should_keep_all_samples_of_benchmark(self):
+        self.baseline.record(create_test_result(0, timings=[100, 101, 99, 100, 100]))
+
+        regression = self.baseline.compare(create_test_result(0, timings=[130, 131, 129]))
+
+        assert_that(regression.baseline_mean).equals(100)
+        assert_that(round(regression.slowdown, 2)).equals(0.3)
+
+    def test_should_not_record_failed_results(self):
+        self.baseline.record(create_test_result(100, success=False))
+        self.baseline.record(create_test_result(100, success=False))
+
+        assert_that(self.baseline.compare(create_test_result(1000))).is_none()
+
+
+class BaselineTestRunListenerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.baseline = Baseline(os.path.join(self.directory, "baseline.json"))
+        self.baseline.record(create_test_result(0, timings=[100, 101, 99, 100]))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_collect_regressions_in_test_suite_result(self):
+        listener = BaselineTestRunListener(self.baseline)
+        test_result = create_test_result(0, timings=[130, 131, 129])
+        test_suite_result = TestSuiteResult()
+
+        listener.after_test([test_result])
+        listener.after_suite(test_suite_result)
+
+        assert_that(len(test_suite_result.regressions)).equals(1)
+        assert_that(test_result.success).is_true()
+        assert_that(os.path.exists(self.baseline.filename)).is_false()
+
+    def test_should_mark_regressed_result_as_failed(self):
+        listener = BaselineTestRunListener(self.baseline, fail=True)
+        test_result = create_test_result(0, timings=[130, 131, 129])
+
+        listener.after_test([test_result])
+
+        assert_that(test_result.success).is_false()
+        assert_that(test_result.message).starts_with("Performance regression: module:some_test got 30.0% slower")
+
+    def test_should_save_baseline_when_updating(self):
+        listener = BaselineTestRunListener(self.baseline, update=True)
+
+        listener.after_test([create_test_result(0, timings=[100, 100])])
+        listener.after_suite(TestSuiteResult())
+
+        assert_that(os.path.exists(self.baseline.filename)).is_true()
@@ -0,0 +1,80 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import unittest
+from pyassert import assert_that
+
+from pyfix.benchmark import Benchmark, BenchmarkStatistics, format_time
+
+
+class FormatTimeTest(unittest.TestCase):
+    def test_should_format_nano_seconds(self):
+        assert_that(format_time(12)).equals("12.000 ns")
+
+    def test_should_format_micro_seconds(self):
+        assert_that(format_time(1500)).equals("1.500 us")
+
+    def test_should_format_seconds(self):
+        assert_that(format_time(2500000000)).equals("2.500 s")
+
+    def test_should_format_zero_as_nano_seconds(self):
+        assert_that(format_time(0)).equals("0.000 ns")
+
+
+class BenchmarkStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        self.statistics = BenchmarkStatistics([float(value) for value in range(20, 0, -1)], 5)
+
+    def test_should_compute_minimum_and_maximum(self):
+        assert_that(self.statistics.minimum).equals(1.0)
+        assert_that(self.statistics.maximum).equals(20.0)
+
+    def test_should_compute_median_of_even_number_of_timings(self):
+        assert_that(self.statistics.median).equals(10.5)
+
+    def test_should_compute_95th_percentile_using_nearest_rank(self):
+        assert_that(self.statistics.p95).equals(19.0)
+
+    def test_should_compute_sample_standard_deviation(self):
+        assert_that(round(self.statistics.stddev, 4)).equals(5.9161)
+
+    def test_should_compute_zero_standard_deviation_for_single_round(self):
+        assert_that(BenchmarkStatistics([3.0], 1).stddev).equals(0.0)
+
+
+class BenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        self.invocations = []
+
+    def function(self):
+        self.invocations.append(True)
+
+    def test_should_raise_exception_when_number_of_rounds_is_less_than_one(self):
+        self.assertRaises(ValueError, Benchmark, rounds=0)
+
+    def test_should_invoke_function_once_per_round_when_minimum_round_time_is_zero(self):
+        statistics = Benchmark(warmup=2, rounds=3, min_round_time=0).run(self.function)
+
+        assert_that(statistics.iterations).equals(1)
+        assert_that(statistics.rounds).equals(3)
+        assert_that(len(self.invocations)).equals(2 + 1 + 3)
+
+    def test_should_calibrate_iterations_so_that_round_takes_minimum_round_time(self):
+        iterations = Benchmark(min_round_time=0.001).calibrate(self.function)
+
+        assert_that(iterations).is_greater_than(1)
+        assert_that(str(iterations)[0] in "125").is_true()
@@ -0,0 +1,142 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pyassert import assert_that
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from pyfix.cli import CompactTestRunListener, TtyTestRunListener, red
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestResult, TestSuiteResult
+
+
+def some_test():
+    pass
+
+
+class TtyStream(StringIO):
+    def isatty(self):
+        return True
+
+
+def create_test_result(success, parameter_description=""):
+    test_definition = TestDefinition(some_test, "Some test", "", "module", {})
+    return TestResult(test_definition, success, 0, parameter_description, None if success else "Caboom", None)
+
+
+def run_listener(listener, test_results):
+    listener.before_suite([test_results[0].test_definition])
+    listener.before_test(test_results[0].test_definition)
+    listener.after_test(test_results)
+    test_suite_result = TestSuiteResult()
+    test_suite_result.add_test_results(test_results)
+    test_suite_result.execution_time = 0
+    listener.after_suite(test_suite_result)
+
+
+class ColorTest(unittest.TestCase):
+    def test_should_not_color_message_when_colors_are_disabled(self):
+        assert_that(red("spam", False)).equals("spam")
+
+    def test_should_color_message_when_colors_are_enabled(self):
+        assert_that(red("spam", True)).equals("\033[31mspam\033[0;0m")
+
+
+class TtyTestRunListenerTest(unittest.TestCase):
+    def test_should_report_each_execution(self):
+        stream = StringIO()
+
+        run_listener(TtyTestRunListener(stream), [create_test_result(True, "spam=eggs"), create_test_result(False)])
+
+        assert_that(stream.getvalue()).contains(
+            "Some test: \n\tspam=eggs: passed [0.000 ms]\n\tfailed [0.000 ms] Caboom")
+
+    def test_should_report_tests_not_executed_when_suite_has_been_aborted(self):
+        stream = StringIO()
+        test_suite_result = TestSuiteResult()
+        test_suite_result.add_test_results([create_test_result(False)])
+        test_suite_result.execution_time = 0
+        test_suite_result.aborted = True
+        test_suite_result.number_of_tests_not_executed = 3
+
+        TtyTestRunListener(stream).after_suite(test_suite_result)
+
+        assert_that(stream.getvalue()).contains("stopped after 1 failures, 3 tests not executed")
+
+
+class CompactTestRunListenerTest(unittest.TestCase):
+    def test_should_write_dot_per_execution_and_details_of_failures_only(self):
+        stream = StringIO()
+
+        run_listener(CompactTestRunListener(stream), [create_test_result(True, "spam=eggs"),
+                                                      create_test_result(False, "spam=foo")])
+
+        assert_that(stream.getvalue()).contains("\n.F\n")
+        assert_that(stream.getvalue()).contains("Some test:\n\tspam=foo: failed [0.000 ms] Caboom")
+        assert_that(stream.getvalue()).does_not_contain("spam=eggs")
+
+    def test_should_wrap_dots_after_80_executions(self):
+        stream = StringIO()
+
+        run_listener(CompactTestRunListener(stream), [create_test_result(True)] * 81)
+
+        assert_that(stream.getvalue()).contains("\n" + "." * 80 + "\n.\n")
+
+    def test_should_rewrite_status_line_on_tty(self):
+        stream = TtyStream()
+
+        run_listener(CompactTestRunListener(stream, update_interval=0), [create_test_result(True)] * 3)
+
+        assert_that(stream.getvalue()).contains("\r3 executions of 1 tests, 0 failed\n")
+        assert_that(stream.getvalue()).does_not_contain("...")
+
+
+class RunTestsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.environment = dict(os.environ)
+        self.environment["PYTHONPATH"] = os.pathsep.join(os.path.abspath(path) for path in sys.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_execute_tests_of_main_script(self):
+        script = os.path.join(self.directory, "script.py")
+        with open(script, "w") as f:
+            f.write("from pyfix import test, run_tests\n\n"
+                    "@test\ndef spam():\n    pass\n\n"
+                    "@test\ndef eggs():\n    pass\n\n"
+                    "run_tests(cache_file=None, baseline_file=None)\n")
+
+        output = subprocess.check_output([sys.executable, script], cwd=self.directory, env=self.environment)
+
+        assert_that(output.decode("utf-8")).contains("2 tests executed")
+
+    def test_should_not_run_command_when_main_module_of_package_is_imported(self):
+        output = subprocess.check_output([sys.executable, "-c", "import pyfix.__main__"], cwd=self.directory,
+                                         env=self.environment)
+
+        assert_that(output.decode("utf-8")).equals("")
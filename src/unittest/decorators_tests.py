@@ -18,8 +18,9 @@ __author__ = "Alexander Metzner"
 import unittest
 from pyassert import assert_that
 
-from pyfix.decorators import (test, given, before, after, TEST_ATTRIBUTE, GIVEN_ATTRIBUTE, BEFORE_ATTRIBUTE,
-                              AFTER_ATTRIBUTE)
+from pyfix.decorators import (test, given, before, after, parallel, timeout, benchmark, get_registered_tests,
+                              TEST_ATTRIBUTE, GIVEN_ATTRIBUTE, BEFORE_ATTRIBUTE, AFTER_ATTRIBUTE, PARALLEL_ATTRIBUTE,
+                              TIMEOUT_ATTRIBUTE, BENCHMARK_ATTRIBUTE)
 
 class TestDecoratorTest(unittest.TestCase):
     def test_should_mark_function_as_test(self):
@@ -29,6 +30,13 @@ class TestDecoratorTest(unittest.TestCase):
 
         assert_that(hasattr(some_test, TEST_ATTRIBUTE)).is_true()
 
+    def test_should_register_function_with_its_module(self):
+        @test
+        def some_test():
+            pass
+
+        assert_that(get_registered_tests(__name__)[-1]).is_identical_to(some_test)
+
     def test_ensure_that_decorated_function_can_be_called(self):
         @test
         def some_test():
@@ -149,3 +157,39 @@ class AfterTest(unittest.TestCase):
             def spam(): pass
 
         self.assertRaises(ValueError, callback)
+
+
+class ParallelTest(unittest.TestCase):
+    def test_should_register_number_of_threads(self):
+        @parallel(threads=8)
+        def some_test(): pass
+
+        assert_that(getattr(some_test, PARALLEL_ATTRIBUTE)).is_equal_to(8)
+
+    def test_should_raise_exception_when_number_of_threads_is_less_than_one(self):
+        self.assertRaises(ValueError, parallel, 0)
+
+
+class TimeoutTest(unittest.TestCase):
+    def test_should_register_timeout(self):
+        @timeout(2.5)
+        def some_test(): pass
+
+        assert_that(getattr(some_test, TIMEOUT_ATTRIBUTE)).is_equal_to(2.5)
+
+    def test_should_raise_exception_when_timeout_is_not_positive(self):
+        self.assertRaises(ValueError, timeout, 0)
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_should_register_benchmark_options(self):
+        @benchmark(warmup=3, rounds=5, min_round_time=0.5)
+        def some_test(): pass
+
+        options = getattr(some_test, BENCHMARK_ATTRIBUTE)
+        assert_that(options.warmup).equals(3)
+        assert_that(options.rounds).equals(5)
+        assert_that(options.min_round_time).equals(0.5)
+
+    def test_should_raise_exception_when_number_of_rounds_is_less_than_one(self):
+        self.assertRaises(ValueError, benchmark, rounds=0)
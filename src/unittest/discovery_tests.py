@@ -0,0 +1,132 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pyassert import assert_that
+
+from pyfix.discovery import TestDiscovery, find_test_modules
+
+_TEST_MODULE_CONTENT = """
+from pyfix import test
+
+@test
+def some_test():
+    pass
+
+@test
+def some_other_test():
+    pass
+"""
+
+_NO_TEST_MODULE_CONTENT = """
+import os
+os.environ["PYFIX_DISCOVERY_IMPORT_COUNT"] = str(int(os.environ.get("PYFIX_DISCOVERY_IMPORT_COUNT", "0")) + 1)
+"""
+
+
+class DiscoveryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = "discovery_{0}".format(os.path.basename(self.directory))
+        self.module_names = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        for module_name in self.module_names:
+            sys.modules.pop(module_name, None)
+        if self.directory in sys.path:
+            sys.path.remove(self.directory)
+
+    def create_module(self, content, *path_elements):
+        filename = os.path.join(self.directory, *path_elements)
+        if not os.path.exists(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, "w") as module_file:
+            module_file.write(content)
+        self.module_names.append(os.path.splitext(os.path.join(*path_elements))[0].replace(os.sep, "."))
+        return filename
+
+
+class FindTestModulesTest(DiscoveryTestCase):
+    def test_should_find_matching_modules_in_directory(self):
+        filename = self.create_module("", self.prefix + "_tests.py")
+        self.create_module("", self.prefix + "_helper.py")
+
+        actual = find_test_modules([self.directory])
+
+        assert_that(actual).equals([(self.directory, filename, self.prefix + "_tests")])
+
+    def test_should_name_modules_in_packages_by_their_qualified_name(self):
+        self.create_module("", self.prefix, "__init__.py")
+        filename = self.create_module("", self.prefix, "spam_tests.py")
+
+        actual = find_test_modules([os.path.join(self.directory, self.prefix)])
+
+        assert_that(actual).equals([(self.directory, filename, self.prefix + ".spam_tests")])
+
+    def test_should_find_given_module_file(self):
+        filename = self.create_module("", self.prefix + "_spam.py")
+
+        actual = find_test_modules([filename])
+
+        assert_that(actual).equals([(self.directory, filename, self.prefix + "_spam")])
+
+
+class TestDiscoveryTest(DiscoveryTestCase):
+    def setUp(self):
+        super(TestDiscoveryTest, self).setUp()
+        self.index_file = os.path.join(self.directory, "index.json")
+        os.environ.pop("PYFIX_DISCOVERY_IMPORT_COUNT", None)
+
+    def test_should_collect_tests_of_discovered_modules(self):
+        self.create_module(_TEST_MODULE_CONTENT, self.prefix + "_tests.py")
+
+        collector = TestDiscovery(index_file=self.index_file).collect_tests([self.directory])
+
+        assert_that(sorted(d.function.__name__ for d in collector.test_suite)).equals(["some_other_test",
+                                                                                        "some_test"])
+
+    def test_should_record_test_names_in_index(self):
+        self.create_module(_TEST_MODULE_CONTENT, self.prefix + "_tests.py")
+
+        entries = TestDiscovery(index_file=self.index_file).discover([self.directory])
+
+        assert_that(len(entries)).equals(1)
+        assert_that(entries[0]["module"]).equals(self.prefix + "_tests")
+        assert_that(sorted(entries[0]["tests"])).equals(["some_other_test", "some_test"])
+
+    def test_should_find_test_names_in_worker_processes(self):
+        self.create_module(_TEST_MODULE_CONTENT, self.prefix + "_tests.py")
+        self.create_module(_NO_TEST_MODULE_CONTENT, self.prefix + "_other_tests.py")
+
+        entries = TestDiscovery(index_file=self.index_file, workers=2).discover([self.directory])
+
+        assert_that([sorted(entry["tests"]) for entry in entries]).equals([[], ["some_other_test", "some_test"]])
+        assert_that(os.environ.get("PYFIX_DISCOVERY_IMPORT_COUNT")).is_none()
+
+    def test_should_not_import_unchanged_module_without_tests_again(self):
+        self.create_module(_NO_TEST_MODULE_CONTENT, self.prefix + "_tests.py")
+
+        TestDiscovery(index_file=self.index_file).collect_tests([self.directory])
+        sys.modules.pop(self.prefix + "_tests")
+        TestDiscovery(index_file=self.index_file).collect_tests([self.directory])
+
+        assert_that(os.environ["PYFIX_DISCOVERY_IMPORT_COUNT"]).equals("1")
@@ -0,0 +1,144 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import tempfile
+import unittest
+from pyassert import assert_that
+
+from pyfix.benchmark import BenchmarkStatistics
+from pyfix.distributed import Coordinator, Worker, decode_test_result, encode_test_result, parse_address
+from pyfix.fixture import enumerate
+from pyfix.parallel import get_multiprocessing_context
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import PHASE_TEST, TestResult
+
+
+def passing_test(spam):
+    pass
+
+
+def failing_test():
+    raise Exception("Caboom")
+
+
+def crashing_test():
+    os._exit(1)
+
+
+def create_test_suite(*functions):
+    return [TestDefinition(function, function.__name__, "", "module", {"spam": enumerate("spam", "eggs")}
+                           if function is passing_test else {}) for function in functions]
+
+
+def run_worker(test_suite, address):
+    Worker(test_suite, address).run()
+
+
+class ParseAddressTest(unittest.TestCase):
+    def test_should_parse_host_and_port(self):
+        assert_that(parse_address("localhost:8080")[1]).equals(("localhost", 8080))
+
+    def test_should_parse_unix_socket_path(self):
+        assert_that(parse_address("unix:/tmp/pyfix.sock")[1]).equals("/tmp/pyfix.sock")
+
+    def test_should_raise_exception_when_port_is_missing(self):
+        self.assertRaises(ValueError, parse_address, "localhost")
+
+
+class EncodeTestResultTest(unittest.TestCase):
+    def test_should_decode_encoded_test_result(self):
+        test_definition = create_test_suite(failing_test)[0]
+        test_result = TestResult(test_definition, False, 1, "spam=eggs", "Caboom", "Traceback", 1500000,
+                                 {PHASE_TEST: 1000000}, BenchmarkStatistics([1.0, 3.0], 5), "spam='eggs'")
+
+        actual = decode_test_result(test_definition, encode_test_result(test_result))
+
+        assert_that(actual.test_definition).is_identical_to(test_definition)
+        assert_that(actual.execution_time).equals(1)
+        assert_that(actual.execution_time_ns).equals(1500000)
+        assert_that(actual.parameter_key).equals("spam='eggs'")
+        assert_that(actual.phase_times).equals({PHASE_TEST: 1000000})
+        assert_that(actual.traceback_as_string).equals("Traceback")
+        assert_that(actual.benchmark_statistics.median).equals(2.0)
+
+
+class CoordinatorTest(unittest.TestCase):
+    def setUp(self):
+        self.processes = []
+
+    def tearDown(self):
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                # Forked workers inherit the listening socket, so a connection still queued when the coordinator
+                # closes it is never refused and the worker waits for a reply forever.
+                process.terminate()
+                process.join()
+
+    def start_workers(self, test_suite, address, number_of_workers=2):
+        for _ in range(number_of_workers):
+            process = get_multiprocessing_context().Process(target=run_worker, args=(test_suite, address))
+            process.start()
+            self.processes.append(process)
+
+    def run_coordinator(self, test_suite, address="127.0.0.1:0", max_failures=None):
+        coordinator = Coordinator(address, max_failures=max_failures)
+        coordinator.listen()
+        self.start_workers(test_suite, coordinator.address)
+        return coordinator.run_tests(test_suite)
+
+    def test_should_execute_tests_using_workers_and_report_in_order(self):
+        test_suite = create_test_suite(passing_test, failing_test, passing_test, failing_test)
+
+        test_suite_result = self.run_coordinator(test_suite)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(6)
+        assert_that(test_suite_result.number_of_failures).equals(2)
+        assert_that([r.test_definition for r in test_suite_result.test_results]).equals(
+            [test_suite[0], test_suite[0], test_suite[1], test_suite[2], test_suite[2], test_suite[3]])
+        assert_that(test_suite_result.test_results[2].traceback_as_string).contains("failing_test")
+
+    def test_should_stop_handing_out_tests_after_max_failures(self):
+        test_suite = create_test_suite(*([failing_test] + [passing_test] * 20))
+
+        test_suite_result = self.run_coordinator(test_suite, max_failures=1)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(1)
+        assert_that(test_suite_result.aborted).is_true()
+        assert_that(test_suite_result.number_of_tests_not_executed).equals(20)
+
+    def test_should_report_test_as_failed_when_worker_crashes(self):
+        test_suite = create_test_suite(crashing_test)
+
+        test_suite_result = self.run_coordinator(test_suite)
+
+        assert_that(test_suite_result.test_results[0].success).is_false()
+        assert_that(test_suite_result.test_results[0].message).equals("Worker disconnected during execution")
+
+    def test_should_accept_workers_using_unix_socket(self):
+        directory = tempfile.mkdtemp()
+        try:
+            test_suite = create_test_suite(passing_test)
+
+            test_suite_result = self.run_coordinator(test_suite, "unix:" + os.path.join(directory, "socket"))
+
+            assert_that(test_suite_result.number_of_tests_executed).equals(2)
+            assert_that(os.listdir(directory)).equals([])
+        finally:
+            shutil.rmtree(directory)
@@ -0,0 +1,54 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import unittest
+from pyassert import assert_that
+
+from pyfix.fixture import Fixture, SCOPE_MODULE, SCOPE_SUITE
+from pyfix.fixturecache import FixtureCache
+
+
+class FixtureCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = FixtureCache()
+        self.fixture = Fixture()
+
+    def test_should_return_none_when_key_is_not_cached(self):
+        assert_that(self.cache.get("spam")).is_none()
+
+    def test_should_return_cached_fixture_and_values(self):
+        self.cache.put(SCOPE_SUITE, "spam", self.fixture, ["spam"])
+
+        assert_that(self.cache.get("spam")).equals((self.fixture, ["spam"]))
+
+    def test_should_remove_entries_of_ended_scope_only(self):
+        self.cache.put(SCOPE_SUITE, "spam", self.fixture, ["spam"])
+        self.cache.put(SCOPE_MODULE, "eggs", self.fixture, ["eggs"])
+
+        actual = self.cache.end_scope(SCOPE_MODULE)
+
+        assert_that(actual).equals([(self.fixture, ["eggs"])])
+        assert_that(self.cache.get("eggs")).is_none()
+        assert_that(self.cache.get("spam")).equals((self.fixture, ["spam"]))
+
+    def test_should_return_entries_of_ended_scope_in_reverse_order_of_creation(self):
+        self.cache.put(SCOPE_SUITE, "spam", self.fixture, ["spam"])
+        self.cache.put(SCOPE_SUITE, "eggs", self.fixture, ["eggs"])
+
+        actual = self.cache.end_scope(SCOPE_SUITE)
+
+        assert_that(actual).equals([(self.fixture, ["eggs"]), (self.fixture, ["spam"])])
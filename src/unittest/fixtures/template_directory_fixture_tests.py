@@ -0,0 +1,126 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import stat
+
+import unittest
+from pyassert import assert_that
+
+from pyfix.fixtures.temporary_directory_fixture import TemporaryDirectoryHandle
+from pyfix.fixtures.template_directory_fixture import TemplateDirectoryFixture, SeededDirectoryFixture, \
+    materialize, METHOD_REFLINK, METHOD_HARDLINK, METHOD_COPY
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestInjector
+
+
+def read(*path_elements):
+    with open(os.path.join(*path_elements)) as f:
+        return f.read()
+
+
+class MaterializeTest(unittest.TestCase):
+    def setUp(self):
+        self.source = TemporaryDirectoryHandle()
+        self.source.create_directory("spam", "eggs")
+        self.source.create_file(["spam", "eggs", "ham"], "ham")
+        self.source.create_file("script", "#!/bin/sh")
+        os.chmod(self.source.join("script"), 0o755)
+        os.symlink("script", self.source.join("link"))
+        self.target = TemporaryDirectoryHandle()
+
+    def tearDown(self):
+        self.source.remove()
+        self.target.remove()
+
+    def assert_tree_materialized(self):
+        assert_that(read(self.target.join("spam", "eggs", "ham"))).equals("ham")
+        assert_that(read(self.target.join("script"))).equals("#!/bin/sh")
+        assert_that(stat.S_IMODE(os.stat(self.target.join("script")).st_mode)).equals(0o755)
+        assert_that(os.readlink(self.target.join("link"))).equals("script")
+
+    def test_should_copy_tree(self):
+        materialize(self.source.basedir, self.target.basedir, METHOD_COPY)
+
+        self.assert_tree_materialized()
+        assert_that(os.path.samefile(self.source.join("script"), self.target.join("script"))).is_false()
+
+    def test_should_clone_tree_or_fall_back_to_copy(self):
+        materialize(self.source.basedir, self.target.basedir, METHOD_REFLINK)
+
+        self.assert_tree_materialized()
+        self.target.create_file("script", "changed")
+        assert_that(read(self.source.join("script"))).equals("#!/bin/sh")
+
+    def test_should_link_tree(self):
+        materialize(self.source.basedir, self.target.basedir, METHOD_HARDLINK)
+
+        self.assert_tree_materialized()
+
+    def test_should_raise_exception_when_method_is_unknown(self):
+        self.assertRaises(ValueError, materialize, self.source.basedir, self.target.basedir, "spam")
+
+
+class ProjectTemplate(TemplateDirectoryFixture):
+    populated = 0
+    basedir = None
+
+    def populate(self, template):
+        ProjectTemplate.populated += 1
+        ProjectTemplate.basedir = template.basedir
+        template.create_directory("src")
+        template.create_file(["src", "setup.py"], "spam")
+
+
+class SeededDirectoryFixtureTest(unittest.TestCase):
+    def setUp(self):
+        ProjectTemplate.populated = 0
+        self.injector = TestInjector()
+        self.seen = []
+
+    def tearDown(self):
+        self.injector.release_fixtures()
+        self.injector.close()
+
+    def seeded_test(self, project):
+        self.seen.append(project.basedir)
+        assert_that(read(project.join("src", "setup.py"))).equals("spam")
+        project.create_file(["src", "setup.py"], "eggs")
+        project.touch("new")
+
+    def execute_test(self, fixture):
+        return self.injector.execute_test(TestDefinition(self.seeded_test, "unittest", "unittest", "module",
+                                                         {"project": fixture}))
+
+    def test_should_populate_template_once_and_provide_private_copy_to_each_test(self):
+        fixture = SeededDirectoryFixture(ProjectTemplate)
+
+        for _ in range(3):
+            results = self.execute_test(fixture)
+            assert_that(results[0].success).is_true()
+
+        assert_that(ProjectTemplate.populated).equals(1)
+
+    def test_should_wipe_copy_and_remove_template_when_reclaimed(self):
+        self.execute_test(SeededDirectoryFixture(ProjectTemplate, METHOD_COPY))
+        self.injector.release_fixtures()
+
+        assert_that(len(os.listdir(self.seen[0]))).equals(0)
+        assert_that(os.path.exists(ProjectTemplate.basedir)).is_false()
+
+    def test_should_raise_exception_when_method_is_unknown(self):
+        self.assertRaises(ValueError, SeededDirectoryFixture, ProjectTemplate, "spam")
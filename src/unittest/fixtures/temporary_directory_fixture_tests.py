@@ -21,7 +21,15 @@ import unittest
 from mockito import mock, verify, when, any as any_value
 from pyassert import assert_that
 
-from pyfix.fixtures.temporary_directory_fixture import TemporaryDirectoryHandle
+from pyfix.parallel import get_multiprocessing_context
+from pyfix.fixtures.temporary_directory_fixture import TemporaryDirectoryHandle, TemporaryDirectoryFixture, \
+    TemporaryDirectoryPool, PooledTemporaryDirectoryFixture, clear_directory, get_temporary_directory_pool
+
+def use_pool(pool):
+    handles = [pool.acquire(), pool.acquire()]
+    for handle in handles:
+        pool.release(handle)
+
 
 class TemporaryDirectoryHandleTest(unittest.TestCase):
     def setUp(self):
@@ -78,3 +86,141 @@ class TemporaryDirectoryHandleTest(unittest.TestCase):
         assert_that(os.path.exists(self.handle.join("spam", "eggs"))).is_true()
         assert_that(os.path.isdir(self.handle.join("spam", "eggs"))).is_true()
 
+    def test_should_remove_basedir(self):
+        self.handle.create_directory("spam", "eggs")
+
+        self.handle.remove()
+
+        assert_that(os.path.exists(self.handle.basedir)).is_false()
+
+    def test_should_not_remove_existing_basedir_upon_deletion(self):
+        handle = TemporaryDirectoryHandle(basedir=self.handle.basedir)
+
+        del handle
+
+        assert_that(os.path.isdir(self.handle.basedir)).is_true()
+
+
+class TemporaryDirectoryFixtureTest(unittest.TestCase):
+    def test_should_remove_directory_when_reclaiming(self):
+        fixture = TemporaryDirectoryFixture()
+        handle = fixture.provide()[0]
+        handle.touch("spam")
+
+        fixture.reclaim(handle)
+
+        assert_that(os.path.exists(handle.basedir)).is_false()
+
+
+class ClearDirectoryTest(unittest.TestCase):
+    def setUp(self):
+        self.handle = TemporaryDirectoryHandle()
+
+    def tearDown(self):
+        self.handle.remove()
+
+    def test_should_remove_files_and_directories_but_keep_directory(self):
+        self.handle.touch("spam")
+        self.handle.create_directory("eggs", "ham")
+        self.handle.touch("eggs", "ham", "spam")
+
+        clear_directory(self.handle.basedir)
+
+        assert_that(os.path.isdir(self.handle.basedir)).is_true()
+        assert_that(len(os.listdir(self.handle.basedir))).equals(0)
+
+    def test_should_remove_symbolic_link_but_not_its_target(self):
+        target = TemporaryDirectoryHandle()
+        target.touch("spam")
+        os.symlink(target.basedir, self.handle.join("link"))
+
+        clear_directory(self.handle.basedir)
+
+        assert_that(len(os.listdir(self.handle.basedir))).equals(0)
+        assert_that(os.path.exists(target.join("spam"))).is_true()
+        target.remove()
+
+
+class TemporaryDirectoryPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.root = TemporaryDirectoryHandle()
+        self.pool = TemporaryDirectoryPool("spam", "eggs", self.root.basedir)
+
+    def tearDown(self):
+        self.pool.close()
+        self.root.remove()
+
+    def test_should_create_empty_directory_inside_root(self):
+        handle = self.pool.acquire()
+
+        assert_that(os.path.dirname(handle.basedir)).equals(self.root.basedir)
+        assert_that(os.path.basename(handle.basedir)).starts_with("spam")
+        assert_that(len(os.listdir(handle.basedir))).equals(0)
+
+    def test_should_reuse_wiped_directory(self):
+        handle = self.pool.acquire()
+        handle.create_directory("spam")
+        handle.touch("spam", "eggs")
+        self.pool.release(handle)
+
+        reused_handle = self.pool.acquire()
+
+        assert_that(reused_handle.basedir).equals(handle.basedir)
+        assert_that(len(os.listdir(reused_handle.basedir))).equals(0)
+
+    def test_should_hand_out_distinct_directories_while_acquired(self):
+        handle = self.pool.acquire()
+        other_handle = self.pool.acquire()
+
+        assert_that(other_handle.basedir).is_not_equal_to(handle.basedir)
+
+    def test_should_not_remove_acquired_directory_when_handle_is_deleted(self):
+        handle = self.pool.acquire()
+        basedir = handle.basedir
+
+        del handle
+
+        assert_that(os.path.isdir(basedir)).is_true()
+
+    def test_should_remove_idle_directories_when_closed(self):
+        handle = self.pool.acquire()
+        self.pool.release(handle)
+
+        self.pool.close()
+
+        assert_that(len(os.listdir(self.root.basedir))).equals(0)
+
+    def test_should_remove_idle_directories_of_worker_process_when_it_exits(self):
+        handle = self.pool.acquire()
+        self.pool.release(handle)
+
+        process = get_multiprocessing_context().Process(target=use_pool, args=(self.pool,))
+        process.start()
+        process.join()
+
+        assert_that(process.exitcode).equals(0)
+        assert_that(os.listdir(self.root.basedir)).equals([os.path.basename(handle.basedir)])
+
+    def test_should_remove_directory_that_cannot_be_wiped(self):
+        handle = self.pool.acquire()
+        handle.touch("spam")
+        os.remove(handle.join("spam"))
+        os.rmdir(handle.basedir)
+
+        self.pool.release(handle)
+
+        assert_that(self.pool.acquire().basedir).is_not_equal_to(handle.basedir)
+
+
+class PooledTemporaryDirectoryFixtureTest(unittest.TestCase):
+    def test_should_share_pool_between_fixture_instances(self):
+        handle = PooledTemporaryDirectoryFixture("pyfix_pool_test").provide()[0]
+        fixture = PooledTemporaryDirectoryFixture("pyfix_pool_test")
+        fixture.reclaim(handle)
+
+        reused_handle = fixture.provide()[0]
+
+        assert_that(reused_handle.basedir).equals(handle.basedir)
+        fixture.reclaim(reused_handle)
+        get_temporary_directory_pool("pyfix_pool_test").close()
+        assert_that(os.path.exists(handle.basedir)).is_false()
@@ -0,0 +1,150 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import signal
+import tempfile
+import unittest
+from pyassert import assert_that
+
+from pyfix.fixture import Fixture, SCOPE_SUITE
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestRunner
+
+_leaked = []
+
+
+class ProcessIdFixture(Fixture):
+    def provide(self):
+        return [os.getpid()]
+
+
+class ReclaimRecordingSuiteFixture(Fixture):
+    scope = SCOPE_SUITE
+    directory = None
+
+    def provide(self):
+        return [os.getpid()]
+
+    def reclaim(self, value):
+        open(os.path.join(ReclaimRecordingSuiteFixture.directory, str(value)), "w").close()
+
+
+def passing_test(pid):
+    pass
+
+
+def failing_test(pid):
+    raise Exception("Caboom")
+
+
+def exiting_test(pid):
+    os._exit(3)
+
+
+def segfaulting_test(pid):
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+def leaking_test(pid):
+    _leaked.append(bytearray(b"x" * 32 * 1024 * 1024))
+
+
+def create_test_suite(*functions, **givens):
+    fixture = givens.get("fixture", ProcessIdFixture)
+    return [TestDefinition(function, function.__name__, "", "module", {"pid": fixture}) for function in functions]
+
+
+def get_process_ids(test_suite_result):
+    return [r.parameter_description for r in test_suite_result.test_results]
+
+
+class IsolatedTestRunnerTest(unittest.TestCase):
+    def test_should_execute_tests_in_forked_worker_and_report_in_order(self):
+        test_suite = create_test_suite(passing_test, failing_test, passing_test)
+
+        test_suite_result = TestRunner(workers=2, isolated=True).run_tests(test_suite)
+
+        assert_that([r.test_definition for r in test_suite_result.test_results]).equals(test_suite)
+        assert_that([r.success for r in test_suite_result.test_results]).equals([True, False, True])
+        assert_that("pid={0}".format(os.getpid()) in get_process_ids(test_suite_result)).is_false()
+
+    def test_should_report_test_exiting_worker_as_failed_and_continue(self):
+        test_suite_result = TestRunner(isolated=True).run_tests(create_test_suite(exiting_test, passing_test))
+
+        assert_that(test_suite_result.test_results[0].success).is_false()
+        assert_that(test_suite_result.test_results[0].message).equals(
+            "Worker process exited with code 3 during execution")
+        assert_that(test_suite_result.test_results[1].success).is_true()
+
+    def test_should_report_test_crashing_worker_as_failed(self):
+        test_suite_result = TestRunner(isolated=True).run_tests(create_test_suite(segfaulting_test, passing_test))
+
+        assert_that(test_suite_result.test_results[0].message).equals(
+            "Worker process killed by signal {0} during execution".format(signal.SIGSEGV))
+        assert_that(test_suite_result.number_of_failures).equals(1)
+
+    def test_should_fork_worker_for_each_test_by_default(self):
+        test_suite_result = TestRunner(isolated=True).run_tests(create_test_suite(passing_test, passing_test))
+
+        assert_that(len(set(get_process_ids(test_suite_result)))).equals(2)
+
+    def test_should_recycle_worker_after_given_number_of_tests(self):
+        test_suite = create_test_suite(*([passing_test] * 4))
+
+        test_suite_result = TestRunner(isolated=True, max_tests_per_worker=2).run_tests(test_suite)
+
+        process_ids = get_process_ids(test_suite_result)
+        assert_that(process_ids[0]).equals(process_ids[1])
+        assert_that(process_ids[2]).equals(process_ids[3])
+        assert_that(process_ids[1]).is_not_equal_to(process_ids[2])
+
+    def test_should_recycle_worker_when_memory_grew_too_much(self):
+        test_suite = create_test_suite(passing_test, passing_test, leaking_test, passing_test)
+
+        test_suite_result = TestRunner(isolated=True, max_tests_per_worker=None, max_memory_growth=16).run_tests(
+            test_suite)
+
+        process_ids = get_process_ids(test_suite_result)
+        assert_that(len(set(process_ids[:3]))).equals(1)
+        assert_that(process_ids[3]).is_not_equal_to(process_ids[2])
+
+    def test_should_stop_after_max_failures(self):
+        test_suite = create_test_suite(*([failing_test] + [passing_test] * 10))
+
+        test_suite_result = TestRunner(workers=2, isolated=True, max_failures=1).run_tests(test_suite)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(1)
+        assert_that(test_suite_result.number_of_tests_not_executed).equals(10)
+
+
+class IsolatedTestRunnerFixtureTest(unittest.TestCase):
+    def setUp(self):
+        ReclaimRecordingSuiteFixture.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(ReclaimRecordingSuiteFixture.directory)
+
+    def test_should_reclaim_suite_scoped_fixtures_when_worker_is_recycled(self):
+        test_suite = create_test_suite(*([passing_test] * 4), fixture=ReclaimRecordingSuiteFixture)
+
+        test_suite_result = TestRunner(isolated=True, max_tests_per_worker=2).run_tests(test_suite)
+
+        reclaimed_values = set("pid=" + name for name in os.listdir(ReclaimRecordingSuiteFixture.directory))
+        assert_that(reclaimed_values).equals(set(get_process_ids(test_suite_result)))
+        assert_that(len(reclaimed_values)).equals(2)
@@ -0,0 +1,111 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from pyassert import assert_that
+
+from pyfix.fixture import enumerate
+from pyfix.profiling import TestProfiler
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestInjector, TestRunner
+
+
+def compute_something_expensive():
+    return sum(range(10000))
+
+
+def allocating_test(size):
+    allocating_test.values = [object() for _ in range(size)]
+
+
+def cpu_bound_test():
+    compute_something_expensive()
+
+
+hanging_test_released = threading.Event()
+
+
+def hanging_test():
+    hanging_test_released.wait(10)
+
+
+class TestProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_report_hottest_functions_across_all_executions(self):
+        profiler = TestProfiler()
+
+        TestInjector(profiler=profiler).execute_test(TestDefinition(cpu_bound_test, "unittest", "unittest", "module",
+                                                                    {}))
+
+        assert_that(profiler.format_hottest_functions()).contains("compute_something_expensive")
+
+    def test_should_store_statistics_of_each_execution_in_directory(self):
+        profiler = TestProfiler(directory=self.directory)
+
+        TestInjector(profiler=profiler).execute_test(TestDefinition(allocating_test, "unittest", "unittest", "module",
+                                                                    {"size": enumerate(1, 2)}))
+
+        assert_that(sorted(os.listdir(self.directory))).equals(["0001-unittest_size_1.prof",
+                                                                "0002-unittest_size_2.prof"])
+
+    def test_should_report_tests_allocating_most_memory_first(self):
+        profiler = TestProfiler(cpu=False, memory=True)
+
+        try:
+            TestInjector(profiler=profiler).execute_test(TestDefinition(allocating_test, "unittest", "unittest",
+                                                                        "module", {"size": enumerate(10, 10000)}))
+        finally:
+            profiler.close()
+
+        report = profiler.format_top_allocating_tests(1)
+
+        assert_that(report).contains("size=10000")
+        assert_that(report).does_not_contain("size=10]")
+
+    def test_should_execute_tests_after_abandoned_execution_without_waiting_for_it(self):
+        profiler = TestProfiler()
+        injector = TestInjector(profiler=profiler)
+        hanging_test_released.clear()
+
+        try:
+            timed_out_results = injector.execute_test(TestDefinition(hanging_test, "unittest", "unittest", "module",
+                                                                     {}, timeout=0.05))
+            results = injector.execute_test(TestDefinition(cpu_bound_test, "unittest", "unittest", "module", {},
+                                                           timeout=2))
+            results_without_timeout = injector.execute_test(TestDefinition(cpu_bound_test, "unittest", "unittest",
+                                                                           "module", {}))
+        finally:
+            hanging_test_released.set()
+
+        assert_that(timed_out_results[0].message).starts_with("Execution timed out")
+        assert_that(results[0].success).is_true()
+        assert_that(results_without_timeout[0].success).is_true()
+
+    def test_should_report_that_no_executions_have_been_profiled(self):
+        assert_that(TestProfiler().format_hottest_functions()).equals("No executions have been profiled.")
+
+    def test_should_raise_exception_when_profiling_with_worker_processes(self):
+        self.assertRaises(ValueError, TestRunner, workers=2, profiler=TestProfiler())
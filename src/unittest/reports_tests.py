@@ -0,0 +1,115 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+from pyassert import assert_that
+
+from pyfix.reports import JsonLinesTestRunListener, JUnitXmlTestRunListener
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import PHASE_TEST, TestResult, TestSuiteResult
+
+
+def some_test():
+    pass
+
+
+def create_test_results():
+    test_definition = TestDefinition(some_test, "Some test", "", "module", {})
+    return [TestResult(test_definition, True, 0, "spam=eggs", None, None, 1500000, {PHASE_TEST: 1000000}),
+            TestResult(test_definition, False, 0, "spam=<foo>", "Caboom & more", "Traceback <here>", 500000, {})]
+
+
+class ReportsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "report")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_report(self):
+        with open(self.filename) as report:
+            return report.read()
+
+
+class JsonLinesTestRunListenerTest(ReportsTestCase):
+    def test_should_write_document_for_each_result_as_soon_as_test_has_been_executed(self):
+        listener = JsonLinesTestRunListener(self.filename)
+        listener.before_suite([])
+
+        listener.after_test(create_test_results())
+
+        documents = [json.loads(line) for line in self.read_report().splitlines()]
+        listener.after_suite(TestSuiteResult())
+
+        assert_that(len(documents)).equals(2)
+        assert_that(documents[0]["name"]).equals("Some test")
+        assert_that(documents[0]["parameters"]).equals("spam=eggs")
+        assert_that(documents[0]["execution_time_ns"]).equals(1500000)
+        assert_that(documents[0]["phase_times"]).equals({PHASE_TEST: 1000000})
+        assert_that(documents[1]["success"]).is_false()
+        assert_that(documents[1]["traceback"]).equals("Traceback <here>")
+
+
+class JUnitXmlTestRunListenerTest(ReportsTestCase):
+    def setUp(self):
+        super(JUnitXmlTestRunListenerTest, self).setUp()
+        listener = JUnitXmlTestRunListener(self.filename)
+        listener.before_suite([])
+        listener.after_test(create_test_results())
+        listener.after_suite(TestSuiteResult())
+        self.test_suite = ElementTree.parse(self.filename).getroot().find("testsuite")
+
+    def test_should_write_test_suite_for_each_test_definition(self):
+        assert_that(self.test_suite.get("name")).equals("Some test")
+        assert_that(self.test_suite.get("tests")).equals("2")
+        assert_that(self.test_suite.get("failures")).equals("1")
+        assert_that(self.test_suite.get("time")).equals("0.002000")
+
+    def test_should_write_test_case_with_timing_and_parameters(self):
+        test_case = self.test_suite.findall("testcase")[0]
+
+        assert_that(test_case.get("classname")).equals("module")
+        assert_that(test_case.get("name")).equals("Some test [spam=eggs]")
+        assert_that(test_case.get("time")).equals("0.001500")
+        assert_that(dict((p.get("name"), p.get("value")) for p in test_case.iter("property"))).equals(
+            {"parameters": "spam=eggs", "phase.test": "0.001000"})
+
+    def test_should_write_escaped_failure(self):
+        failure = self.test_suite.findall("testcase")[1].find("failure")
+
+        assert_that(failure.get("message")).equals("Caboom & more")
+        assert_that(failure.text).equals("Traceback <here>")
+
+
+class FileTestRunListenerTest(ReportsTestCase):
+    def test_should_write_non_ascii_text_encoded_as_utf_8(self):
+        message = b"Caboom \xc3\xa4".decode("utf-8")
+        test_definition = TestDefinition(some_test, "Some test", "", "module", {})
+        listener = JUnitXmlTestRunListener(self.filename)
+        listener.before_suite([])
+        listener.after_test([TestResult(test_definition, False, 0, "", message, None)])
+        listener.after_suite(TestSuiteResult())
+
+        failure = ElementTree.parse(self.filename).getroot().find("testsuite").find("testcase").find("failure")
+
+        assert_that(failure.get("message")).equals(message)
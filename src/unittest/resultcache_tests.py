@@ -0,0 +1,216 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pyassert import assert_that
+
+from pyfix.fixture import Fixture, enumerate
+from pyfix.resultcache import ResultCache, ResultCacheTestRunListener, compute_test_hash, get_test_key
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestResult
+
+
+def some_test():
+    pass
+
+
+def some_other_test():
+    return 1
+
+
+def set_membership_test():
+    return "alpha" in {"alpha", "beta", "gamma", "delta"}
+
+
+class Slotted(object):
+    __slots__ = ()
+
+
+def create_fixture_class(**attributes):
+    "Returns a fixture class named SpamFixture deriving from a base class with the given attributes."
+    base = type("BaseFixture", (Fixture,), attributes)
+    return type("SpamFixture", (base,), {})
+
+
+def provide_spam(self):
+    return ["spam"]
+
+
+def provide_eggs(self):
+    return ["eggs"]
+
+
+def create_test_definition(function, givens=None):
+    return TestDefinition(function, "unittest", "unittest", "module", givens if givens is not None else {})
+
+
+def create_test_result(test_definition, success, execution_time=1):
+    return TestResult(test_definition, success, execution_time, "", None, None)
+
+
+class GetTestKeyTest(unittest.TestCase):
+    def test_should_return_module_and_qualified_function_name(self):
+        assert_that(get_test_key(create_test_definition(some_test))).equals("module:some_test")
+
+
+class ComputeTestHashTest(unittest.TestCase):
+    def test_should_return_same_hash_for_same_test(self):
+        assert_that(compute_test_hash(create_test_definition(some_test))).equals(
+            compute_test_hash(create_test_definition(some_test)))
+
+    def test_should_return_different_hash_when_code_differs(self):
+        assert_that(compute_test_hash(create_test_definition(some_test))).is_not_equal_to(
+            compute_test_hash(create_test_definition(some_other_test)))
+
+    def test_should_return_same_hash_for_equal_fixtures(self):
+        assert_that(compute_test_hash(create_test_definition(some_test, {"spam": enumerate("spam", "eggs")}))).equals(
+            compute_test_hash(create_test_definition(some_test, {"spam": enumerate("spam", "eggs")})))
+
+    def test_should_return_different_hash_when_fixtures_differ(self):
+        assert_that(compute_test_hash(create_test_definition(some_test, {"spam": enumerate("spam")}))).is_not_equal_to(
+            compute_test_hash(create_test_definition(some_test, {"spam": enumerate("eggs")})))
+
+    def test_should_return_different_hash_when_inherited_class_attribute_of_fixture_differs(self):
+        assert_that(compute_test_hash(create_test_definition(some_test, {
+            "spam": create_fixture_class(value="spam")}))).is_not_equal_to(
+            compute_test_hash(create_test_definition(some_test, {"spam": create_fixture_class(value="eggs")})))
+
+    def test_should_return_different_hash_when_inherited_method_of_fixture_differs(self):
+        assert_that(compute_test_hash(create_test_definition(some_test, {
+            "spam": create_fixture_class(provide=provide_spam)}))).is_not_equal_to(
+            compute_test_hash(create_test_definition(some_test, {
+                "spam": create_fixture_class(provide=provide_eggs)})))
+
+    def test_should_return_different_hash_when_dependencies_of_fixture_class_differ(self):
+        assert_that(compute_test_hash(create_test_definition(some_test, {
+            "spam": create_fixture_class(dependencies={"eggs": enumerate("spam")})}))).is_not_equal_to(
+            compute_test_hash(create_test_definition(some_test, {
+                "spam": create_fixture_class(dependencies={"eggs": enumerate("eggs")})})))
+
+    def test_should_return_different_hash_when_dependencies_of_fixture_instance_differ(self):
+        spam_fixture = create_fixture_class()()
+        spam_fixture.dependencies = {"eggs": enumerate("spam")}
+        eggs_fixture = create_fixture_class()()
+        eggs_fixture.dependencies = {"eggs": enumerate("eggs")}
+
+        assert_that(compute_test_hash(create_test_definition(some_test, {"spam": spam_fixture}))).is_not_equal_to(
+            compute_test_hash(create_test_definition(some_test, {"spam": eggs_fixture})))
+
+    def test_should_return_same_hash_for_set_constants_and_default_representations_with_any_hash_seed(self):
+        script = ("from resultcache_tests import Slotted, create_test_definition, set_membership_test\n"
+                  "from pyfix.resultcache import compute_test_hash\n"
+                  "print(compute_test_hash(create_test_definition(set_membership_test, {'spam': Slotted()})))")
+        environment = dict(os.environ)
+        environment["PYTHONPATH"] = os.pathsep.join(sys.path)
+
+        hashes = set()
+        for hash_seed in ("1", "2", "3"):
+            environment["PYTHONHASHSEED"] = hash_seed
+            output = subprocess.check_output([sys.executable, "-c", script], env=environment)
+            hashes.add(output.strip())
+
+        assert_that(len(hashes)).equals(1)
+
+    def test_should_return_different_hash_when_items_of_set_constant_differ(self):
+        def other_set_membership_test():
+            return "alpha" in {"alpha", "beta", "gamma", "epsilon"}
+
+        assert_that(compute_test_hash(create_test_definition(set_membership_test))).is_not_equal_to(
+            compute_test_hash(create_test_definition(other_set_membership_test)))
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResultCache(os.path.join(self.directory, "cache.json"))
+        self.passing_test = create_test_definition(some_test)
+        self.failing_test = create_test_definition(some_other_test)
+        self.unknown_test = TestDefinition(some_test, "unittest", "unittest", "other_module", {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _record(self):
+        self.cache.record(self.passing_test, [create_test_result(self.passing_test, True, 2),
+                                              create_test_result(self.passing_test, True, 3)])
+        self.cache.record(self.failing_test, [create_test_result(self.failing_test, False)])
+
+    def test_should_load_empty_cache_when_file_does_not_exist(self):
+        self.cache.load()
+
+        assert_that(self.cache.has_changed(self.passing_test)).is_true()
+
+    def test_should_load_saved_results(self):
+        self._record()
+        self.cache.save()
+
+        cache = ResultCache(self.cache.filename)
+        cache.load()
+
+        assert_that(cache.has_failed(self.failing_test)).is_true()
+        assert_that(cache.has_failed(self.passing_test)).is_false()
+        assert_that(cache.get_duration(self.passing_test)).equals(5)
+
+    def test_should_return_default_duration_when_test_is_unknown(self):
+        assert_that(self.cache.get_duration(self.unknown_test, 7)).equals(7)
+
+    def test_should_order_failed_tests_first(self):
+        self._record()
+
+        actual = self.cache.select([self.unknown_test, self.passing_test, self.failing_test], failed_first=True)
+
+        assert_that(actual).equals([self.failing_test, self.unknown_test, self.passing_test])
+
+    def test_should_skip_unchanged_passing_tests(self):
+        self._record()
+
+        actual = self.cache.select([self.unknown_test, self.passing_test, self.failing_test], changed_only=True)
+
+        assert_that(actual).equals([self.unknown_test, self.failing_test])
+
+    def test_should_not_skip_changed_test(self):
+        self._record()
+        changed_test = create_test_definition(some_test, {"spam": "eggs"})
+
+        actual = self.cache.select([changed_test], changed_only=True)
+
+        assert_that(actual).equals([changed_test])
+
+
+class ResultCacheTestRunListenerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResultCache(os.path.join(self.directory, "cache.json"))
+        self.listener = ResultCacheTestRunListener(self.cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_record_results_and_save_cache_after_suite(self):
+        test_definition = create_test_definition(some_test)
+
+        self.listener.after_test([create_test_result(test_definition, False)])
+        self.listener.after_suite(None)
+
+        cache = ResultCache(self.cache.filename)
+        cache.load()
+        assert_that(cache.has_failed(test_definition)).is_true()
@@ -0,0 +1,147 @@
+#  pyfix
+#  Copyright 2012 The pyfix team.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+__author__ = "Alexander Metzner"
+
+import os
+import shutil
+import tempfile
+import unittest
+from pyassert import assert_that
+
+from pyfix.resultcache import ResultCache
+from pyfix.scheduling import get_expected_durations, order_longest_first, parse_shard, partition, schedule, \
+    select_shard
+from pyfix.testdefinition import TestDefinition
+from pyfix.testrunner import TestResult
+
+
+def first_test():
+    pass
+
+
+def second_test():
+    pass
+
+
+def third_test():
+    pass
+
+
+def create_test_definition(function):
+    return TestDefinition(function, "unittest", "unittest", "module", {})
+
+
+class ParseShardTest(unittest.TestCase):
+    def test_should_parse_index_and_number_of_shards(self):
+        assert_that(parse_shard("2/3")).equals((2, 3))
+
+    def test_should_raise_exception_when_shard_is_malformed(self):
+        self.assertRaises(ValueError, parse_shard, "2")
+        self.assertRaises(ValueError, parse_shard, "a/3")
+
+    def test_should_raise_exception_when_index_is_out_of_range(self):
+        self.assertRaises(ValueError, parse_shard, "0/3")
+        self.assertRaises(ValueError, parse_shard, "4/3")
+
+
+class GetExpectedDurationsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_expect_same_duration_for_all_tests_without_result_cache(self):
+        test_definitions = [create_test_definition(first_test), create_test_definition(second_test)]
+
+        assert_that(get_expected_durations(test_definitions)).equals([1.0, 1.0])
+
+    def test_should_expect_median_duration_for_tests_without_recorded_duration(self):
+        test_definitions = [create_test_definition(f) for f in (first_test, second_test, third_test)]
+        result_cache = ResultCache(os.path.join(self.directory, "cache.json"))
+        result_cache.record(test_definitions[0], [TestResult(test_definitions[0], True, 10, "", None, None)])
+        result_cache.record(test_definitions[1], [TestResult(test_definitions[1], True, 30, "", None, None)])
+
+        assert_that(get_expected_durations(test_definitions, result_cache)).equals([10, 30, 30])
+
+
+class OrderLongestFirstTest(unittest.TestCase):
+    def test_should_order_by_decreasing_duration_and_keep_order_of_ties(self):
+        assert_that(order_longest_first(["a", "b", "c", "d"], [1, 3, 1, 2])).equals(["b", "d", "a", "c"])
+
+
+class PartitionTest(unittest.TestCase):
+    def test_should_balance_shards_by_duration_rather_than_count(self):
+        shards = partition(["a", "b", "c", "d", "e"], [10, 1, 1, 1, 7], 2)
+
+        assert_that(shards).equals([["a"], ["b", "c", "d", "e"]])
+
+    def test_should_keep_order_of_tests_within_shard(self):
+        shards = partition(["a", "b", "c", "d"], [1, 2, 3, 4], 2)
+
+        assert_that(shards).equals([["a", "d"], ["b", "c"]])
+
+    def test_should_assign_every_test_to_exactly_one_shard(self):
+        test_definitions = list(range(17))
+        shards = partition(test_definitions, [index % 5 + 1 for index in test_definitions], 4)
+
+        assert_that(sorted(sum(shards, []))).equals(test_definitions)
+
+    def test_should_return_empty_shards_when_there_are_more_shards_than_tests(self):
+        assert_that(partition(["a"], [1], 3)).equals([["a"], [], []])
+
+    def test_should_select_shard_counting_from_one(self):
+        assert_that(select_shard(["a", "b", "c", "d"], [1, 2, 3, 4], 1, 2)).equals(["a", "d"])
+
+
+class ScheduleTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.test_definitions = [create_test_definition(f) for f in (first_test, second_test, third_test)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_result_cache(self, name, durations):
+        result_cache = ResultCache(os.path.join(self.directory, name))
+        for index, duration in durations.items():
+            test_definition = self.test_definitions[index]
+            result_cache.record(test_definition, [TestResult(test_definition, True, duration, "", None, None)])
+        return result_cache
+
+    def test_should_assign_every_test_to_a_shard_when_local_caches_differ(self):
+        first_cache = self.create_result_cache("first.json", {})
+        second_cache = self.create_result_cache("second.json", {1: 1, 2: 100})
+
+        first_shard = schedule(self.test_definitions, (1, 2), result_cache=first_cache)
+        second_shard = schedule(self.test_definitions, (2, 2), result_cache=second_cache)
+
+        assert_that(len(first_shard) + len(second_shard)).equals(3)
+        assert_that(set(first_shard) | set(second_shard)).equals(set(self.test_definitions))
+
+    def test_should_balance_shards_by_shared_durations(self):
+        shared_durations = self.create_result_cache("shared.json", {0: 100, 1: 1, 2: 1})
+
+        assert_that(schedule(self.test_definitions, (1, 2), shared_durations=shared_durations)).equals(
+            self.test_definitions[:1])
+        assert_that(schedule(self.test_definitions, (2, 2), shared_durations=shared_durations)).equals(
+            self.test_definitions[1:])
+
+    def test_should_order_longest_first_using_local_result_cache(self):
+        result_cache = self.create_result_cache("local.json", {0: 1, 1: 10, 2: 100})
+
+        assert_that(schedule(self.test_definitions, longest_first=True, result_cache=result_cache)).equals(
+            list(reversed(self.test_definitions)))
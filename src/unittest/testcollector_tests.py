@@ -15,6 +15,7 @@
 
 __author__ = "Alexander Metzner"
 
+import types
 import unittest
 from mockito import mock
 from pyassert import assert_that
@@ -65,3 +66,86 @@ class TestCollectorTest(unittest.TestCase):
         self.collector.collect_tests(module_mock)
 
         assert_that(len(self.collector.test_suite)).equals(2)
+
+
+class TestCollectorModuleRegistryTest(unittest.TestCase):
+    def setUp (self):
+        self.collector = TestCollector()
+        self.module = types.ModuleType("testcollector_registry_{0}".format(id(self)))
+
+    def _define_test (self, name):
+        def function ():
+            pass
+
+        function.__name__ = name
+        function.__module__ = self.module.__name__
+        function = test(function)
+        setattr(self.module, name, function)
+        return function
+
+    def test_should_collect_tests_in_order_of_definition (self):
+        self._define_test("spam")
+        self._define_test("eggs")
+        self._define_test("foo")
+
+        self.collector.collect_tests(self.module)
+
+        assert_that([d.function.__name__ for d in self.collector.test_suite]).equals(["spam", "eggs", "foo"])
+
+    def test_should_not_inspect_module_attributes (self):
+        class ExplodingAttribute (object):
+            def __getattr__ (self, name):
+                raise AssertionError("Attribute '{0}' must not be inspected".format(name))
+
+        self.module.exploding = ExplodingAttribute()
+        self._define_test("spam")
+
+        self.collector.collect_tests(self.module)
+
+        assert_that(len(self.collector.test_suite)).equals(1)
+
+    def test_should_not_collect_test_removed_from_module (self):
+        self._define_test("spam")
+        delattr(self.module, "spam")
+
+        self.collector.collect_tests(self.module)
+
+        assert_that(len(self.collector.test_suite)).equals(0)
+
+    def test_should_collect_redefined_test_only_once (self):
+        self._define_test("spam")
+        redefined = self._define_test("spam")
+
+        self.collector.collect_tests(self.module)
+
+        assert_that(len(self.collector.test_suite)).equals(1)
+        assert_that(self.collector.test_suite[0].function).is_identical_to(redefined)
+
+    def test_should_collect_tests_imported_from_other_module_after_local_tests (self):
+        other_module = types.ModuleType("testcollector_registry_other_{0}".format(id(self)))
+
+        def shared_test ():
+            pass
+
+        shared_test.__module__ = other_module.__name__
+        shared_test = test(shared_test)
+        other_module.shared_test = shared_test
+        self.module.shared_test = shared_test
+        self._define_test("spam")
+
+        self.collector.collect_tests(self.module)
+
+        assert_that([d.function.__name__ for d in self.collector.test_suite]).equals(["spam", "shared_test"])
+
+    def test_should_collect_test_imported_under_two_names_only_once (self):
+        def shared_test ():
+            pass
+
+        shared_test.__module__ = "testcollector_registry_other_{0}".format(id(self))
+        shared_test = test(shared_test)
+        self.module.shared_test = shared_test
+        self.module.alias = shared_test
+
+        self.collector.collect_tests(self.module)
+
+        assert_that(len(self.collector.test_suite)).equals(1)
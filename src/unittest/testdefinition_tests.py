@@ -18,7 +18,8 @@ __author__ = "Alexander Metzner"
 import unittest
 from pyassert import assert_that
 
-from pyfix.decorators import GIVEN_ATTRIBUTE, BEFORE_ATTRIBUTE, AFTER_ATTRIBUTE
+from pyfix.decorators import (GIVEN_ATTRIBUTE, BEFORE_ATTRIBUTE, AFTER_ATTRIBUTE, PARALLEL_ATTRIBUTE, TIMEOUT_ATTRIBUTE,
+                              BENCHMARK_ATTRIBUTE)
 from pyfix.testdefinition import TestDefinition
 
 
@@ -77,3 +78,41 @@ class TestDefinitionTest(unittest.TestCase):
         test = TestDefinition.from_function(some_function)
 
         assert_that(test.after_interceptors).is_equal_to(after_interceptors)
+
+    def test_should_execute_sequentially_when_no_threads_are_set(self):
+        def some_function():
+            pass
+
+        test = TestDefinition.from_function(some_function)
+
+        assert_that(test.threads).is_equal_to(1)
+
+    def test_should_collect_threads(self):
+        def some_function():
+            pass
+
+        setattr(some_function, PARALLEL_ATTRIBUTE, 4)
+
+        test = TestDefinition.from_function(some_function)
+
+        assert_that(test.threads).is_equal_to(4)
+
+    def test_should_collect_timeout(self):
+        def some_function():
+            pass
+
+        setattr(some_function, TIMEOUT_ATTRIBUTE, 2.5)
+
+        test = TestDefinition.from_function(some_function)
+
+        assert_that(test.timeout).is_equal_to(2.5)
+
+    def test_should_collect_benchmark(self):
+        def some_function():
+            pass
+
+        setattr(some_function, BENCHMARK_ATTRIBUTE, "benchmark")
+
+        test = TestDefinition.from_function(some_function)
+
+        assert_that(test.benchmark).is_equal_to("benchmark")
@@ -15,13 +15,23 @@
 
 __author__ = "Alexander Metzner"
 
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import weakref
 from pyassert import assert_that
 from mockito import mock, when, verify, any as any_value
 
+from pyfix.benchmark import Benchmark
 from pyfix.testdefinition import TestDefinition
-from pyfix.fixture import Fixture, enumerate
-from pyfix.testrunner import TestRunner, TestRunListener, TestResult, TestSuiteResult, TestInjector
+from pyfix.fixture import Fixture, enumerate, SCOPE_MODULE, SCOPE_SUITE
+from pyfix.testrunner import (TestRunner, TestRunListener, TestResult, TestSuiteResult, TestInjector, PhaseTimer,
+                              PHASE_PROVIDE, PHASE_BEFORE, PHASE_TEST, PHASE_AFTER, PHASE_RECLAIM)
 
 class TestRunnerNotificationTest(unittest.TestCase):
     def setUp(self):
@@ -71,6 +81,189 @@ class TestRunnerExecutionTest(unittest.TestCase):
         when(self.injector_mock).execute_test(test_definition_mock)
 
 
+def passing_test_function(**arguments):
+    pass
+
+
+def failing_test_function():
+    raise Exception("Caboom")
+
+
+class RecordingTestRunListener(TestRunListener):
+    def __init__(self):
+        self.events = []
+
+    def before_test(self, test_definition):
+        self.events.append(("before_test", test_definition))
+
+    def after_test(self, test_results):
+        self.events.append(("after_test", test_results))
+
+
+class TestRunnerParallelExecutionTest(unittest.TestCase):
+    def setUp(self):
+        self.passing_test = TestDefinition(passing_test_function, "passing", "passing", "module", {})
+        self.failing_test = TestDefinition(failing_test_function, "failing", "failing", "module", {})
+        self.parameterized_test = TestDefinition(passing_test_function, "parameterized", "parameterized", "module",
+                {"spam": enumerate("spam", "eggs")})
+        self.suite = [self.passing_test, self.failing_test, self.parameterized_test]
+
+        self.listener = RecordingTestRunListener()
+        self.test_runner = TestRunner(workers=2)
+        self.test_runner.add_test_run_listener(self.listener)
+
+    def test_should_execute_all_test_definitions(self):
+        test_suite_result = self.test_runner.run_tests(self.suite)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(4)
+        assert_that(test_suite_result.number_of_failures).equals(1)
+
+    def test_should_attach_test_definitions_to_results(self):
+        test_suite_result = self.test_runner.run_tests(self.suite)
+
+        actual = [r.test_definition for r in test_suite_result.test_results]
+        assert_that(actual).equals([self.passing_test, self.failing_test, self.parameterized_test,
+                                    self.parameterized_test])
+
+    def test_should_ship_formatted_traceback_of_failures(self):
+        test_suite_result = self.test_runner.run_tests(self.suite)
+
+        failure = test_suite_result.test_results[1]
+        assert_that(failure.message).equals("Exception: Caboom")
+        assert_that(failure.traceback_as_string).contains("failing_test_function")
+
+    def test_should_notify_listeners_in_order_of_test_definitions(self):
+        self.test_runner.run_tests(self.suite)
+
+        actual = [(event, value) for event, value in self.listener.events if event == "before_test"]
+        assert_that(actual).equals([("before_test", self.passing_test), ("before_test", self.failing_test),
+                                    ("before_test", self.parameterized_test)])
+        assert_that(self.listener.events[1][0]).equals("after_test")
+
+
+class FileRecordingSuiteFixture(Fixture):
+    scope = SCOPE_SUITE
+    directory = None
+
+    def provide(self):
+        return [os.getpid()]
+
+    def reclaim(self, value):
+        open(os.path.join(FileRecordingSuiteFixture.directory, str(value)), "w").close()
+
+
+class TestRunnerParallelFixtureScopeTest(unittest.TestCase):
+    def setUp(self):
+        FileRecordingSuiteFixture.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(FileRecordingSuiteFixture.directory)
+
+    def test_should_reclaim_suite_scoped_fixtures_in_workers(self):
+        suite = [TestDefinition(passing_test_function, "unittest", "unittest", "module",
+                                {"spam": FileRecordingSuiteFixture}) for _ in range(4)]
+
+        test_suite_result = TestRunner(workers=2).run_tests(suite)
+
+        provided_values = set([r.parameter_description for r in test_suite_result.test_results])
+        reclaimed_values = set(["spam=" + name for name in os.listdir(FileRecordingSuiteFixture.directory)])
+        assert_that(reclaimed_values).equals(provided_values)
+
+
+def failing_test_function_with_arguments(**arguments):
+    raise Exception("Caboom")
+
+
+class TestRunnerMaxFailuresTest(unittest.TestCase):
+    def setUp(self):
+        FileRecordingSuiteFixture.directory = tempfile.mkdtemp()
+        self.passing_test = TestDefinition(passing_test_function, "passing", "passing", "module",
+                                           {"spam": FileRecordingSuiteFixture})
+        self.failing_test = TestDefinition(failing_test_function_with_arguments, "failing", "failing", "module",
+                                           {"spam": FileRecordingSuiteFixture})
+        self.suite = [self.passing_test, self.failing_test, self.passing_test, self.failing_test, self.passing_test]
+
+    def tearDown(self):
+        shutil.rmtree(FileRecordingSuiteFixture.directory)
+
+    def test_should_execute_all_tests_when_max_failures_is_not_given(self):
+        test_suite_result = TestRunner().run_tests(self.suite)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(5)
+        assert_that(test_suite_result.aborted).is_false()
+
+    def test_should_stop_after_given_number_of_failures(self):
+        test_suite_result = TestRunner(max_failures=1).run_tests(self.suite)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(2)
+        assert_that(test_suite_result.aborted).is_true()
+        assert_that(test_suite_result.number_of_tests_not_executed).equals(3)
+
+    def test_should_not_abort_when_last_test_reaches_max_failures(self):
+        test_suite_result = TestRunner(max_failures=2).run_tests(self.suite[:4])
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(4)
+        assert_that(test_suite_result.aborted).is_false()
+
+    def test_should_reclaim_suite_scoped_fixtures_when_stopping(self):
+        TestRunner(max_failures=1).run_tests(self.suite)
+
+        assert_that(os.listdir(FileRecordingSuiteFixture.directory)).equals([str(os.getpid())])
+
+    def test_should_stop_workers_and_reclaim_their_fixtures(self):
+        suite = [self.failing_test] + [self.passing_test] * 20
+
+        test_suite_result = TestRunner(workers=2, max_failures=1).run_tests(suite)
+
+        assert_that(test_suite_result.number_of_tests_executed).equals(1)
+        assert_that(test_suite_result.number_of_tests_not_executed).equals(20)
+        reclaimed_values = ["spam=" + name for name in os.listdir(FileRecordingSuiteFixture.directory)]
+        assert_that(test_suite_result.test_results[0].parameter_description in reclaimed_values).is_true()
+
+
+class TestResultTest(unittest.TestCase):
+    def test_should_be_picklable_without_test_definition_and_with_formatted_traceback(self):
+        try:
+            raise Exception("Caboom")
+        except Exception:
+            traceback = sys.exc_info()[2]
+
+        result = TestResult(mock(TestDefinition), False, 1, "spam=eggs", "Exception: Caboom", traceback)
+
+        actual = pickle.loads(pickle.dumps(result))
+
+        assert_that(actual.test_definition).is_none()
+        assert_that(actual.message).equals("Exception: Caboom")
+        assert_that(actual.parameter_description).equals("spam=eggs")
+        assert_that(actual.traceback_as_string).equals(result.traceback_as_string)
+
+    def test_should_derive_execution_time_in_nano_seconds_from_milli_seconds(self):
+        result = TestResult(mock(TestDefinition), True, 2, "", None, None)
+
+        assert_that(result.execution_time_ns).equals(2000000)
+        assert_that(result.phase_times).equals({})
+
+
+class PhaseTimerTest(unittest.TestCase):
+    def test_should_sum_up_times_of_phases_started_more_than_once(self):
+        timer = PhaseTimer()
+
+        timer.start(PHASE_TEST)
+        time.sleep(0.001)
+        timer.start(PHASE_AFTER)
+        timer.start(PHASE_TEST)
+        time.sleep(0.001)
+        timer.stop()
+
+        assert_that(sorted(timer.phase_times.keys())).equals([PHASE_AFTER, PHASE_TEST])
+        assert_that(timer.phase_times[PHASE_TEST]).is_greater_than(2000000)
+        assert_that(timer.total).equals(timer.phase_times[PHASE_TEST] + timer.phase_times[PHASE_AFTER])
+
+
+def create_test_result(success):
+    return TestResult(None, success, 0, "", None, None)
+
+
 class TestSuiteResultsTest(unittest.TestCase):
     def setUp(self):
         self.test_suite = TestSuiteResult()
@@ -79,41 +272,75 @@ class TestSuiteResultsTest(unittest.TestCase):
         assert_that(self.test_suite.success).is_true()
 
     def test_should_return_success_when_single_test_has_been_recorded(self):
-        result = mock(TestResult)
-        result.success = True
+        result = create_test_result(True)
         self.test_suite.add_test_results([result])
 
         assert_that(self.test_suite.success).is_true()
 
     def test_should_return_no_success_when_single_test_with_failure_has_been_recorded(self):
-        result = mock(TestResult)
-        result.success = False
+        result = create_test_result(False)
         self.test_suite.add_test_results([result])
 
         assert_that(self.test_suite.success).is_false()
 
     def test_should_count_number_of_tests_executed(self):
-        failure = mock(TestResult)
-        failure.success = False
-
-        success = mock(TestResult)
-        success.success = True
+        failure = create_test_result(False)
+        success = create_test_result(True)
 
         self.test_suite.add_test_results([failure, success, success, failure])
 
         assert_that(self.test_suite.number_of_tests_executed).equals(4)
 
     def test_should_count_number_of_failures(self):
-        failure = mock(TestResult)
-        failure.success = False
-
-        success = mock(TestResult)
-        success.success = True
+        failure = create_test_result(False)
+        success = create_test_result(True)
 
         self.test_suite.add_test_results([failure, success, success, failure])
 
         assert_that(self.test_suite.number_of_failures).equals(2)
 
+    def test_should_aggregate_phase_times(self):
+        self.test_suite.add_test_results([
+            TestResult(None, True, 0, "", None, None, 3, {PHASE_TEST: 3}),
+            TestResult(None, True, 0, "", None, None, 6, {PHASE_TEST: 2, PHASE_AFTER: 4})])
+
+        assert_that(self.test_suite.phase_times[PHASE_TEST]).equals(5)
+        assert_that(self.test_suite.phase_times[PHASE_AFTER]).equals(4)
+        assert_that(self.test_suite.phase_times[PHASE_PROVIDE]).equals(0)
+
+    def test_should_store_formatted_traceback(self):
+        try:
+            raise Exception("Caboom")
+        except Exception:
+            result = TestResult(None, False, 0, "", "Exception: Caboom", sys.exc_info()[2])
+        formatted_traceback = result.traceback_as_string
+
+        self.test_suite.add_test_results([result])
+
+        assert_that(result.traceback).equals(formatted_traceback)
+
+
+class StreamingTestSuiteResultTest(unittest.TestCase):
+    def setUp(self):
+        self.sunk_results = []
+        self.test_suite = TestSuiteResult(keep_results=False, sink=self.sunk_results.extend)
+
+    def test_should_count_results_without_keeping_them(self):
+        self.test_suite.add_test_results([create_test_result(False), create_test_result(True)])
+        self.test_suite.add_test_results([create_test_result(True)])
+
+        assert_that(self.test_suite.test_results).equals([])
+        assert_that(self.test_suite.number_of_tests_executed).equals(3)
+        assert_that(self.test_suite.number_of_failures).equals(1)
+        assert_that(self.test_suite.success).is_false()
+
+    def test_should_pass_results_to_sink(self):
+        results = [create_test_result(True), create_test_result(True)]
+
+        self.test_suite.add_test_results(results)
+
+        assert_that(self.sunk_results).equals(results)
+
 
 class InvocationCountingFunctionMock(object):
     def __init__(self, exception_to_raise=None):
@@ -251,6 +478,31 @@ class TestInjectorTest(unittest.TestCase):
         assert_that(function.invocation_arguments).contains({"spam": "eggs", "foo": "foo"})
         assert_that(function.invocation_arguments).contains({"spam": "eggs", "foo": "bar"})
 
+    def test_should_pass_identical_values_to_all_executions_when_two_fixtures_each_provide_two_values(self):
+        spam = ["spam"]
+        function = InvocationCountingFunctionMock()
+        test_definition = TestDefinition(function, "unittest", "unittest", "module",
+                {"spam": enumerate(spam), "foo": enumerate("foo", "bar")})
+
+        self.injector.execute_test(test_definition)
+
+        assert_that(function.invocation_counter).equals(2)
+        assert_that(function.invocation_arguments[0]["spam"]).is_identical_to(spam)
+        assert_that(function.invocation_arguments[1]["spam"]).is_identical_to(spam)
+
+    def test_should_multiply_parameter_maps_lazily(self):
+        fixtures = {"spam": (None, ["spam", "eggs"]), "foo": (None, ["foo", "bar", "baz"])}
+
+        actual = self.injector._multiply_parameter_maps(fixtures)
+
+        assert_that(isinstance(actual, list)).is_false()
+        assert_that(len(list(actual))).equals(6)
+
+    def test_should_multiply_parameter_maps_to_single_empty_map_when_no_fixtures_are_given(self):
+        actual = list(self.injector._multiply_parameter_maps({}))
+
+        assert_that(actual).equals([{}])
+
     def test_should_collect_traceback_when_test_function_raises_an_exception(self):
         def test_function():
             raise Exception("Caboom")
@@ -265,6 +517,468 @@ class TestInjectorTest(unittest.TestCase):
         assert_that(results[0].traceback_as_string).matches(".*")
 
 
+class TestInjectorThreadPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.injector = TestInjector()
+
+    def test_should_execute_all_parameter_sets_concurrently_and_keep_results_in_order(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def test_function(number):
+            barrier.wait()
+            if number == 2:
+                raise AssertionError("Caboom")
+
+        test_definition = TestDefinition(test_function, "unittest", "unittest", "module",
+                {"number": enumerate(*range(6))}, threads=3)
+
+        results = self.injector.execute_test(test_definition)
+
+        assert_that([r.parameter_description for r in results]).equals(["number={0}".format(i) for i in range(6)])
+        assert_that([r.success for r in results]).equals([True, True, False, True, True, True])
+
+    def test_should_reclaim_all_values_when_executing_in_thread_pool(self):
+        class TestFixture(Fixture):
+            reclaimed = []
+
+            def provide(self):
+                return ["spam", "eggs", "foo"]
+
+            def reclaim(self, value):
+                TestFixture.reclaimed.append(value)
+
+        function = InvocationCountingFunctionMock()
+        test_definition = TestDefinition(function, "unittest", "unittest", "module", {"spam": TestFixture},
+                threads=2)
+
+        self.injector.execute_test(test_definition)
+
+        assert_that(function.invocation_counter).equals(3)
+        assert_that(sorted(TestFixture.reclaimed)).equals(["eggs", "foo", "spam"])
+
+
+class TestInjectorLazyFixtureTest(unittest.TestCase):
+    def setUp(self):
+        self.injector = TestInjector()
+        self.events = []
+        events = self.events
+
+        class LazyFixture(Fixture):
+            def __init__(self, *values):
+                self._values = values
+
+            def provide(self):
+                for value in self._values:
+                    events.append("provide " + value)
+                    yield value
+
+            def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        self.lazy_fixture = LazyFixture
+
+        def test_function(**parameters):
+            events.append("test " + " ".join(parameters[name] for name in sorted(parameters)))
+
+        self.test_function = test_function
+
+    def test_should_reclaim_value_of_lazy_fixture_after_execution_using_it(self):
+        test_definition = TestDefinition(self.test_function, "unittest", "unittest", "module",
+                {"spam": self.lazy_fixture("spam", "eggs")})
+
+        results = self.injector.execute_test(test_definition)
+
+        assert_that(len(results)).equals(2)
+        assert_that(self.events).equals(["provide spam", "test spam", "reclaim spam",
+                                         "provide eggs", "test eggs", "reclaim eggs"])
+
+    def test_should_reclaim_value_of_lazy_fixture_after_all_combinations_with_eager_fixture(self):
+        test_definition = TestDefinition(self.test_function, "unittest", "unittest", "module",
+                {"a": self.lazy_fixture("spam", "eggs"), "b": enumerate("foo", "bar")})
+
+        self.injector.execute_test(test_definition)
+
+        assert_that(self.events).equals(["provide spam", "test spam foo", "test spam bar", "reclaim spam",
+                                         "provide eggs", "test eggs foo", "test eggs bar", "reclaim eggs"])
+
+    def test_should_provide_inner_lazy_fixture_again_for_each_value_of_outer_lazy_fixture(self):
+        test_definition = TestDefinition(self.test_function, "unittest", "unittest", "module",
+                {"a": self.lazy_fixture("spam", "eggs"), "b": self.lazy_fixture("foo")})
+
+        self.injector.execute_test(test_definition)
+
+        assert_that(self.events).equals(["provide spam", "provide foo", "test spam foo", "reclaim foo",
+                                         "reclaim spam", "provide eggs", "provide foo", "test eggs foo",
+                                         "reclaim foo", "reclaim eggs"])
+
+    def test_should_reclaim_value_of_lazy_fixture_after_executions_in_thread_pool(self):
+        test_definition = TestDefinition(self.test_function, "unittest", "unittest", "module",
+                {"a": self.lazy_fixture("spam", "eggs"), "b": enumerate("foo", "bar")}, threads=2)
+
+        self.injector.execute_test(test_definition)
+
+        assert_that(self.events[0]).equals("provide spam")
+        assert_that(sorted(self.events[1:3])).equals(["test spam bar", "test spam foo"])
+        assert_that(self.events[3:5]).equals(["reclaim spam", "provide eggs"])
+        assert_that(self.events[7]).equals("reclaim eggs")
+
+    def test_should_report_error_of_lazy_fixture_as_failed_result_and_reclaim_other_fixtures(self):
+        events = self.events
+
+        class FailingLazyFixture(Fixture):
+            def provide(self):
+                yield "spam"
+                raise RuntimeError("Caboom")
+
+        class EagerFixture(Fixture):
+            def provide(self):
+                return ["foo"]
+
+            def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        test_definition = TestDefinition(self.test_function, "unittest", "unittest", "module",
+                {"a": FailingLazyFixture, "b": EagerFixture})
+
+        results = self.injector.execute_test(test_definition)
+
+        assert_that(len(results)).equals(2)
+        assert_that(results[0].success).is_true()
+        assert_that(results[1].success).is_false()
+        assert_that(results[1].message).equals("Providing fixture 'FailingLazyFixture' failed: RuntimeError: Caboom")
+        assert_that(self.events).equals(["test spam foo", "reclaim foo"])
+
+    def test_should_reclaim_fixtures_when_reclaiming_value_of_lazy_fixture_fails(self):
+        events = self.events
+
+        class FailingReclaimFixture(Fixture):
+            def provide(self):
+                yield "spam"
+
+            def reclaim(self, value):
+                raise RuntimeError("Caboom")
+
+        class EagerFixture(Fixture):
+            def provide(self):
+                return ["foo"]
+
+            def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        test_definition = TestDefinition(self.test_function, "unittest", "unittest", "module",
+                {"a": FailingReclaimFixture, "b": EagerFixture})
+
+        self.assertRaises(RuntimeError, self.injector.execute_test, test_definition)
+        assert_that(self.events).equals(["test spam foo", "reclaim foo"])
+
+
+class TestInjectorFixtureScopeTest(unittest.TestCase):
+    def setUp(self):
+        self.injector = TestInjector()
+        self.events = []
+        events = self.events
+
+        class SuiteFixture(Fixture):
+            scope = SCOPE_SUITE
+
+            def provide(self):
+                events.append("provide suite")
+                return ["suite"]
+
+            def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        class ModuleFixture(Fixture):
+            scope = SCOPE_MODULE
+
+            def provide(self):
+                events.append("provide module")
+                return ["module"]
+
+            def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        self.suite_fixture = SuiteFixture
+        self.module_fixture = ModuleFixture
+        self.function = InvocationCountingFunctionMock()
+
+    def test_should_provide_suite_scoped_fixture_only_once(self):
+        test_definition = TestDefinition(self.function, "unittest", "unittest", "module",
+                {"spam": self.suite_fixture})
+
+        self.injector.execute_test(test_definition)
+        self.injector.execute_test(test_definition)
+
+        assert_that(self.function.invocation_counter).equals(2)
+        assert_that(self.events).equals(["provide suite"])
+
+    def test_should_reclaim_suite_scoped_fixture_when_fixtures_are_released(self):
+        test_definition = TestDefinition(self.function, "unittest", "unittest", "module",
+                {"spam": self.suite_fixture})
+
+        self.injector.execute_test(test_definition)
+        self.injector.release_fixtures()
+
+        assert_that(self.events).equals(["provide suite", "reclaim suite"])
+
+    def test_should_reclaim_module_scoped_fixture_when_test_of_other_module_is_executed(self):
+        self.injector.execute_test(TestDefinition(self.function, "unittest", "unittest", "module",
+                {"spam": self.module_fixture}))
+        self.injector.execute_test(TestDefinition(self.function, "unittest", "unittest", "module",
+                {"spam": self.module_fixture}))
+        self.injector.execute_test(TestDefinition(self.function, "unittest", "unittest", "other_module",
+                {"spam": self.module_fixture}))
+
+        assert_that(self.events).equals(["provide module", "reclaim module", "provide module"])
+
+    def test_should_raise_exception_when_fixture_has_unknown_scope(self):
+        class UnknownScopeFixture(Fixture):
+            scope = "spam"
+
+        test_definition = TestDefinition(self.function, "unittest", "unittest", "module",
+                {"spam": UnknownScopeFixture})
+
+        self.assertRaises(ValueError, self.injector.execute_test, test_definition)
+
+
+class RecordingTestFunction(object):
+    def __init__(self):
+        self.arguments = []
+
+    def __call__(self, **arguments):
+        self.arguments.append(arguments)
+
+
+class TestInjectorFixtureDependencyTest(unittest.TestCase):
+    def setUp(self):
+        self.injector = TestInjector()
+        self.function = RecordingTestFunction()
+        self.events = []
+        events = self.events
+
+        class ServerFixture(Fixture):
+            def provide(self):
+                events.append("provide server")
+                return [{"name": "server"}]
+
+            def reclaim(self, value):
+                events.append("reclaim server")
+
+        class ClientFixture(Fixture):
+            dependencies = {"server": ServerFixture}
+
+            def provide(self, server):
+                events.append("provide client")
+                return ["client of " + server["name"]]
+
+            def reclaim(self, value):
+                events.append("reclaim client")
+
+        class OtherClientFixture(ClientFixture):
+            pass
+
+        self.server_fixture = ServerFixture
+        self.client_fixture = ClientFixture
+        self.other_client_fixture = OtherClientFixture
+
+    def execute_test(self, givens):
+        return self.injector.execute_test(TestDefinition(self.function, "unittest", "unittest", "module", givens))
+
+    def test_should_provide_dependency_to_fixture(self):
+        self.execute_test({"client": self.client_fixture})
+
+        assert_that(self.function.arguments).equals([{"client": "client of server"}])
+
+    def test_should_reclaim_fixtures_before_their_dependencies(self):
+        self.execute_test({"client": self.client_fixture})
+
+        assert_that(self.events).equals(["provide server", "provide client", "reclaim client", "reclaim server"])
+
+    def test_should_provide_dependency_shared_by_fixtures_once(self):
+        self.execute_test({"client": self.client_fixture, "other_client": self.other_client_fixture})
+
+        assert_that(self.events.count("provide server")).equals(1)
+        assert_that(self.events.count("reclaim server")).equals(1)
+        assert_that(self.events[-1]).equals("reclaim server")
+
+    def test_should_share_dependency_with_test_when_given_to_test(self):
+        self.execute_test({"client": self.client_fixture, "server": self.server_fixture})
+
+        assert_that(self.events.count("provide server")).equals(1)
+        assert_that(self.function.arguments[0]["server"]).equals({"name": "server"})
+
+    def test_should_provide_fixture_given_twice_to_test_twice(self):
+        self.execute_test({"spam": self.server_fixture, "eggs": self.server_fixture})
+
+        assert_that(self.events.count("provide server")).equals(2)
+
+    def test_should_provide_suite_scoped_dependency_once_per_suite(self):
+        class SuiteServerFixture(self.server_fixture):
+            scope = SCOPE_SUITE
+
+        class SuiteClientFixture(self.client_fixture):
+            dependencies = {"server": SuiteServerFixture}
+
+        self.execute_test({"client": SuiteClientFixture})
+        self.execute_test({"client": SuiteClientFixture})
+
+        assert_that(self.events).equals(["provide server", "provide client", "reclaim client",
+                                         "provide client", "reclaim client"])
+
+    def test_should_provide_independent_branches_concurrently(self):
+        left_provided = threading.Event()
+        right_provided = threading.Event()
+
+        class LeftFixture(Fixture):
+            def provide(self):
+                left_provided.set()
+                return [right_provided.wait(5)]
+
+        class RightFixture(Fixture):
+            def provide(self):
+                right_provided.set()
+                return [left_provided.wait(5)]
+
+        class JoiningFixture(Fixture):
+            dependencies = {"left": LeftFixture, "right": RightFixture}
+
+            def provide(self, left, right):
+                return [left and right]
+
+        self.execute_test({"joined": JoiningFixture})
+
+        assert_that(self.function.arguments).equals([{"joined": True}])
+
+    def test_should_fail_test_when_dependency_provides_more_than_one_value(self):
+        class MultiValueClientFixture(self.client_fixture):
+            dependencies = {"server": enumerate("spam", "eggs")}
+
+        results = self.execute_test({"client": MultiValueClientFixture})
+
+        assert_that(results[0].message).equals("Providing fixture 'MultiValueClientFixture' failed: ValueError: "
+                                               "Fixture 'EnumeratingFixture' has to provide a single value as other "
+                                               "fixtures depend on it")
+
+    def test_should_raise_exception_when_dependency_has_narrower_scope(self):
+        class SuiteClientFixture(self.client_fixture):
+            scope = SCOPE_SUITE
+
+        self.assertRaises(ValueError, self.execute_test, {"client": SuiteClientFixture})
+
+    def test_should_not_provide_fixture_when_dependency_failed(self):
+        class FailingServerFixture(Fixture):
+            def provide(self):
+                raise RuntimeError("Caboom")
+
+        class FailingClientFixture(self.client_fixture):
+            dependencies = {"server": FailingServerFixture}
+
+        results = self.execute_test({"client": FailingClientFixture})
+
+        assert_that(results[0].message).equals("Providing fixture 'FailingServerFixture' failed: RuntimeError: Caboom")
+        assert_that(self.events).equals([])
+
+
+class BarrierFixture(Fixture):
+    "Provides and reclaims its value only if another fixture waits for the same barrier concurrently."
+
+    def __init__(self, barrier, events):
+        self.barrier = barrier
+        self.events = events
+
+    def provide(self):
+        self.barrier.wait()
+        return [True]
+
+    def reclaim(self, value):
+        self.barrier.wait()
+        self.events.append("reclaim")
+
+
+class TestInjectorConcurrentFixtureTest(unittest.TestCase):
+    def setUp(self):
+        self.function = RecordingTestFunction()
+        self.injector = TestInjector(fixture_threads=2)
+        self.events = []
+
+    def tearDown(self):
+        self.injector.close()
+
+    def execute_test(self, givens):
+        return self.injector.execute_test(TestDefinition(self.function, "unittest", "unittest", "module", givens))
+
+    def test_should_provide_and_reclaim_independent_fixtures_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        self.execute_test({"left": BarrierFixture(barrier, self.events),
+                           "right": BarrierFixture(barrier, self.events)})
+
+        assert_that(self.function.arguments).equals([{"left": True, "right": True}])
+        assert_that(self.events).equals(["reclaim", "reclaim"])
+
+    def test_should_report_failing_fixture_as_failed_result_and_reclaim_provided_values(self):
+        events = self.events
+
+        class PassingFixture(Fixture):
+            def provide(self):
+                return ["spam"]
+
+            def reclaim(self, value):
+                events.append("reclaim " + value)
+
+        class FailingFixture(Fixture):
+            def provide(self):
+                raise RuntimeError("Caboom")
+
+        for injector in (TestInjector(), self.injector):
+            del events[:]
+            self.injector = injector
+
+            results = self.execute_test({"a": PassingFixture, "b": FailingFixture})
+
+            assert_that(len(results)).equals(1)
+            assert_that(results[0].success).is_false()
+            assert_that(results[0].message).equals("Providing fixture 'FailingFixture' failed: RuntimeError: Caboom")
+            assert_that(results[0].traceback_as_string).contains("Caboom")
+            assert_that(events).equals(["reclaim spam"])
+        assert_that(self.function.arguments).equals([])
+
+
+class TestInjectorTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def _create_test_definition(self, timeout=None):
+        release = self.release
+
+        def hanging_test_function():
+            release.wait(5)
+
+        return TestDefinition(hanging_test_function, "unittest", "unittest", "module", {}, timeout=timeout)
+
+    def test_should_report_execution_exceeding_timeout_as_failure_with_stack(self):
+        results = TestInjector().execute_test(self._create_test_definition(timeout=0.05))
+
+        assert_that(results[0].success).is_false()
+        assert_that(results[0].message).equals("Execution timed out after 0.05 seconds")
+        assert_that(results[0].traceback_as_string).contains("hanging_test_function")
+
+    def test_should_apply_default_timeout_to_test_without_timeout(self):
+        results = TestInjector(default_timeout=0.05).execute_test(self._create_test_definition())
+
+        assert_that(results[0].success).is_false()
+
+    def test_should_prefer_timeout_of_test_over_default_timeout(self):
+        self.release.set()
+
+        results = TestInjector(default_timeout=0.001).execute_test(self._create_test_definition(timeout=5))
+
+        assert_that(results[0].success).is_true()
+
+
 class TestInjectorInterceptorsTest(unittest.TestCase):
     def setUp(self):
         def test(): pass
@@ -317,3 +1031,78 @@ class TestInjectorInterceptorsTest(unittest.TestCase):
         assert_that(len(results)).is_equal_to(1)
         assert_that(results[0].success).is_false()
         assert_that(results[0].message).is_equal_to("Execution of after interceptor failed: Exception: Caboom")
+
+
+class SleepingFixture(Fixture):
+    def provide(self):
+        time.sleep(0.002)
+        return ["spam", "eggs"]
+
+    def reclaim(self, value):
+        time.sleep(0.002)
+
+
+class TestInjectorPhaseTimesTest(unittest.TestCase):
+    def setUp(self):
+        def before():
+            time.sleep(0.002)
+
+        def test_function(spam):
+            time.sleep(0.002)
+
+        self.test_definition = TestDefinition(test_function, "unittest", "unittest", "unittest",
+                                              {"spam": SleepingFixture}, [before])
+        self.results = TestInjector().execute_test(self.test_definition)
+
+    def test_should_measure_phases_of_each_execution(self):
+        for result in self.results:
+            assert_that(result.phase_times[PHASE_BEFORE]).is_greater_than(2000000)
+            assert_that(result.phase_times[PHASE_TEST]).is_greater_than(2000000)
+            assert_that(result.execution_time_ns).is_greater_than(4000000)
+
+    def test_should_account_fixture_phases_to_first_result_only(self):
+        assert_that(self.results[0].phase_times[PHASE_PROVIDE]).is_greater_than(2000000)
+        assert_that(self.results[0].phase_times[PHASE_RECLAIM]).is_greater_than(4000000)
+        assert_that(PHASE_PROVIDE in self.results[1].phase_times).is_false()
+
+
+class TestInjectorBenchmarkTest(unittest.TestCase):
+    def test_should_attach_benchmark_statistics_to_result_of_each_parameter_set(self):
+        def test_function(size):
+            test_function.sizes.append(size)
+
+        test_function.sizes = []
+
+        results = TestInjector().execute_test(TestDefinition(test_function, "unittest", "unittest", "unittest",
+                {"size": enumerate(10, 1000)}, benchmark=Benchmark(warmup=1, rounds=2, min_round_time=0)))
+
+        assert_that(test_function.sizes).equals([10] * 4 + [1000] * 4)
+        assert_that([r.benchmark_statistics.rounds for r in results]).equals([2, 2])
+
+    def test_should_not_attach_benchmark_statistics_to_result_of_plain_test(self):
+        def test_function():
+            pass
+
+        results = TestInjector().execute_test(TestDefinition(test_function, "unittest", "unittest", "unittest", {}))
+
+        assert_that(results[0].benchmark_statistics).is_none()
+
+
+class Canary(object):
+    pass
+
+
+class TestRunnerStreamingResultsTest(unittest.TestCase):
+    def test_should_not_keep_locals_of_failed_tests_alive(self):
+        canaries = []
+
+        def failing_test():
+            canary = Canary()
+            canaries.append(weakref.ref(canary))
+            raise Exception("Caboom")
+
+        test_suite_result = TestRunner(keep_results=False).run_tests([
+            TestDefinition(failing_test, "unittest", "unittest", "unittest", {})])
+
+        assert_that(test_suite_result.number_of_failures).equals(1)
+        assert_that(canaries[0]()).is_none()
@@ -15,6 +15,9 @@
 
 __author__ = "Alexander Metzner"
 
+import os
+import shutil
+import tempfile
 import unittest
 from pyassert import assert_that
 
@@ -38,3 +41,31 @@ class HumanizeCamelCaseNameTest(unittest.TestCase):
     def test_should_humanize_name_with_camelcase_and_leading_upper_case_letter(self):
         assert_that(humanize_camel_case_name("EnsureThatNameIsOk")).equals("Ensure that name is ok")
 
+
+
+class JsonFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "spam.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_should_read_written_document(self):
+        write_json_file(self.filename, {"spam": ["eggs"]})
+
+        assert_that(read_json_file(self.filename)).equals({"spam": ["eggs"]})
+
+    def test_should_return_default_when_file_does_not_exist(self):
+        assert_that(read_json_file(self.filename, {})).equals({})
+
+    def test_should_return_default_when_file_is_not_valid_json(self):
+        with open(self.filename, "w") as f:
+            f.write("spam")
+
+        assert_that(read_json_file(self.filename, {})).equals({})
+
+
+class GetResidentMemorySizeTest(unittest.TestCase):
+    def test_should_return_positive_size_in_bytes(self):
+        assert_that(get_resident_memory_size() > 1024 * 1024).is_true()